@@ -1,6 +1,8 @@
 import os
+import time
 import urllib.parse
 import logging
+from typing import Any, Dict, Optional
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
@@ -15,50 +17,162 @@ class Base(DeclarativeBase):
 # Initialize SQLAlchemy with the Base class
 db = SQLAlchemy(model_class=Base)
 
-# Create the Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "country_data_aggregator_secret")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database with proper URL encoding for special characters
-if os.environ.get("DATABASE_URL"):
-    # Use environment variables directly for more control
-    password = os.environ.get("PGPASSWORD", "")
-    user = os.environ.get("PGUSER", "postgres")
-    host = os.environ.get("PGHOST", "localhost")
-    database = os.environ.get("PGDATABASE", "countrydata")
-    port = os.environ.get("PGPORT", "5432")
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Create and configure the application.
     
-    # Construct the URL with proper encoding for special characters
-    db_url = f"postgresql://{user}:{urllib.parse.quote_plus(password)}@{host}:{port}/{database}"
-    logger.info(f"Connecting to database at {host}:{port}/{database}")
-else:
-    # Fallback to SQLite for development if no DATABASE_URL
-    db_url = "sqlite:///country_data.db"
-    logger.info("Using SQLite database")
-
-app.config["SQLALCHEMY_DATABASE_URI"] = db_url
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-
-# Initialize the database with the app
-db.init_app(app)
-
-with app.app_context():
-    # Import models here so tables are created
+    Nothing here connects to the database: the schema is upgraded by the
+    ``upgrade-db`` command, or here only when SCHEMA_AUTO_UPGRADE is set, so
+    workers boot quickly and start even while the database is unreachable.
+    
+    Args:
+        config: Settings applied over the ones read from the environment.
+    
+    Returns:
+        Flask application.
+    """
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "country_data_aggregator_secret")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    
+    # Configure the database with proper URL encoding for special characters
+    if os.environ.get("SQLALCHEMY_DATABASE_URI"):
+        # A complete URL overrides everything else, e.g. to point benchmarks at a scratch database
+        db_url = os.environ["SQLALCHEMY_DATABASE_URI"]
+        logger.info("Using database from SQLALCHEMY_DATABASE_URI")
+    elif os.environ.get("DATABASE_URL"):
+        # Use environment variables directly for more control
+        password = os.environ.get("PGPASSWORD", "")
+        user = os.environ.get("PGUSER", "postgres")
+        host = os.environ.get("PGHOST", "localhost")
+        database = os.environ.get("PGDATABASE", "countrydata")
+        port = os.environ.get("PGPORT", "5432")
+        
+        # Construct the URL with proper encoding for special characters
+        db_url = f"postgresql://{user}:{urllib.parse.quote_plus(password)}@{host}:{port}/{database}"
+        logger.info(f"Connecting to database at {host}:{port}/{database}")
+    else:
+        # Fallback to SQLite for development if no DATABASE_URL
+        db_url = "sqlite:///country_data.db"
+        logger.info("Using SQLite database")
+    
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Idle connections are checked by ConnectionHealthCheck instead of pre-pinging every checkout;
+    # LIFO reuse keeps the busy connections warm and lets surplus ones age out
+    engine_options = {"pool_recycle": 300}
+    if db_url not in ("sqlite://", "sqlite:///:memory:"):
+        # In-memory SQLite uses a per-thread pool that takes no queue options
+        engine_options["pool_use_lifo"] = True
+        # Connections per process; the gunicorn config sizes them for the worker's threads
+        if os.environ.get("DB_POOL_SIZE"):
+            engine_options["pool_size"] = int(os.environ["DB_POOL_SIZE"])
+            engine_options["max_overflow"] = int(os.environ.get("DB_MAX_OVERFLOW", "2"))
+        if db_url.startswith("postgresql"):
+            # TCP keepalives let the kernel notice dead connections without extra queries
+            engine_options["connect_args"] = {"keepalives": 1, "keepalives_idle": 30, "keepalives_interval": 10}
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+    # Pooled connections idle for this many seconds are pinged before use (0 pings every
+    # checkout, a negative value never pings)
+    app.config["DB_IDLE_PING_SECONDS"] = float(os.environ.get("DB_IDLE_PING_SECONDS", "30"))
+    # Rows per INSERT ... ON CONFLICT statement when saving refreshed countries
+    app.config["UPSERT_CHUNK_SIZE"] = int(os.environ.get("UPSERT_CHUNK_SIZE", "500"))
+    # Upper bound on how long /api/refresh waits for the upstream fetch, retries included
+    app.config["REFRESH_FETCH_TIMEOUT"] = float(os.environ.get("REFRESH_FETCH_TIMEOUT", "60"))
+    # Largest page size accepted by /api/countries and the page size of the country list view
+    app.config["API_MAX_PAGE_SIZE"] = int(os.environ.get("API_MAX_PAGE_SIZE", "1000"))
+    app.config["COUNTRY_LIST_PAGE_SIZE"] = int(os.environ.get("COUNTRY_LIST_PAGE_SIZE", "50"))
+    # Rows fetched per database round trip by /api/export
+    app.config["EXPORT_BATCH_SIZE"] = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+    # Largest number of results returned by /api/search
+    app.config["SEARCH_MAX_RESULTS"] = int(os.environ.get("SEARCH_MAX_RESULTS", "50"))
+    # Request, SQL, upstream and refresh-stage metrics served on /metrics, and a slow-query
+    # log of statements taking at least this many seconds (0 turns the log off)
+    app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    app.config["SLOW_QUERY_LOG_SECONDS"] = float(os.environ.get("SLOW_QUERY_LOG_SECONDS", "0"))
+    # Records processed and saved per batch by the ingest-dump command
+    app.config["INGEST_BATCH_SIZE"] = int(os.environ.get("INGEST_BATCH_SIZE", "500"))
+    # HTTP caching of read endpoints: Cache-Control lifetimes in seconds, and the number of
+    # response bodies and their total bytes (with compressed variants) each worker keeps per
+    # data generation. Comma-separated warm paths are rendered into the cache after each
+    # refresh that changes the data, and before forking under gunicorn --preload
+    app.config["HTTP_CACHE_ENABLED"] = os.environ.get("HTTP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    app.config["HTTP_CACHE_MAX_AGE"] = int(os.environ.get("HTTP_CACHE_MAX_AGE", "60"))
+    app.config["HTTP_CACHE_STALE_WHILE_REVALIDATE"] = int(os.environ.get("HTTP_CACHE_STALE_WHILE_REVALIDATE", "300"))
+    app.config["HTTP_CACHE_MAX_ENTRIES"] = int(os.environ.get("HTTP_CACHE_MAX_ENTRIES", "512"))
+    app.config["HTTP_CACHE_MAX_BYTES"] = int(os.environ.get("HTTP_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    app.config["HTTP_CACHE_WARM_PATHS"] = [
+        path.strip() for path in os.environ.get("HTTP_CACHE_WARM_PATHS", "").split(",") if path.strip()
+    ]
+    # Flag images downloaded by each refresh and served from FLAG_CACHE_DIR instead of the
+    # upstream CDN. FLAG_LIST_MODE "inline" embeds them in the country list as data URIs
+    app.config["FLAG_CACHE_ENABLED"] = os.environ.get("FLAG_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    app.config["FLAG_CACHE_DIR"] = os.environ.get("FLAG_CACHE_DIR", os.path.join(app.instance_path, "flags"))
+    app.config["FLAG_MINIFY"] = os.environ.get("FLAG_MINIFY", "true").lower() in ("1", "true", "yes")
+    app.config["FLAG_LIST_MODE"] = os.environ.get("FLAG_LIST_MODE", "link")
+    # Background refresh jobs: a running job that has not reported progress for this long
+    # is considered dead, and a positive interval schedules periodic refreshes
+    app.config["REFRESH_JOB_STALE_SECONDS"] = int(os.environ.get("REFRESH_JOB_STALE_SECONDS", "300"))
+    app.config["REFRESH_INTERVAL_SECONDS"] = int(os.environ.get("REFRESH_INTERVAL_SECONDS", "0"))
+    # Upgrade the schema while creating the app, for single-process development setups
+    app.config["SCHEMA_AUTO_UPGRADE"] = os.environ.get("SCHEMA_AUTO_UPGRADE", "false").lower() in ("1", "true", "yes")
+    # Start the periodic refresh scheduler in create_app; the gunicorn config turns this off
+    # when preloading and starts it in every worker after the fork instead
+    app.config["REFRESH_SCHEDULER_AUTOSTART"] = os.environ.get("REFRESH_SCHEDULER_AUTOSTART", "true").lower() in ("1", "true", "yes")
+    # Time in seconds create_app may take before a warning is logged (0 turns the check off)
+    app.config["STARTUP_BUDGET_SECONDS"] = float(os.environ.get("STARTUP_BUDGET_SECONDS", "0.5"))
+    if config:
+        app.config.update(config)
+    
+    # Initialize the database with the app
+    db.init_app(app)
+    
+    # Import models here so their tables are registered with the metadata
     import models  # noqa: F401
     
     # Import routes after models to avoid circular imports
     from routes.api import api_bp
+    from routes.flags import flags_bp
+    from routes.metrics import metrics_bp
     from routes.views import views_bp
     
     # Register blueprints
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(views_bp)
+    app.register_blueprint(flags_bp)
+    if app.config["METRICS_ENABLED"]:
+        app.register_blueprint(metrics_bp)
+    
+    # Time requests, SQL statements and upstream calls
+    from services.metrics import RequestMetrics
+    RequestMetrics.init_app(app)
+    
+    # Check pooled connections that sat idle before handing them out
+    from services.connection_health import ConnectionHealthCheck
+    ConnectionHealthCheck.init_app(app)
+    
+    # Register CLI commands
+    from services.dump_ingest import ingest_dump_command
+    from services.flag_assets import sync_flags_command
+    from services.schema import SchemaManager, upgrade_db_command
+    app.cli.add_command(ingest_dump_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(sync_flags_command)
+    
+    if app.config["SCHEMA_AUTO_UPGRADE"]:
+        with app.app_context():
+            SchemaManager.upgrade()
+    
+    # Start periodic refreshes if configured
+    if app.config["REFRESH_SCHEDULER_AUTOSTART"]:
+        from services.refresh_jobs import RefreshJobRunner
+        RefreshJobRunner.start_scheduler(app)
     
-    # Create database tables
-    db.create_all()
-    logger.info("Database tables created")
+    elapsed = time.perf_counter() - started
+    budget = app.config["STARTUP_BUDGET_SECONDS"]
+    if 0 < budget < elapsed:
+        logger.warning(f"Application created in {elapsed * 1000:.0f} ms, over the {budget * 1000:.0f} ms startup budget")
+    else:
+        logger.info(f"Application created in {elapsed * 1000:.0f} ms")
+    return app
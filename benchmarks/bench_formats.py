@@ -0,0 +1,120 @@
+"""
+Compare the JSON, MessagePack and Arrow IPC encodings of country listings.
+
+Usage:
+    python -m benchmarks.bench_formats [--sizes 250,10000] [--repeat 20] [--output formats.json]
+
+For each snapshot size, a listing is encoded the way /api/countries encodes
+it for each Accept type: JSON through ``jsonify`` over the per-snapshot row
+dictionaries, MessagePack and Arrow from the column arrays. "cold" is the
+first request of a data generation, which also builds the per-generation
+caches (row dictionaries, serialized columns, the Arrow table); "warm" is the
+median of --repeat further requests. Body sizes are reported raw and
+gzip-compressed, as the response cache would send them.
+
+The snapshot is built in memory from synthetic countries; no database is
+needed. Formats whose package (msgpack, pyarrow) is not installed are skipped.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+# (label, fields, rows per page or None for the full listing)
+LISTINGS = [
+    ("all_fields", None, None),
+    ("two_fields", ["name", "population"], None),
+    ("page_100", None, 100),
+]
+
+
+def build_snapshot(rows: int, generation: int):
+    """Build a snapshot of synthetic countries without touching a database."""
+    from benchmarks.bench_processing import synthetic_raw_countries
+    from services.country_snapshot import COLUMN_NAMES, CountrySnapshot
+    from services.data_processor import CountryDataProcessor
+
+    processed = CountryDataProcessor.process_countries_batch(synthetic_raw_countries(rows)).records
+    records = []
+    for row_id, country in enumerate(processed, start=1):
+        country["id"] = row_id
+        records.append(tuple(country.get(name) for name in COLUMN_NAMES))
+    return CountrySnapshot(generation, records)
+
+
+def encode(app, snapshot, mimetype: str, fields: Optional[List[str]], limit: Optional[int]) -> bytes:
+    """Encode one listing the way the /api/countries view does for an Accept type."""
+    from flask import jsonify
+    from services.country_encoding import JSON_MIMETYPE, ColumnarEncoder
+
+    positions = snapshot.select(sort_by="name")
+    page = positions[:limit] if limit else positions
+    metadata = {"count": len(page), "total": len(positions), "next_cursor": None}
+    with app.test_request_context():
+        if mimetype == JSON_MIMETYPE:
+            return jsonify({"success": True, **metadata, "data": snapshot.serialize(page, fields)}).get_data()
+        return ColumnarEncoder.encode(mimetype, snapshot, page, fields, metadata=metadata)
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    """Time and size every format, listing and snapshot size."""
+    os.environ.setdefault("REFRESH_SCHEDULER_AUTOSTART", "false")
+    from app import create_app
+    from services.country_encoding import offered_mimetypes
+
+    app = create_app()
+    mimetypes = sorted(set(offered_mimetypes()) & {
+        "application/json", "application/msgpack", "application/vnd.apache.arrow.stream"
+    }, key=offered_mimetypes().index)
+    results: Dict[str, Any] = {"sizes": {}}
+    generation = 0
+    for rows in sizes:
+        size_results = results["sizes"][str(rows)] = {}
+        for label, fields, limit in LISTINGS:
+            for mimetype in mimetypes:
+                # A fresh snapshot per format, so each cold timing builds its own caches
+                generation += 1
+                snapshot = build_snapshot(rows, generation)
+                start = time.perf_counter()
+                body = encode(app, snapshot, mimetype, fields, limit)
+                cold = time.perf_counter() - start
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    encode(app, snapshot, mimetype, fields, limit)
+                    timings.append(time.perf_counter() - start)
+                size_results.setdefault(label, {})[mimetype] = {
+                    "cold_ms": round(cold * 1000, 2),
+                    "warm_ms": round(statistics.median(timings) * 1000, 2),
+                    "bytes": len(body),
+                    "gzip_bytes": len(gzip.compress(body, compresslevel=6, mtime=0)),
+                }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="250,10000", help="Comma-separated snapshot sizes")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run([int(size) for size in args.sizes.split(",")], args.repeat)
+
+    print(f"{'rows':>7} {'listing':<11} {'format':<37}{'cold ms':>9}{'warm ms':>9}{'bytes':>11}{'gzip':>10}")
+    for rows, listings in results["sizes"].items():
+        for label, formats in listings.items():
+            for mimetype, result in formats.items():
+                print(f"{rows:>7} {label:<11} {mimetype:<37}{result['cold_ms']:>9.2f}{result['warm_ms']:>9.2f}"
+                      f"{result['bytes']:>11}{result['gzip_bytes']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
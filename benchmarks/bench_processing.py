@@ -0,0 +1,118 @@
+"""
+Benchmark the batch processor against the per-record processor and check they agree.
+
+Usage:
+    python -m benchmarks.bench_processing [--records 100000] [--batch-size 5000] [--invalid-every 50]
+
+Both paths process the same synthetic REST Countries records. Every
+``--invalid-every``-th record has a malformed field, so the fallback path is
+covered too. The outputs must be identical apart from ``last_updated``, which
+the batch path sets once per batch.
+"""
+import argparse
+import logging
+import time
+from typing import Any, Dict, List
+
+from services.data_processor import CountryDataProcessor
+
+
+def synthetic_raw_countries(count: int, invalid_every: int = 0) -> List[Dict[str, Any]]:
+    """Build raw country records shaped like REST Countries /all output."""
+    regions = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Antarctic"]
+    records = []
+    for index in range(count):
+        record = {
+            "name": {"common": f"Country {index:07d}", "official": f"Republic of Country {index:07d}"},
+            "cca3": f"{index % 17576:03d}"[:3],
+            "cca2": f"{index % 676:02d}"[:2],
+            "capital": [f"Capital {index}"] if index % 7 else [f"Capital {index}", f"Seat {index}"],
+            "region": regions[index % len(regions)],
+            "subregion": f"Subregion {index % 23}",
+            "population": 1000 + index * 37,
+            "area": 10.0 + index * 1.5,
+            "flag": "\U0001F3F3",
+            "flags": {"png": f"https://flagcdn.com/w320/{index}.png", "svg": f"https://flagcdn.com/{index}.svg"},
+            "independent": index % 9 != 0,
+            "unMember": index % 5 != 0,
+            "landlocked": index % 6 == 0,
+            "latlng": [(index * 7.3) % 170 - 85, (index * 13.7) % 360 - 180],
+            "borders": [f"{(index + step) % 17576:03d}"[:3] for step in (1, 2) if index % 4],
+            "currencies": {"EUR": {"name": "Euro", "symbol": "€"}, f"C{index % 40:02d}": {"name": f"Coin {index % 40}"}},
+            "languages": {"eng": "English", f"l{index % 60:02d}": f"Language {index % 60}"},
+        }
+        # Optional fields are missing from some records upstream
+        if index % 11 == 0:
+            del record["subregion"], record["capital"], record["currencies"]
+        if invalid_every and index % invalid_every == invalid_every - 1:
+            malformed = index // invalid_every % 5
+            if malformed == 0:
+                record["capital"] = [None]
+            elif malformed == 1:
+                record["languages"] = {"eng": None}
+            elif malformed == 2:
+                record["currencies"] = ["EUR"]
+            elif malformed == 3:
+                record["flags"] = None
+            else:
+                record["borders"] = [None]
+        records.append(record)
+    return records
+
+
+def without_timestamps(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop ``last_updated``, the only field allowed to differ between the paths."""
+    return [{key: value for key, value in record.items() if key != "last_updated"} for record in records]
+
+
+def run(records: int, batch_size: int, invalid_every: int) -> Dict[str, float]:
+    """Time both processing paths and check their outputs are identical."""
+    raw_countries = synthetic_raw_countries(records, invalid_every)
+
+    start = time.perf_counter()
+    per_record = CountryDataProcessor.process_countries_list(raw_countries)
+    per_record_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = []
+    errors = []
+    for offset in range(0, len(raw_countries), batch_size):
+        result = CountryDataProcessor.process_countries_batch(raw_countries[offset:offset + batch_size])
+        batched.extend(result.records)
+        errors.extend(result.errors)
+    batch_seconds = time.perf_counter() - start
+
+    # Raised rather than asserted so ``python -O`` still checks; tests/test_data_processor.py covers the same
+    if without_timestamps(batched) != without_timestamps(per_record):
+        raise RuntimeError("batch output differs from per-record output")
+    if not all(len({record["last_updated"] for record in batched[offset:offset + batch_size]}) == 1
+               for offset in range(0, len(batched), batch_size)):
+        raise RuntimeError("batch records have different timestamps")
+    expected_errors = records // invalid_every if invalid_every else 0
+    if len(errors) != expected_errors:
+        raise RuntimeError(f"expected {expected_errors} errors, got {len(errors)}")
+
+    return {"per_record": per_record_seconds, "batch": batch_seconds, "errors": len(errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--invalid-every", type=int, default=50)
+    args = parser.parse_args()
+
+    # The per-record path logs every malformed record; keep the benchmark output readable
+    logging.getLogger("services.data_processor").setLevel(logging.CRITICAL)
+
+    results = run(args.records, args.batch_size, args.invalid_every)
+
+    print(f"outputs identical ({results['errors']} malformed records reported by the batch path)")
+    print(f"{'path':<14}{'seconds':>10}{'records/s':>14}")
+    for label in ("per_record", "batch"):
+        print(f"{label:<14}{results[label]:>10.3f}{args.records / results[label]:>14.0f}")
+    print(f"batch speedup: {results['per_record'] / results['batch']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
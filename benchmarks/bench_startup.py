@@ -0,0 +1,100 @@
+"""
+Measure worker cold start against a budget.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 10] [--budget-ms 800] [--database-url URL]
+
+Each run starts a fresh interpreter and imports ``main``, which is what a
+gunicorn worker does before it can serve. The import time (inside the
+process) and the wall time of the whole process are reported. The exit status
+is 1 when the median import time exceeds --budget-ms, or when a module that
+should load lazily (the HTTP client, the refresh pipeline, pyarrow) was imported during
+boot, so the script can gate a CI job.
+
+The database URL only has to be well formed: booting must not connect to it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+# Modules that must not be imported while a worker boots
+LAZY_MODULES = ["requests", "services.data_fetcher", "services.refresh_pipeline", "pyarrow"]
+
+BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def boot_once(env: Dict[str, str]) -> Dict[str, Any]:
+    """Start one interpreter that imports the app and return its timings."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", BOOT_SCRIPT], env=env, capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(f"worker boot failed:\n{completed.stderr[-4000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["wall_seconds"] = wall_seconds
+    return result
+
+
+def run(runs: int, database_url: str) -> Dict[str, Any]:
+    """Boot ``runs`` fresh interpreters and summarize the timings in milliseconds."""
+    env = dict(os.environ)
+    env.update({
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "REFRESH_INTERVAL_SECONDS": "0",
+        "SCHEMA_AUTO_UPGRADE": "false",
+    })
+    # The first boot also compiles bytecode; it is not counted
+    boot_once(env)
+    boots: List[Dict[str, Any]] = [boot_once(env) for _ in range(runs)]
+
+    summary: Dict[str, Any] = {}
+    for key in ("import_seconds", "wall_seconds"):
+        values = sorted(boot[key] * 1000 for boot in boots)
+        label = key.replace("_seconds", "")
+        summary[f"{label}_p50_ms"] = round(statistics.median(values), 1)
+        summary[f"{label}_max_ms"] = round(values[-1], 1)
+    summary["lazy_modules_loaded"] = sorted({name for boot in boots for name in boot["loaded"]})
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=800, help="Largest acceptable median import time")
+    parser.add_argument("--database-url", default="sqlite:////nonexistent/boot.db",
+                        help="Database URL given to the app; the default points nowhere")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    summary = run(args.runs, args.database_url)
+    summary["budget_ms"] = args.budget_ms
+
+    print(f"import main: p50 {summary['import_p50_ms']} ms, max {summary['import_max_ms']} ms")
+    print(f"process:     p50 {summary['wall_p50_ms']} ms, max {summary['wall_max_ms']} ms")
+    failed = False
+    if summary["import_p50_ms"] > args.budget_ms:
+        print(f"over the {args.budget_ms:g} ms startup budget")
+        failed = True
+    if summary["lazy_modules_loaded"]:
+        print(f"loaded during boot, should be lazy: {', '.join(summary['lazy_modules_loaded'])}")
+        failed = True
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summary, output, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the batched upsert path against the per-row save path.
+
+Usage:
+    python -m benchmarks.bench_upsert [--rows 250] [--chunk-size 500] [--database-url URL]
+
+Without --database-url a temporary SQLite database is used. Each path is timed on
+an empty table (all inserts) and again on a populated table (all updates).
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from flask import Flask
+
+from app import db
+from models import Country
+from services.data_processor import CountryDataProcessor
+
+
+def make_app(database_url: str) -> Flask:
+    """Create a throwaway Flask app bound to the given database."""
+    bench_app = Flask(__name__)
+    bench_app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    bench_app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(bench_app)
+    return bench_app
+
+
+def synthetic_countries(count: int, generation: int = 0) -> List[Dict[str, Any]]:
+    """Build processed country dictionaries shaped like CountryDataProcessor output."""
+    now = datetime.utcnow()
+    regions = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Antarctic"]
+    return [
+        {
+            "name": f"Country {index:07d}",
+            "official_name": f"Republic of Country {index:07d}",
+            "country_code": f"{index % 17576:03d}"[:3],
+            "capital": f"Capital {index}",
+            "region": regions[index % len(regions)],
+            "subregion": f"Subregion {index % 23}",
+            "population": 1000 + index * 37 + generation,
+            "area": 10.0 + index * 1.5 + generation,
+            "flag_emoji": "",
+            "flag_url": f"https://flagcdn.com/{index}.svg",
+            "independent": True,
+            "un_member": index % 5 != 0,
+            "last_updated": now,
+            "currencies": "EUR (Euro, €)",
+            "languages": "English, French",
+        }
+        for index in range(count)
+    ]
+
+
+def time_call(function, *args) -> Dict[str, float]:
+    """Run a save function and return its wall-clock time and result."""
+    start = time.perf_counter()
+    saved = function(*args)
+    return {"seconds": time.perf_counter() - start, "saved": saved}
+
+
+def run(rows: int, chunk_size: int, database_url: str) -> Dict[str, Dict[str, float]]:
+    """Time both save paths for inserts and updates."""
+    bench_app = make_app(database_url)
+    results = {}
+    with bench_app.app_context():
+        for label, save in (
+            ("per_row", CountryDataProcessor.save_countries_individually),
+            ("bulk_upsert", lambda data: CountryDataProcessor.save_countries_to_db(data, chunk_size)),
+        ):
+            db.drop_all()
+            db.create_all()
+            results[f"{label}_insert"] = time_call(save, synthetic_countries(rows))
+            results[f"{label}_update"] = time_call(save, synthetic_countries(rows, generation=1))
+            assert Country.query.count() == rows
+        db.drop_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=250)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    # Per-row saves log every country; keep the benchmark output readable
+    logging.getLogger("services.data_processor").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp_dir, 'bench_upsert.db')}"
+        results = run(args.rows, args.chunk_size, database_url)
+
+    print(f"{'path':<22}{'seconds':>10}{'rows/s':>12}{'saved':>8}")
+    for label, result in results.items():
+        print(f"{label:<22}{result['seconds']:>10.3f}{args.rows / result['seconds']:>12.0f}{result['saved']:>8}")
+    for operation in ("insert", "update"):
+        speedup = results[f"per_row_{operation}"]["seconds"] / results[f"bulk_upsert_{operation}"]["seconds"]
+        print(f"bulk upsert {operation} speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare two bench_api result files and flag regressions.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--metric p50_ms] [--threshold 0.2]
+
+Runs are matched by database dialect and row count. An endpoint or refresh
+stage regresses when the candidate is slower than the baseline by more than
+``--threshold`` (a fraction) and by more than ``--min-delta-ms``, which keeps
+sub-millisecond noise out of the report. The exit status is 1 when anything
+regressed, so the script can gate a CI job.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, Tuple
+
+
+def load(path: str) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Read a result file, keyed by (dialect, rows)."""
+    with open(path) as result_file:
+        report = json.load(result_file)
+    return {(run["dialect"], run["rows"]): run for run in report["runs"]}
+
+
+def timings(run: Dict[str, Any], metric: str) -> Iterator[Tuple[str, float]]:
+    """Labelled timings of a run in milliseconds."""
+    for label, refresh in run.get("refresh", {}).items():
+        yield f"refresh {label}", refresh["seconds"] * 1000
+    if "seed_seconds" in run:
+        yield "seed", run["seed_seconds"] * 1000
+    for label, timing in run["endpoints"].items():
+        yield label, timing[metric]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms", choices=["cold_ms", "min_ms", "p50_ms", "p95_ms", "mean_ms"],
+                        help="Endpoint timing to compare")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    regressions = 0
+
+    for key in sorted(baseline.keys() & candidate.keys()):
+        print(f"\n{key[0]}, {key[1]} rows")
+        print(f"  {'timing':<34}{'baseline':>11}{'candidate':>11}{'change':>9}")
+        before = dict(timings(baseline[key], args.metric))
+        for label, after in timings(candidate[key], args.metric):
+            if label not in before:
+                continue
+            change = (after - before[label]) / before[label] if before[label] else 0.0
+            regressed = change > args.threshold and after - before[label] > args.min_delta_ms
+            regressions += regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {label:<34}{before[label]:>11.2f}{after:>11.2f}{change:>+9.0%}{flag}")
+
+    for key in sorted(baseline.keys() ^ candidate.keys()):
+        print(f"\nskipped {key[0]}, {key[1]} rows: only in {'baseline' if key in baseline else 'candidate'}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
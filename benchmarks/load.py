@@ -0,0 +1,232 @@
+"""
+Drive the app with concurrent HTTP requests and report latency and throughput.
+
+Usage:
+    python -m benchmarks.load --url http://127.0.0.1:5000 [--concurrency 16] [--duration 30]
+    python -m benchmarks.load --spawn [--rows 10000] [--config gunicorn.conf.py] [--workers 4]
+                              [--concurrency 16] [--duration 30]
+
+With --url the requests go to a running server. With --spawn a temporary
+SQLite database is seeded with --rows synthetic countries and served by
+``gunicorn main:app`` for the duration of the run, with the given gunicorn
+config file and worker count (gunicorn's defaults when neither is given).
+
+Each of the --concurrency client threads keeps one HTTP session and cycles
+through --paths. Requests in the first --warmup seconds are not counted.
+Per path and overall, the p50/p95/p99 latency, requests per second and error
+count are printed and, with --output, written as JSON. The client is Python,
+so very high concurrencies measure the client as much as the server; run it
+on another machine or in several processes for those.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+DEFAULT_PATHS = [
+    "/api/countries?limit=100",
+    "/api/countries?sort=population&order=desc&limit=100",
+    "/api/countries?region=Europe&sort=area&limit=100",
+    "/api/stats",
+    "/api/dashboard",
+    "/countries",
+]
+
+# Seconds to wait for a spawned server to answer
+SPAWN_TIMEOUT = 60
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds, throughput and error count."""
+    ordered = sorted(samples)
+    summary: Dict[str, Any] = {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 1) if seconds > 0 else 0.0,
+    }
+    if ordered:
+        for percent in (50, 95, 99):
+            summary[f"p{percent}_ms"] = round(percentile(ordered, percent) * 1000, 3)
+        summary["max_ms"] = round(ordered[-1] * 1000, 3)
+    return summary
+
+
+def run_load(base_url: str, paths: List[str], concurrency: int, duration: float, warmup: float) -> Dict[str, Any]:
+    """
+    Request the paths from concurrent threads for a fixed time.
+
+    Returns:
+        Dictionary with a summary per path and ``overall``.
+    """
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    # Per path: latencies of successful requests and the number of failed ones
+    samples: Dict[str, List[float]] = {path: [] for path in paths}
+    errors: Dict[str, int] = {path: 0 for path in paths}
+    lock = threading.Lock()
+
+    def client(offset: int) -> None:
+        session = requests.Session()
+        latencies: Dict[str, List[float]] = {path: [] for path in paths}
+        failures: Dict[str, int] = {path: 0 for path in paths}
+        index = offset
+        while True:
+            path = paths[index % len(paths)]
+            index += 1
+            request_start = time.perf_counter()
+            if request_start >= stop_at:
+                break
+            try:
+                response = session.get(base_url + path, timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            if request_start < measure_from:
+                continue
+            if ok:
+                latencies[path].append(time.perf_counter() - request_start)
+            else:
+                failures[path] += 1
+        session.close()
+        with lock:
+            for path in paths:
+                samples[path].extend(latencies[path])
+                errors[path] += failures[path]
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = {path: summarize(samples[path], errors[path], duration) for path in paths}
+    results["overall"] = summarize(
+        [latency for path in paths for latency in samples[path]], sum(errors.values()), duration
+    )
+    return results
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def spawned_server(rows: int, workers: Optional[int], config: Optional[str]) -> Iterator[str]:
+    """Seed a temporary database, serve it with gunicorn and yield the base URL."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env.update({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(directory, 'load.db')}",
+            "REFRESH_INTERVAL_SECONDS": "0",
+        })
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_api", "--worker", "--seed-only", "--rows", str(rows)],
+            env=env, check=True, stdout=subprocess.DEVNULL
+        )
+
+        port = free_port()
+        command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", "--log-level", "warning"]
+        if config:
+            command += ["--config", config]
+        if workers:
+            command += ["--workers", str(workers)]
+        server = subprocess.Popen(command + ["main:app"], env=env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + SPAWN_TIMEOUT
+            while True:
+                if server.poll() is not None:
+                    raise SystemExit("gunicorn exited; is it installed (pip install gunicorn)?")
+                try:
+                    requests.get(base_url + "/api/regions", timeout=1)
+                    break
+                except requests.RequestException:
+                    if time.monotonic() > deadline:
+                        raise SystemExit("gunicorn did not start serving in time")
+                    time.sleep(0.2)
+            yield base_url
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    """Print the per-path summaries as a table."""
+    print(f"{'path':<56}{'requests':>9}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+    for path, summary in results.items():
+        print(f"{path:<56}{summary['requests']:>9}{summary['rps']:>9.1f}"
+              f"{summary.get('p50_ms', 0):>9.2f}{summary.get('p95_ms', 0):>9.2f}"
+              f"{summary.get('p99_ms', 0):>9.2f}{summary['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running server")
+    target.add_argument("--spawn", action="store_true", help="Seed a scratch database and serve it with gunicorn")
+    parser.add_argument("--rows", type=int, default=10000, help="Countries seeded with --spawn")
+    parser.add_argument("--workers", type=int, help="gunicorn workers with --spawn")
+    parser.add_argument("--config", help="gunicorn config file with --spawn, e.g. gunicorn.conf.py")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--paths", help="Comma-separated paths to request (defaults to a mix of API and view routes)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    paths = args.paths.split(",") if args.paths else DEFAULT_PATHS
+
+    def measure(base_url: str) -> Dict[str, Any]:
+        print(f"{args.concurrency} clients against {base_url} for {args.duration:g}s")
+        return run_load(base_url.rstrip("/"), paths, args.concurrency, args.duration, args.warmup)
+
+    if args.spawn:
+        with spawned_server(args.rows, args.workers, args.config) as base_url:
+            results = measure(base_url)
+    else:
+        results = measure(args.url)
+    print_results(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "target": "spawn" if args.spawn else args.url,
+                "rows": args.rows if args.spawn else None,
+                "workers": args.workers if args.spawn else None,
+                "config": args.config if args.spawn else None,
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Local stand-in for the REST Countries API, used by the benchmarks.
+
+Serves ``/all``, ``/name/<name>`` and ``/region/<region>`` from an in-memory
+list of raw country records, with an ETag on ``/all`` so conditional fetches
+get ``304 Not Modified`` while the records are unchanged. Tests can make
+paths fail or hang, and read how often each path was requested.
+"""
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StubState:
+    """Records served by the stub and their encoded ``/all`` body."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.lock = threading.Lock()
+        # Path -> error statuses to answer its next requests with
+        self.failures: Dict[str, List[int]] = {}
+        # Path -> seconds to wait before answering it
+        self.delays: Dict[str, float] = {}
+        # Path -> number of requests received
+        self.hits: Dict[str, int] = {}
+        self.set_records(records)
+
+    def set_records(self, records: List[Dict[str, Any]]) -> None:
+        """Replace the served records."""
+        body = json.dumps(records, ensure_ascii=False).encode("utf-8")
+        with self.lock:
+            self.records = records
+            self.body = body
+            self.etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+    def fail(self, path: str, *statuses: int) -> None:
+        """Answer the next requests to a path with these error statuses, in order."""
+        with self.lock:
+            self.failures.setdefault(path, []).extend(statuses)
+
+    def delay(self, path: str, seconds: float) -> None:
+        """Wait before answering every request to a path."""
+        with self.lock:
+            self.delays[path] = seconds
+
+    def record_hit(self, path: str) -> Tuple[Optional[int], float]:
+        """Count a request and return the error status to send, if any, and the delay."""
+        with self.lock:
+            self.hits[path] = self.hits.get(path, 0) + 1
+            failures = self.failures.get(path)
+            return (failures.pop(0) if failures else None), self.delays.get(path, 0.0)
+
+
+def make_handler(state: StubState):
+    """Build a request handler class bound to a stub state."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, body: bytes, etag: str = None) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+            status, delay = state.record_hit(path)
+            if delay:
+                time.sleep(delay)
+            if status is not None:
+                self.send_error(status)
+                return
+            with state.lock:
+                records, body, etag = state.records, state.body, state.etag
+
+            if path == "/all":
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_json(body, etag)
+            elif path.startswith("/name/"):
+                name = path[len("/name/"):].lower()
+                matches = [record for record in records if record["name"]["common"].lower() == name]
+                if matches:
+                    self.send_json(json.dumps(matches, ensure_ascii=False).encode("utf-8"))
+                else:
+                    self.send_error(404)
+            elif path.startswith("/region/"):
+                region = path[len("/region/"):].lower()
+                matches = [record for record in records if record.get("region", "").lower() == region]
+                self.send_json(json.dumps(matches, ensure_ascii=False).encode("utf-8"))
+            else:
+                self.send_error(404)
+
+    return StubHandler
+
+
+def start(records: List[Dict[str, Any]]) -> Tuple[ThreadingHTTPServer, StubState, str]:
+    """
+    Start the stub on a free local port in a daemon thread.
+
+    Args:
+        records: Raw country records to serve.
+
+    Returns:
+        The server, its state (call ``set_records`` to change the data) and its base URL.
+    """
+    state = StubState(records)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
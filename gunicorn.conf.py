@@ -0,0 +1,112 @@
+"""
+Production gunicorn settings.
+
+Usage:
+    gunicorn -c gunicorn.conf.py main:app
+
+Every setting can be changed through the environment:
+
+    PORT, GUNICORN_BIND          Listen address (default 0.0.0.0:$PORT, port 5000)
+    WEB_CONCURRENCY              Worker processes (default one per CPU)
+    GUNICORN_WORKER_CLASS        sync (default), gthread, or gevent (needs gevent installed)
+    GUNICORN_THREADS             Threads per gthread worker (default 4)
+    GUNICORN_WORKER_CONNECTIONS  Concurrent requests per gevent worker (default 100)
+    GUNICORN_PRELOAD             Load and warm the app once before forking (default true)
+    GUNICORN_TIMEOUT             Seconds before a silent worker is restarted (default 30)
+    GUNICORN_ACCESS_LOG          Write an access log to stdout (default false)
+    LOG_LEVEL                    Level of the gunicorn and application logs (default info)
+    DB_POOL_SIZE, DB_MAX_OVERFLOW
+                                 Connections per worker, derived from the worker class unless set
+
+With preloading, the master process creates the app, loads the country
+snapshot, search and geo indexes and statistics, renders the HTTP_CACHE_WARM_PATHS
+pages into the response cache, and closes its database connections before forking. Workers share the warmed memory copy-on-write and open their
+own connections. The refresh scheduler is started in each worker after the
+fork, since threads do not survive it.
+"""
+import logging
+import multiprocessing
+import os
+
+def _flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+# Requests are served from in-memory snapshots and are CPU-bound, so one sync
+# worker per core measured fastest (see the Serving Profile in docs/deployment.md)
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.environ.get("GUNICORN_THREADS", "4")) if worker_class == "gthread" else 1
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "100"))
+preload_app = _flag("GUNICORN_PRELOAD", "true")
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = timeout
+keepalive = 5
+
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+errorlog = "-"
+accesslog = "-" if _flag("GUNICORN_ACCESS_LOG", "false") else None
+
+# One pool per worker, sized for the requests it serves at once. The two overflow
+# connections cover a background refresh job and the scheduler. Gevent workers run
+# many more requests than the database should see, so they queue for at most 10.
+if worker_class == "gevent":
+    concurrent_requests = min(worker_connections, 10)
+else:
+    concurrent_requests = threads
+os.environ.setdefault("DB_POOL_SIZE", str(concurrent_requests))
+os.environ.setdefault("DB_MAX_OVERFLOW", "2")
+os.environ.setdefault("LOG_LEVEL", loglevel.upper())
+if preload_app:
+    os.environ.setdefault("REFRESH_SCHEDULER_AUTOSTART", "false")
+
+logger = logging.getLogger("gunicorn.error")
+
+def when_ready(server):
+    """Warm the per-process caches in the master, then drop its connections before forking."""
+    if not preload_app:
+        return
+    app = server.app.wsgi()
+    from app import db
+    from services.country_geo import CountryGeoIndex
+    from services.country_search import CountryNameIndex
+    from services.country_snapshot import CountrySnapshotCache
+    from services.country_stats import CountryStatsService
+    from services.http_cache import ResponseCache
+
+    with app.app_context():
+        try:
+            snapshot = CountrySnapshotCache.get()
+            CountryNameIndex.get()
+            CountryGeoIndex.get()
+            CountryStatsService.get()
+            logger.info(f"Warmed country snapshot with {snapshot.count} countries before forking")
+            ResponseCache.warm(app)
+        except Exception as e:
+            # Workers load the caches on their first requests instead
+            logger.warning(f"Could not warm caches before forking: {str(e)}")
+        finally:
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+def post_fork(server, worker):
+    """Give the worker fresh connections and its own refresh scheduler."""
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            logger.warning("psycogreen is not installed; PostgreSQL queries block gevent workers")
+
+    if not preload_app:
+        return
+    app = server.app.wsgi()
+    from app import db
+    from services.refresh_jobs import RefreshJobRunner
+
+    with app.app_context():
+        # Connections inherited from the master belong to it; never reuse them here
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    RefreshJobRunner.start_scheduler(app)
@@ -1,8 +1,15 @@
 import logging
-from app import app
+import os
+from app import create_app
 
-# Set up logging configuration
-logging.basicConfig(level=logging.DEBUG)
+# Set up logging configuration; LOG_LEVEL=DEBUG restores verbose logs
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+
+app = create_app()
 
 if __name__ == "__main__":
+    # The development server upgrades the schema itself; deployments run upgrade-db once
+    from services.schema import SchemaManager
+    with app.app_context():
+        SchemaManager.upgrade()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -1,3 +1,4 @@
+import json
 from app import db
 from datetime import datetime
 
@@ -5,7 +6,7 @@ class Country(db.Model):
     """Model for country data."""
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
-    official_name = db.Column(db.String(200))
+    official_name = db.Column(db.String(200), index=True)
     capital = db.Column(db.String(100))
     region = db.Column(db.String(100))
     subregion = db.Column(db.String(100))
@@ -13,12 +14,25 @@ class Country(db.Model):
     area = db.Column(db.Float)
     flag_emoji = db.Column(db.String(10))
     flag_url = db.Column(db.String(255))
-    country_code = db.Column(db.String(3))
-    currencies = db.Column(db.String(255))
-    languages = db.Column(db.String(255))
+    country_code = db.Column(db.String(3), index=True)
+    currencies = db.Column(db.Text)
+    languages = db.Column(db.Text)
     independent = db.Column(db.Boolean, default=True)
     un_member = db.Column(db.Boolean, default=True)
+    alpha2_code = db.Column(db.String(2), index=True)
+    borders = db.Column(db.Text)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    landlocked = db.Column(db.Boolean, default=False)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+    content_hash = db.Column(db.String(64))
+    
+    # Composite indexes for the common filter and sort combinations of listings
+    # and exports; the leading column also serves plain region/subregion filters
+    __table_args__ = (
+        db.Index("ix_country_region_population", "region", "population"),
+        db.Index("ix_country_subregion_area", "subregion", "area"),
+    )
     
     def __repr__(self):
         return f"<Country {self.name}>"
@@ -43,3 +57,159 @@ class Country(db.Model):
             "un_member": self.un_member,
             "last_updated": self.last_updated.isoformat() if self.last_updated else None
         }
+
+
+# Association tables between countries and their languages and currencies. The
+# second primary key column is indexed on its own for "countries using X" lookups.
+country_language = db.Table(
+    "country_language",
+    db.Column("country_id", db.Integer, db.ForeignKey("country.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("language_code", db.String(10), db.ForeignKey("language.code"), primary_key=True, index=True)
+)
+
+country_currency = db.Table(
+    "country_currency",
+    db.Column("country_id", db.Integer, db.ForeignKey("country.id", ondelete="CASCADE"), primary_key=True),
+    db.Column("currency_code", db.String(10), db.ForeignKey("currency.code"), primary_key=True, index=True)
+)
+
+
+class Language(db.Model):
+    """Model for a language spoken in one or more countries."""
+    __tablename__ = "language"
+    
+    code = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<Language {self.code}>"
+    
+    def to_dict(self):
+        """Convert Language object to dictionary."""
+        return {
+            "code": self.code,
+            "name": self.name
+        }
+
+
+class Currency(db.Model):
+    """Model for a currency used in one or more countries."""
+    __tablename__ = "currency"
+    
+    code = db.Column(db.String(10), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    symbol = db.Column(db.String(20))
+    
+    def __repr__(self):
+        return f"<Currency {self.code}>"
+    
+    def to_dict(self):
+        """Convert Currency object to dictionary."""
+        return {
+            "code": self.code,
+            "name": self.name,
+            "symbol": self.symbol
+        }
+
+
+class CountryHistory(db.Model):
+    """
+    Versioned population and area of a country, delta-encoded.
+    
+    A row is recorded only when a country's population, area or region changes.
+    It holds the change since the previous row, so the value at any time is the
+    sum of the deltas up to it. When a country moves to another region, one row
+    removes its values from the old region and another adds them to the new one.
+    """
+    __tablename__ = "country_history"
+    __table_args__ = (
+        # Covering indexes: history and series queries are index-only range scans
+        db.Index("ix_country_history_country_time", "country_id", "recorded_at", "population_delta", "area_delta"),
+        db.Index("ix_country_history_region_time", "region", "recorded_at", "population_delta", "area_delta"),
+        db.Index("ix_country_history_time", "recorded_at", "population_delta", "area_delta"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    country_id = db.Column(db.Integer, db.ForeignKey("country.id", ondelete="CASCADE"), nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    region = db.Column(db.String(100))
+    population_delta = db.Column(db.BigInteger, nullable=False, default=0)
+    area_delta = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<CountryHistory {self.country_id} {self.recorded_at}>"
+
+
+class AppState(db.Model):
+    """Key/value store for application state shared across processes."""
+    __tablename__ = "app_state"
+    
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<AppState {self.key}>"
+
+
+class FlagAsset(db.Model):
+    """Local copy of a flag image, stored under a name derived from its content."""
+    __tablename__ = "flag_asset"
+    
+    url = db.Column(db.String(255), primary_key=True)
+    filename = db.Column(db.String(64), nullable=False)
+    etag = db.Column(db.String(255))
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<FlagAsset {self.filename} {self.url}>"
+
+
+class RefreshJob(db.Model):
+    """Model for a background refresh of the country data."""
+    __tablename__ = "refresh_job"
+    
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    trigger = db.Column(db.String(20), nullable=False, default="manual")
+    force = db.Column(db.Boolean, nullable=False, default=False)
+    stage = db.Column(db.String(50))
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text)
+    result = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<RefreshJob {self.id} {self.status}>"
+    
+    def to_dict(self):
+        """Convert RefreshJob object to dictionary."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "trigger": self.trigger,
+            "force": self.force,
+            "stage": self.stage,
+            "progress": self.progress,
+            "message": self.message,
+            "result": json.loads(self.result) if self.result else None,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class CountryStats(db.Model):
+    """Materialized statistics over the country table, one row per key."""
+    __tablename__ = "country_stats"
+    
+    key = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CountryStats {self.key} generation={self.generation}>"
@@ -1,9 +1,18 @@
 import logging
-from flask import Blueprint, jsonify, request, current_app
-from models import Country
-from app import db
-from services.data_fetcher import RestCountriesAPI
-from services.data_processor import CountryDataProcessor
+from datetime import datetime, timezone
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
+from services.country_comparison import DEFAULT_NEIGHBORS, MAX_NEIGHBORS, CountryComparisonIndex
+from services.country_encoding import JSON_MIMETYPE, ColumnarEncoder, negotiate_mimetype
+from services.country_export import EXPORT_FORMATS, CountryExporter
+from services.country_filters import parse_filters, parse_sort
+from services.country_geo import DEFAULT_HOPS, MAX_DISTANCE_KM, MAX_HOPS, CountryGeoIndex
+from services.country_history import CountryHistoryService
+from services.country_search import CountryNameIndex
+from services.country_snapshot import CountrySnapshotCache, parse_fields
+from services.country_stats import CountryStatsService
+from services.dashboard import DEFAULT_TOP_N, MAX_TOP_N, DashboardService
+from services.refresh_jobs import RefreshJobRunner
+from services.http_cache import cache_response
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -11,87 +20,227 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 api_bp = Blueprint('api', __name__)
 
+# Fields returned by /api/search unless ``fields`` is given
+SEARCH_RESULT_FIELDS = ('id', 'name', 'official_name', 'country_code', 'region', 'flag_emoji')
+
 @api_bp.route('/refresh', methods=['POST'])
 def refresh_countries():
     """
-    Refresh country data from the REST Countries API.
+    Start a background refresh of country data from the REST Countries API.
+    
+    If a refresh is already queued or running (in any worker), the request joins
+    it instead of starting another one.
+    
+    Query Parameters:
+        force (str, optional): Set to "true" to ignore stored ETag/Last-Modified validators.
+    
+    Returns:
+        JSON response with the refresh job, status 202.
+    """
+    try:
+        force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+        job, started = RefreshJobRunner.enqueue(force=force)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Refresh job started' if started else 'Joined refresh job already in progress',
+            'joined': not started,
+            'job': job.to_dict()
+        }), 202
+    
+    except Exception as e:
+        logger.error(f"Error starting refresh job: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error refreshing countries data: {str(e)}'
+        }), 500
+
+@api_bp.route('/refresh/<string:job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    """
+    Get the progress of a refresh job.
     
+    Args:
+        job_id (str): Id of the refresh job.
+        
     Returns:
-        JSON response with refresh status.
+        JSON response with the refresh job.
     """
     try:
-        # Fetch all countries data
-        countries_data = RestCountriesAPI.retry_fetch(RestCountriesAPI.fetch_all_countries)
+        job = RefreshJobRunner.get_job(job_id)
         
-        if not countries_data:
+        if not job:
             return jsonify({
                 'success': False,
-                'message': 'Failed to fetch country data from API'
-            }), 500
-        
-        # Process and save country data
-        processed_countries = CountryDataProcessor.process_countries_list(countries_data)
-        saved_count = CountryDataProcessor.save_countries_to_db(processed_countries)
+                'message': f'Refresh job {job_id} not found'
+            }), 404
         
         return jsonify({
             'success': True,
-            'message': f'Successfully refreshed {saved_count} countries data',
-            'total_countries': len(countries_data),
-            'saved_countries': saved_count
+            'job': job.to_dict()
         })
     
     except Exception as e:
-        logger.error(f"Error refreshing countries data: {str(e)}")
+        logger.error(f"Error getting refresh job {job_id}: {str(e)}")
         return jsonify({
             'success': False,
-            'message': f'Error refreshing countries data: {str(e)}'
+            'message': f'Error getting refresh job: {str(e)}'
         }), 500
 
+def parse_limit(value, max_limit, name='limit'):
+    """
+    Parse a ``limit``-style query parameter.
+    
+    Args:
+        value (str): Raw parameter value, or None.
+        max_limit (int): Largest allowed value.
+        name (str): Parameter name used in error messages.
+        
+    Returns:
+        Page size as an int, or None if no limit was requested.
+        
+    Raises:
+        ValueError: If the value is not an integer between 1 and max_limit.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f'{name} must be between 1 and {max_limit}')
+    return limit
+
+def parse_coordinate(value, name, bound):
+    """
+    Parse a latitude or longitude query parameter.
+    
+    Args:
+        value (str): Raw parameter value, or None.
+        name (str): Parameter name used in error messages.
+        bound (int): Largest absolute value (90 for latitudes, 180 for longitudes).
+        
+    Returns:
+        Coordinate in degrees as a float.
+        
+    Raises:
+        ValueError: If the value is missing, not a number or out of range.
+    """
+    if value is None or value == '':
+        raise ValueError(f'Query parameter {name} is required')
+    try:
+        coordinate = float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+    if not -bound <= coordinate <= bound:
+        raise ValueError(f'{name} must be between -{bound} and {bound}')
+    return coordinate
+
+def parse_time_range():
+    """
+    Parse the ``from`` and ``to`` query parameters of history endpoints.
+    
+    Returns:
+        Tuple of (start, end) datetimes, each None if not given.
+    
+    Raises:
+        ValueError: If a value is not an ISO 8601 date or datetime, or the range is reversed.
+    """
+    bounds = []
+    for name in ('from', 'to'):
+        value = request.args.get(name)
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            bound = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+        # Stored times are naive UTC
+        if bound.tzinfo is not None:
+            bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+        bounds.append(bound)
+    start, end = bounds
+    if start is not None and end is not None and start > end:
+        raise ValueError('from must not be later than to')
+    return start, end
+
 @api_bp.route('/countries', methods=['GET'])
+@cache_response(negotiate=negotiate_mimetype)
 def get_countries():
     """
-    Get all countries or filter by region.
+    Get all countries, filtered, sorted and paged.
     
     Query Parameters:
         region (str, optional): Filter countries by region.
-        sort (str, optional): Sort field (name, population, area).
-        order (str, optional): Sort order (asc, desc).
+        subregion (str, optional): Filter countries by subregion.
+        independent, un_member, landlocked (bool, optional): Filter on the flag (true, false).
+        population_min, population_max (number, optional): Inclusive population bounds.
+        area_min, area_max (number, optional): Inclusive area bounds.
+        language (str, optional): Filter countries by language code or name.
+        currency (str, optional): Filter countries by currency code or name.
+        sort (str, optional): Sort field, or comma-separated fields with a ``-``
+            prefix for descending keys (name, population, area, region, subregion).
+        order (str, optional): Sort order (asc, desc) of keys without a prefix.
+        limit (int, optional): Maximum number of countries to return.
+        cursor (str, optional): Keyset cursor from the previous page's ``next_cursor``.
+        fields (str, optional): Comma-separated fields to include in each country.
         
     Returns:
-        JSON response with countries data.
+        JSON response with countries data, or columnar MessagePack or Arrow IPC
+        when the Accept header prefers them.
     """
     try:
         # Get query parameters
-        region = request.args.get('region')
+        language = request.args.get('language')
+        currency = request.args.get('currency')
         sort_by = request.args.get('sort', 'name')
         order = request.args.get('order', 'asc')
+        cursor = request.args.get('cursor')
         
-        # Start with base query
-        query = Country.query
-        
-        # Apply region filter if provided
-        if region:
-            query = query.filter(Country.region == region)
-        
-        # Apply sorting
-        valid_sort_fields = {'name', 'population', 'area', 'region'}
-        if sort_by in valid_sort_fields:
-            sort_field = getattr(Country, sort_by)
+        try:
+            limit = parse_limit(request.args.get('limit'), current_app.config['API_MAX_PAGE_SIZE'])
+            fields = parse_fields(request.args.get('fields'))
+            filters = parse_filters(request.args)
+            parse_sort(sort_by, order)
             
-            if order.lower() == 'desc':
-                query = query.order_by(sort_field.desc())
-            else:
-                query = query.order_by(sort_field.asc())
+            # Filter, sort and page from the in-memory snapshot of the country table
+            snapshot = CountrySnapshotCache.get()
+            positions, next_cursor, total = snapshot.page(
+                sort_by=sort_by,
+                order=order,
+                limit=limit,
+                cursor=cursor,
+                language=language,
+                currency=currency,
+                filters=filters
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        # Execute query
-        countries = query.all()
+        mimetype = negotiate_mimetype()
+        if mimetype != JSON_MIMETYPE:
+            body = ColumnarEncoder.encode(
+                mimetype,
+                snapshot,
+                positions,
+                fields,
+                metadata={'count': len(positions), 'total': total, 'next_cursor': next_cursor}
+            )
+            return Response(body, mimetype=mimetype)
         
-        # Convert to dict
-        countries_data = [country.to_dict() for country in countries]
+        # Only the requested columns are read and serialized
+        countries_data = snapshot.serialize(positions, fields)
         
         return jsonify({
             'success': True,
             'count': len(countries_data),
+            'total': total,
+            'next_cursor': next_cursor,
             'data': countries_data
         })
     
@@ -102,11 +251,78 @@ def get_countries():
             'message': f'Error getting countries: {str(e)}'
         }), 500
 
+@api_bp.route('/export', methods=['GET'])
+def export_countries():
+    """
+    Stream countries as NDJSON or CSV.
+    
+    Rows are read from the database with a server-side cursor and written as
+    they arrive, so memory use does not grow with the table.
+    
+    Query Parameters:
+        format (str, optional): Export format (ndjson, csv); defaults to ndjson.
+        region, subregion, independent, un_member, landlocked, population_min,
+        population_max, area_min, area_max (optional): Filters, as for /countries.
+        language (str, optional): Filter countries by language code or name.
+        currency (str, optional): Filter countries by currency code or name.
+        sort (str, optional): Sort field or fields, as for /countries.
+        order (str, optional): Sort order (asc, desc).
+        fields (str, optional): Comma-separated fields to include.
+        
+    Returns:
+        Streaming response with the exported countries.
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        
+        sort_by = request.args.get('sort', 'name')
+        order = request.args.get('order', 'asc')
+        try:
+            fields = parse_fields(request.args.get('fields'))
+            filters = parse_filters(request.args)
+            parse_sort(sort_by, order)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        rows = CountryExporter.stream(
+            export_format,
+            fields=fields,
+            batch_size=current_app.config['EXPORT_BATCH_SIZE'],
+            sort_by=sort_by,
+            order=order,
+            language=request.args.get('language'),
+            currency=request.args.get('currency'),
+            filters=filters
+        )
+        
+        response = Response(stream_with_context(rows), mimetype=EXPORT_FORMATS[export_format])
+        response.headers['Content-Disposition'] = f'attachment; filename=countries.{export_format}'
+        return response
+    
+    except Exception as e:
+        logger.error(f"Error exporting countries: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting countries: {str(e)}'
+        }), 500
+
 @api_bp.route('/countries/<string:name>', methods=['GET'])
+@cache_response()
 def get_country(name):
     """
     Get a specific country by name.
     
+    Exact matches on name, official name or country code win; otherwise a
+    name prefix matching exactly one country. Anything else is a 404.
+    
     Args:
         name (str): Name of the country.
         
@@ -114,10 +330,10 @@ def get_country(name):
         JSON response with country data.
     """
     try:
-        # Search for country by name
-        country = Country.query.filter(Country.name.ilike(f"%{name}%")).first()
+        name_index = CountryNameIndex.get()
+        position = name_index.resolve(name)
         
-        if not country:
+        if position is None:
             return jsonify({
                 'success': False,
                 'message': f'Country {name} not found'
@@ -125,7 +341,7 @@ def get_country(name):
         
         return jsonify({
             'success': True,
-            'data': country.to_dict()
+            'data': name_index.snapshot.serialize([position])[0]
         })
     
     except Exception as e:
@@ -135,48 +351,367 @@ def get_country(name):
             'message': f'Error getting country: {str(e)}'
         }), 500
 
-@api_bp.route('/stats', methods=['GET'])
-def get_stats():
+@api_bp.route('/countries/<string:code>/comparison', methods=['GET'])
+@cache_response()
+def get_country_comparison(code):
     """
-    Get statistics about countries.
+    Compare a country with its region and the world.
     
+    Args:
+        code (str): Country code, or a name resolved like /countries/<name>.
+        
+    Query Parameters:
+        k (int, optional): Number of neighbours per metric (defaults to 4).
+        
     Returns:
-        JSON response with statistics.
+        JSON response with regional and world averages, ranks, percentiles and
+        nearest neighbours by population, area and density.
     """
     try:
-        # Get total count
-        total_countries = Country.query.count()
+        try:
+            k = parse_limit(request.args.get('k'), MAX_NEIGHBORS, name='k') or DEFAULT_NEIGHBORS
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        # Get region counts
-        region_query = db.session.query(
-            Country.region, 
-            db.func.count(Country.id).label('count')
-        ).group_by(Country.region).all()
+        comparison_index = CountryComparisonIndex.get()
+        position = CountryNameIndex.get().resolve(code)
         
-        region_stats = [{'region': region, 'count': count} for region, count in region_query]
+        if position is None:
+            return jsonify({
+                'success': False,
+                'message': f'Country {code} not found'
+            }), 404
         
-        # Get population stats
-        total_population = db.session.query(db.func.sum(Country.population)).scalar() or 0
-        avg_population = db.session.query(db.func.avg(Country.population)).scalar() or 0
+        return jsonify({
+            'success': True,
+            'data': comparison_index.compare(position, k)
+        })
+    
+    except Exception as e:
+        logger.error(f"Error comparing country {code}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error comparing country: {str(e)}'
+        }), 500
+
+@api_bp.route('/countries/<string:code>/neighbors', methods=['GET'])
+@cache_response()
+def get_country_neighbors(code):
+    """
+    Get the countries bordering a country, optionally over several borders.
+    
+    Args:
+        code (str): Country code, or a name resolved like /countries/<name>.
         
-        # Get area stats
-        total_area = db.session.query(db.func.sum(Country.area)).scalar() or 0
-        avg_area = db.session.query(db.func.avg(Country.area)).scalar() or 0
+    Query Parameters:
+        hops (int, optional): Largest number of land borders crossed (defaults to 1).
+        to (str, optional): Destination country; adds the land route crossing the
+            fewest borders, or null if there is none.
+        
+    Returns:
+        JSON response with the country, its bordering countries and the
+        countries within ``hops`` borders.
+    """
+    try:
+        try:
+            hops = parse_limit(request.args.get('hops'), MAX_HOPS, name='hops') or DEFAULT_HOPS
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        geo_index = CountryGeoIndex.get()
+        name_index = CountryNameIndex.get()
+        position = name_index.resolve(code)
+        
+        if position is None:
+            return jsonify({
+                'success': False,
+                'message': f'Country {code} not found'
+            }), 404
+        
+        country = geo_index.country(position)
+        country['borders'] = geo_index.border_codes(position)
+        neighbors = []
+        for other, distance in geo_index.neighbors(position, hops):
+            neighbor = geo_index.country(other)
+            neighbor['hops'] = distance
+            neighbors.append(neighbor)
+        data = {
+            'country': country,
+            'hops': hops,
+            'count': len(neighbors),
+            'neighbors': neighbors
+        }
+        
+        destination = request.args.get('to', '').strip()
+        if destination:
+            target = name_index.resolve(destination)
+            if target is None:
+                return jsonify({
+                    'success': False,
+                    'message': f'Country {destination} not found'
+                }), 404
+            path = geo_index.shortest_path(position, target)
+            data['path'] = [geo_index.country(step) for step in path] if path is not None else None
         
         return jsonify({
             'success': True,
-            'stats': {
-                'total_countries': total_countries,
-                'regions': region_stats,
-                'population': {
-                    'total': total_population,
-                    'average': avg_population
-                },
-                'area': {
-                    'total': total_area,
-                    'average': avg_area
+            'data': data
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting neighbors of country {code}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting neighbors: {str(e)}'
+        }), 500
+
+@api_bp.route('/nearby', methods=['GET'])
+@cache_response()
+def get_nearby_countries():
+    """
+    Find the countries whose centroid is near a point.
+    
+    Query Parameters:
+        lat (float): Latitude in degrees.
+        lng (float): Longitude in degrees.
+        radius (float, optional): Distance in kilometres; all countries within it
+            are returned. Without it the ``limit`` nearest countries are.
+        limit (int, optional): Maximum number of results (defaults to 10 without
+            a radius).
+        
+    Returns:
+        JSON response with countries and their distance, nearest first.
+    """
+    try:
+        try:
+            latitude = parse_coordinate(request.args.get('lat'), 'lat', 90)
+            longitude = parse_coordinate(request.args.get('lng'), 'lng', 180)
+            radius = request.args.get('radius')
+            if radius is not None and radius != '':
+                try:
+                    radius = float(radius)
+                except ValueError:
+                    raise ValueError('radius must be a number')
+                if not 0 < radius <= MAX_DISTANCE_KM:
+                    raise ValueError(f'radius must be between 0 and {MAX_DISTANCE_KM:.0f} km')
+            else:
+                radius = None
+            limit = parse_limit(request.args.get('limit'), current_app.config['SEARCH_MAX_RESULTS'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        geo_index = CountryGeoIndex.get()
+        if radius is not None:
+            matches = geo_index.within(latitude, longitude, radius)
+            if limit:
+                matches = matches[:limit]
+        else:
+            matches = geo_index.nearest(latitude, longitude, limit or 10)
+        
+        countries_data = []
+        for position, distance in matches:
+            country = geo_index.country(position)
+            country['distance_km'] = round(distance, 1)
+            countries_data.append(country)
+        
+        return jsonify({
+            'success': True,
+            'count': len(countries_data),
+            'data': countries_data
+        })
+    
+    except Exception as e:
+        logger.error(f"Error finding countries near {request.args.get('lat')}, {request.args.get('lng')}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error finding nearby countries: {str(e)}'
+        }), 500
+
+@api_bp.route('/countries/<string:code>/history', methods=['GET'])
+@cache_response()
+def get_country_history(code):
+    """
+    Get the population and area history of a country.
+    
+    Args:
+        code (str): Country code, or a name resolved like /countries/<name>.
+    
+    Query Parameters:
+        from (str, optional): ISO 8601 start of the range.
+        to (str, optional): ISO 8601 end of the range.
+    
+    Returns:
+        JSON response with one point per recorded change; the first point is
+        the value in effect at ``from``.
+    """
+    try:
+        try:
+            start, end = parse_time_range()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        name_index = CountryNameIndex.get()
+        snapshot = name_index.snapshot
+        position = name_index.resolve(code)
+        
+        if position is None:
+            return jsonify({
+                'success': False,
+                'message': f'Country {code} not found'
+            }), 404
+        
+        history = CountryHistoryService.country_history(snapshot.columns['id'][position], start, end)
+        
+        return jsonify({
+            'success': True,
+            'country': snapshot.serialize([position], ['id', 'name', 'country_code', 'region'])[0],
+            'count': len(history),
+            'data': history
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting history of country {code}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting country history: {str(e)}'
+        }), 500
+
+@api_bp.route('/history/population', methods=['GET'])
+@cache_response()
+def get_population_history():
+    """
+    Get the total population and area of the world or a region over time.
+    
+    Query Parameters:
+        region (str, optional): Region to aggregate (defaults to the world).
+        from (str, optional): ISO 8601 start of the range.
+        to (str, optional): ISO 8601 end of the range.
+    
+    Returns:
+        JSON response with one point per refresh that changed the totals.
+    """
+    try:
+        try:
+            start, end = parse_time_range()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        region = request.args.get('region') or None
+        series = CountryHistoryService.population_series(region, start, end)
+        
+        return jsonify({
+            'success': True,
+            'region': region,
+            'count': len(series),
+            'data': series
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting population history: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting population history: {str(e)}'
+        }), 500
+
+@api_bp.route('/search', methods=['GET'])
+@cache_response(negotiate=negotiate_mimetype)
+def search_countries():
+    """
+    Search countries by partial or misspelt name, official name or country code.
+    
+    Query Parameters:
+        q (str): Search text.
+        limit (int, optional): Maximum number of results (defaults to 10).
+        fields (str, optional): Comma-separated fields to include in each country.
+        
+    Returns:
+        JSON response with ranked matches, or columnar MessagePack or Arrow IPC
+        when the Accept header prefers them.
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({
+                'success': False,
+                'message': 'Query parameter q is required'
+            }), 400
+        
+        try:
+            limit = parse_limit(request.args.get('limit'), current_app.config['SEARCH_MAX_RESULTS']) or 10
+            fields = parse_fields(request.args.get('fields')) or list(SEARCH_RESULT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        name_index = CountryNameIndex.get()
+        matches = name_index.search(query, limit=limit)
+        
+        mimetype = negotiate_mimetype()
+        if mimetype != JSON_MIMETYPE:
+            body = ColumnarEncoder.encode(
+                mimetype,
+                name_index.snapshot,
+                [position for position, kind, score in matches],
+                fields,
+                metadata={'count': len(matches)},
+                extra_columns={
+                    'match': [kind for position, kind, score in matches],
+                    'score': [score for position, kind, score in matches]
                 }
-            }
+            )
+            return Response(body, mimetype=mimetype)
+        
+        countries_data = name_index.snapshot.serialize([position for position, kind, score in matches], fields)
+        for country, (position, kind, score) in zip(countries_data, matches):
+            country['match'] = kind
+            country['score'] = score
+        
+        return jsonify({
+            'success': True,
+            'count': len(countries_data),
+            'data': countries_data
+        })
+    
+    except Exception as e:
+        logger.error(f"Error searching countries for {request.args.get('q')}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error searching countries: {str(e)}'
+        }), 500
+
+@api_bp.route('/stats', methods=['GET'])
+@cache_response()
+def get_stats():
+    """
+    Get statistics about countries, including per-region and per-subregion breakdowns.
+    
+    Returns:
+        JSON response with statistics.
+    """
+    try:
+        # Statistics are materialized once per data generation
+        stats = CountryStatsService.get()
+        
+        return jsonify({
+            'success': True,
+            'stats': stats
         })
     
     except Exception as e:
@@ -186,7 +721,45 @@ def get_stats():
             'message': f'Error getting statistics: {str(e)}'
         }), 500
 
+@api_bp.route('/dashboard', methods=['GET'])
+@cache_response()
+def get_dashboard():
+    """
+    Get everything the dashboard page shows in one response.
+    
+    Query Parameters:
+        top (int, optional): Number of countries in each top-N list (defaults to 10).
+    
+    Returns:
+        JSON response with the summary statistics, region counts and top-N
+        countries by population, area and population density.
+    """
+    try:
+        try:
+            top_n = parse_limit(request.args.get('top'), MAX_TOP_N, name='top') or DEFAULT_TOP_N
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # Computed once per data generation and top-N size
+        dashboard = DashboardService.get(top_n)
+        
+        return jsonify({
+            'success': True,
+            'dashboard': dashboard
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting dashboard data: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting dashboard data: {str(e)}'
+        }), 500
+
 @api_bp.route('/regions', methods=['GET'])
+@cache_response()
 def get_regions():
     """
     Get all unique regions.
@@ -195,8 +768,7 @@ def get_regions():
         JSON response with regions.
     """
     try:
-        regions = db.session.query(Country.region).distinct().all()
-        region_list = [region[0] for region in regions if region[0]]
+        region_list = CountrySnapshotCache.get().regions
         
         return jsonify({
             'success': True,
@@ -209,3 +781,53 @@ def get_regions():
             'success': False,
             'message': f'Error getting regions: {str(e)}'
         }), 500
+
+@api_bp.route('/languages', methods=['GET'])
+@cache_response()
+def get_languages():
+    """
+    Get every language with the number and total population of the countries speaking it.
+    
+    Returns:
+        JSON response with languages, most widely spoken first.
+    """
+    try:
+        language_list = CountrySnapshotCache.get().relation_summary('language')
+        
+        return jsonify({
+            'success': True,
+            'count': len(language_list),
+            'data': language_list
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting languages: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting languages: {str(e)}'
+        }), 500
+
+@api_bp.route('/currencies', methods=['GET'])
+@cache_response()
+def get_currencies():
+    """
+    Get every currency with the number and total population of the countries using it.
+    
+    Returns:
+        JSON response with currencies, most widely used first.
+    """
+    try:
+        currency_list = CountrySnapshotCache.get().relation_summary('currency')
+        
+        return jsonify({
+            'success': True,
+            'count': len(currency_list),
+            'data': currency_list
+        })
+    
+    except Exception as e:
+        logger.error(f"Error getting currencies: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error getting currencies: {str(e)}'
+        }), 500
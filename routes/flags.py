@@ -0,0 +1,40 @@
+import logging
+from flask import Blueprint, abort, current_app, send_from_directory
+from services.flag_assets import FLAG_FILENAME, FLAG_MIMETYPE, flag_src
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+flags_bp = Blueprint('flags', __name__)
+
+# Flag files are named by their content hash, so a URL always serves the same bytes
+FLAG_MAX_AGE = 365 * 24 * 60 * 60
+
+# Make the flag helper available to every template
+flags_bp.add_app_template_global(flag_src)
+
+@flags_bp.route('/assets/flags/<string:filename>', methods=['GET'])
+def flag(filename):
+    """
+    Serve a locally stored flag image.
+    
+    Args:
+        filename (str): Content-hashed file name, as returned by flag_src.
+    
+    Returns:
+        SVG image cached as immutable, or 404 if no such flag is stored.
+    """
+    if not FLAG_FILENAME.match(filename):
+        abort(404)
+    response = send_from_directory(
+        current_app.config['FLAG_CACHE_DIR'],
+        filename,
+        mimetype=FLAG_MIMETYPE,
+        max_age=FLAG_MAX_AGE
+    )
+    response.headers['Cache-Control'] = f'public, max-age={FLAG_MAX_AGE}, immutable'
+    # The images come from a third party; never let one run scripts on this origin
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,22 @@
+import logging
+from flask import Blueprint, Response
+from services.metrics import MetricsRegistry
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Create blueprint
+metrics_bp = Blueprint('metrics', __name__)
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Expose the metrics of this worker process for Prometheus to scrape.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format.
+    """
+    return Response(MetricsRegistry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,9 +1,8 @@
 import logging
-from flask import Blueprint, render_template, redirect, url_for, flash, request
-from models import Country
-from app import db
-from services.data_fetcher import RestCountriesAPI
-from services.data_processor import CountryDataProcessor
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from services.country_search import CountryNameIndex
+from services.country_snapshot import CountrySnapshotCache
+from services.http_cache import cache_response
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -12,6 +11,7 @@ logger = logging.getLogger(__name__)
 views_bp = Blueprint('views', __name__)
 
 @views_bp.route('/')
+@cache_response(skip_if_flashed=True)
 def index():
     """
     Render the dashboard homepage.
@@ -21,9 +21,9 @@ def index():
     """
     # Get statistics for dashboard
     try:
-        total_countries = Country.query.count()
-        regions = db.session.query(Country.region).distinct().all()
-        region_list = [region[0] for region in regions if region[0]]
+        snapshot = CountrySnapshotCache.get()
+        total_countries = snapshot.count
+        region_list = snapshot.regions
         
         # Check if we need to load initial data
         if total_countries == 0:
@@ -40,9 +40,10 @@ def index():
     
     except Exception as e:
         logger.error(f"Error loading dashboard: {str(e)}")
-        return render_template('index.html', error=str(e))
+        return render_template('index.html', error=str(e)), 500
 
 @views_bp.route('/countries')
+@cache_response(skip_if_flashed=True)
 def country_list():
     """
     Render the countries list page.
@@ -51,6 +52,8 @@ def country_list():
         region (str, optional): Filter countries by region.
         sort (str, optional): Sort field (name, population, area).
         order (str, optional): Sort order (asc, desc).
+        limit (int, optional): Countries per page (defaults to COUNTRY_LIST_PAGE_SIZE).
+        cursor (str, optional): Keyset cursor of the page to show.
     
     Returns:
         Rendered country list template.
@@ -60,45 +63,53 @@ def country_list():
         region = request.args.get('region')
         sort_by = request.args.get('sort', 'name')
         order = request.args.get('order', 'asc')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', current_app.config['COUNTRY_LIST_PAGE_SIZE'], type=int)
+        limit = min(max(limit, 1), current_app.config['API_MAX_PAGE_SIZE'])
         
-        # Start with base query
-        query = Country.query
-        
-        # Apply region filter if provided
-        if region:
-            query = query.filter(Country.region == region)
-        
-        # Apply sorting
-        valid_sort_fields = {'name', 'population', 'area', 'region'}
-        if sort_by in valid_sort_fields:
-            sort_field = getattr(Country, sort_by)
-            
-            if order.lower() == 'desc':
-                query = query.order_by(sort_field.desc())
-            else:
-                query = query.order_by(sort_field.asc())
-        
-        # Execute query
-        countries = query.all()
+        # Filter, sort and page from the in-memory snapshot of the country table
+        snapshot = CountrySnapshotCache.get()
+        try:
+            positions, next_cursor, total_countries = snapshot.page(
+                region=region,
+                sort_by=sort_by,
+                order=order,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError:
+            # Stale or hand-edited page links fall back to the first page
+            cursor = None
+            positions, next_cursor, total_countries = snapshot.page(
+                region=region,
+                sort_by=sort_by,
+                order=order,
+                limit=limit
+            )
+        countries = [snapshot.rows[position] for position in positions]
         
         # Get regions for filter dropdown
-        regions = db.session.query(Country.region).distinct().all()
-        region_list = [region[0] for region in regions if region[0]]
+        region_list = snapshot.regions
         
         return render_template(
             'country_list.html',
             countries=countries,
+            total_countries=total_countries,
+            next_cursor=next_cursor,
+            is_first_page=not cursor,
             regions=region_list,
             current_region=region,
             current_sort=sort_by,
-            current_order=order
+            current_order=order,
+            current_limit=limit
         )
     
     except Exception as e:
         logger.error(f"Error loading countries list: {str(e)}")
-        return render_template('country_list.html', error=str(e))
+        return render_template('country_list.html', error=str(e)), 500
 
 @views_bp.route('/countries/<string:name>')
+@cache_response(skip_if_flashed=True)
 def country_detail(name):
     """
     Render the country detail page.
@@ -110,8 +121,11 @@ def country_detail(name):
         Rendered country detail template.
     """
     try:
-        # Search for country by name
-        country = Country.query.filter(Country.name.ilike(f"%{name}%")).first()
+        # Exact name, official name or code match, or a name prefix unique to one
+        # country; anything else redirects to the list with a flash
+        name_index = CountryNameIndex.get()
+        position = name_index.resolve(name)
+        country = name_index.snapshot.rows[position] if position is not None else None
         
         if not country:
             flash(f'Country {name} not found', 'danger')
@@ -121,4 +135,4 @@ def country_detail(name):
     
     except Exception as e:
         logger.error(f"Error loading country detail for {name}: {str(e)}")
-        return render_template('country_detail.html', error=str(e))
+        return render_template('country_detail.html', error=str(e)), 500
@@ -0,0 +1,59 @@
+import logging
+from typing import Dict, Iterable, Optional
+from models import AppState
+from app import db
+
+logger = logging.getLogger(__name__)
+
+class AppStateStore:
+    """Read and write small pieces of shared application state."""
+    
+    @staticmethod
+    def get(key: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Get a state value by key.
+        
+        Args:
+            key: State key.
+            default: Value returned when the key is not set.
+        
+        Returns:
+            Stored value or the default.
+        """
+        state = db.session.get(AppState, key)
+        return state.value if state is not None and state.value is not None else default
+    
+    @staticmethod
+    def get_many(keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Get several state values in one query.
+        
+        Args:
+            keys: State keys.
+        
+        Returns:
+            Dictionary mapping every requested key to its value (None if not set).
+        """
+        keys = list(keys)
+        values = dict.fromkeys(keys)
+        for state in AppState.query.filter(AppState.key.in_(keys)).all():
+            values[state.key] = state.value
+        return values
+    
+    @staticmethod
+    def set(key: str, value: Optional[str], commit: bool = True) -> None:
+        """
+        Set a state value, creating the key if needed.
+        
+        Args:
+            key: State key.
+            value: Value to store.
+            commit: Whether to commit the session afterwards.
+        """
+        state = db.session.get(AppState, key)
+        if state is None:
+            db.session.add(AppState(key=key, value=value))
+        else:
+            state.value = value
+        if commit:
+            db.session.commit()
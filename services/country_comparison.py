@@ -0,0 +1,247 @@
+import bisect
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Metrics countries are ranked and compared on
+COMPARISON_METRICS = ("population", "area", "density")
+
+# Default and largest number of neighbours per metric
+DEFAULT_NEIGHBORS = 4
+MAX_NEIGHBORS = 20
+
+# Fields returned for neighbouring countries
+NEIGHBOR_FIELDS = ("id", "name", "country_code", "flag_emoji", "population", "area")
+
+class MetricIndex:
+    """Countries of one scope (a region or the world) sorted by one metric."""
+    
+    def __init__(self, entries: List[Tuple[float, int]]):
+        """
+        Args:
+            entries: (value, row position) pairs of countries with a value.
+        """
+        entries.sort()
+        self.values = [value for value, position in entries]
+        self.positions = [position for value, position in entries]
+        self.count = len(entries)
+        self.mean = sum(self.values) / self.count if self.count else None
+    
+    def rank(self, value: float) -> Dict[str, Any]:
+        """
+        Rank a value within the scope.
+        
+        Args:
+            value: Metric value.
+        
+        Returns:
+            Dictionary with the 1-based ``rank`` (largest first, ties share the
+            best rank), the number of ranked countries ``of`` and the
+            ``percentile`` of countries with a value less than or equal to it.
+        """
+        at_or_below = bisect.bisect_right(self.values, value)
+        return {
+            "rank": self.count - at_or_below + 1,
+            "of": self.count,
+            "percentile": round(100 * at_or_below / self.count, 1) if self.count else None
+        }
+    
+    def nearest(self, value: float, exclude: int, k: int) -> List[int]:
+        """
+        Find the k countries with the closest values on a logarithmic scale.
+        
+        Starts from the value's insertion point and walks outwards, so it costs
+        O(log n + k).
+        
+        Args:
+            value: Metric value to compare with.
+            exclude: Row position of the country itself.
+            k: Number of neighbours.
+        
+        Returns:
+            Row positions, closest first.
+        """
+        def distance(index: int) -> float:
+            return abs(math.log1p(self.values[index]) - math.log1p(value))
+        
+        lower = bisect.bisect_left(self.values, value) - 1
+        upper = lower + 1
+        result = []
+        while len(result) < k and (lower >= 0 or upper < self.count):
+            if upper >= self.count or (lower >= 0 and distance(lower) <= distance(upper)):
+                index = lower
+                lower -= 1
+            else:
+                index = upper
+                upper += 1
+            if self.positions[index] != exclude:
+                result.append(self.positions[index])
+        return result
+
+class CountryComparisonIndex:
+    """Per-region and world-wide sorted indexes of one country snapshot."""
+    
+    _cached: Optional["CountryComparisonIndex"] = None
+    _lock = threading.Lock()
+    
+    def __init__(self, snapshot: CountrySnapshot):
+        """
+        Build the sorted indexes of every region and the world.
+        
+        Args:
+            snapshot: Snapshot to index.
+        """
+        self.snapshot = snapshot
+        populations = snapshot.columns["population"]
+        areas = snapshot.columns["area"]
+        regions = snapshot.columns["region"]
+        
+        self.densities: List[Optional[float]] = [
+            populations[position] / areas[position]
+            if areas[position] and areas[position] > 0 and populations[position] is not None else None
+            for position in range(snapshot.count)
+        ]
+        metric_columns = {"population": populations, "area": areas, "density": self.densities}
+        
+        world_entries: Dict[str, List[Tuple[float, int]]] = {}
+        region_entries: Dict[Tuple[Optional[str], str], List[Tuple[float, int]]] = {}
+        for position in range(snapshot.count):
+            for metric, column in metric_columns.items():
+                value = column[position]
+                if value is None:
+                    continue
+                world_entries.setdefault(metric, []).append((value, position))
+                region_entries.setdefault((regions[position], metric), []).append((value, position))
+        
+        self.world_indexes: Dict[str, MetricIndex] = {
+            metric: MetricIndex(entries) for metric, entries in world_entries.items()
+        }
+        self.region_indexes: Dict[Tuple[Optional[str], str], MetricIndex] = {
+            key: MetricIndex(entries) for key, entries in region_entries.items()
+        }
+        self.region_counts: Dict[Optional[str], int] = {}
+        for region in regions:
+            self.region_counts[region] = self.region_counts.get(region, 0) + 1
+    
+    @staticmethod
+    def get() -> "CountryComparisonIndex":
+        """
+        Get the index for the current snapshot, rebuilding it when the data changes.
+        
+        Returns:
+            Current comparison index.
+        """
+        snapshot = CountrySnapshotCache.get()
+        index = CountryComparisonIndex._cached
+        if index is None or index.snapshot is not snapshot:
+            with CountryComparisonIndex._lock:
+                index = CountryComparisonIndex._cached
+                if index is None or index.snapshot is not snapshot:
+                    index = CountryComparisonIndex(snapshot)
+                    CountryComparisonIndex._cached = index
+                    logger.info(f"Built country comparison index for generation {snapshot.generation}")
+        return index
+    
+    def _value(self, metric: str, position: int) -> Optional[float]:
+        """Metric value of a row."""
+        if metric == "density":
+            return self.densities[position]
+        return self.snapshot.columns[metric][position]
+    
+    def _country(self, position: int) -> Dict[str, Any]:
+        """Summary of a country for neighbour lists."""
+        country = {field: self.snapshot.columns[field][position] for field in NEIGHBOR_FIELDS}
+        country["density"] = self.densities[position]
+        return country
+    
+    def _averages(self, region: Optional[str] = None, world: bool = False) -> Dict[str, Optional[float]]:
+        """Mean of each metric in a region or the world."""
+        averages = {}
+        for metric in COMPARISON_METRICS:
+            index = self.world_indexes.get(metric) if world else self.region_indexes.get((region, metric))
+            averages[metric] = index.mean if index else None
+        return averages
+    
+    def compare(self, position: int, k: int = DEFAULT_NEIGHBORS) -> Dict[str, Any]:
+        """
+        Compare a country with its region and the world.
+        
+        Args:
+            position: Row position of the country in the snapshot.
+            k: Number of neighbours per metric.
+        
+        Returns:
+            Dictionary with the country, regional and world averages, ranks and
+            percentiles per metric, the k nearest neighbours in the region per
+            metric and the k most similar countries by population and area.
+        """
+        region = self.snapshot.columns["region"][position]
+        
+        ranks: Dict[str, Any] = {}
+        neighbors: Dict[str, List[Dict[str, Any]]] = {}
+        for metric in COMPARISON_METRICS:
+            value = self._value(metric, position)
+            region_index = self.region_indexes.get((region, metric))
+            if value is None or region_index is None:
+                ranks[metric] = None
+                neighbors[metric] = []
+                continue
+            ranks[metric] = {
+                "region": region_index.rank(value),
+                "world": self.world_indexes[metric].rank(value)
+            }
+            neighbors[metric] = [self._country(other) for other in region_index.nearest(value, position, k)]
+        
+        return {
+            "country": self._country(position),
+            "region": {
+                "name": region,
+                "count": self.region_counts.get(region, 0),
+                "averages": self._averages(region)
+            },
+            "world": {
+                "count": self.snapshot.count,
+                "averages": self._averages(world=True)
+            },
+            "ranks": ranks,
+            "neighbors": neighbors,
+            "similar": self._similar(position, region, k)
+        }
+    
+    def _similar(self, position: int, region: Optional[str], k: int) -> List[Dict[str, Any]]:
+        """
+        The k countries of a region most similar in population and area.
+        
+        Similarity is the mean of the smaller-to-larger ratios of population and
+        area. Candidates are the nearest neighbours by each of the two metrics.
+        
+        Args:
+            position: Row position of the country.
+            region: Region of the country.
+            k: Number of countries.
+        
+        Returns:
+            Country summaries with a ``similarity`` score, most similar first.
+        """
+        candidates = []
+        for metric in ("population", "area"):
+            value = self._value(metric, position)
+            region_index = self.region_indexes.get((region, metric))
+            if value is not None and region_index is not None:
+                candidates.extend(region_index.nearest(value, position, k))
+        
+        def similarity(other: int) -> float:
+            ratios = []
+            for metric in ("population", "area"):
+                value = self._value(metric, position)
+                other_value = self._value(metric, other)
+                if value and other_value and value > 0 and other_value > 0:
+                    ratios.append(min(value, other_value) / max(value, other_value))
+            return sum(ratios) / len(ratios) if ratios else 0.0
+        
+        ranked = sorted(dict.fromkeys(candidates), key=lambda other: -similarity(other))[:k]
+        return [{**self._country(other), "similarity": round(similarity(other), 4)} for other in ranked]
@@ -0,0 +1,146 @@
+import importlib.util
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+from flask import request
+from sqlalchemy import Boolean, DateTime, Float, Integer
+from models import Country
+from services.country_snapshot import SERIALIZED_FIELDS, CountrySnapshot
+
+logger = logging.getLogger(__name__)
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it MessagePack is not offered
+    msgpack = None
+
+# pyarrow is slow to import, so workers only check that it is installed and import it on first use
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+# Other media types clients send for MessagePack
+MSGPACK_ALIASES = ("application/x-msgpack", "application/vnd.msgpack")
+
+def offered_mimetypes() -> List[str]:
+    """Media types the country listings can be encoded as, JSON first."""
+    offered = [JSON_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+        offered.extend(MSGPACK_ALIASES)
+    if HAS_PYARROW:
+        offered.append(ARROW_MIMETYPE)
+    return offered
+
+def negotiate_mimetype() -> str:
+    """
+    Choose the response format from the request's Accept header.
+    
+    JSON wins ties and is the fallback, so browsers and clients sending
+    ``*/*`` or no Accept header keep getting JSON.
+    
+    Returns:
+        JSON_MIMETYPE, MSGPACK_MIMETYPE or ARROW_MIMETYPE.
+    """
+    best = request.accept_mimetypes.best_match(offered_mimetypes(), default=JSON_MIMETYPE)
+    return MSGPACK_MIMETYPE if best in MSGPACK_ALIASES else best
+
+class ColumnarEncoder:
+    """Encode country listings column by column as MessagePack or Arrow IPC."""
+    
+    _arrow_cache: Optional[tuple] = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _arrow_type(field: str):
+        """Arrow type of a serialized field, from the type of its Country column."""
+        import pyarrow
+        
+        column_type = Country.__table__.columns[field].type
+        if isinstance(column_type, Boolean):
+            return pyarrow.bool_()
+        if isinstance(column_type, Integer):
+            return pyarrow.int64()
+        if isinstance(column_type, Float):
+            return pyarrow.float64()
+        if isinstance(column_type, DateTime):
+            return pyarrow.timestamp("us")
+        return pyarrow.string()
+    
+    @staticmethod
+    def arrow_table(snapshot: CountrySnapshot):
+        """
+        Get every serialized column of a snapshot as an Arrow table, built once per snapshot.
+        
+        ``last_updated`` keeps its timestamp type instead of the ISO string of
+        the JSON and MessagePack encodings.
+        
+        Args:
+            snapshot: Current snapshot.
+        
+        Returns:
+            pyarrow.Table with one row per snapshot row.
+        """
+        cached = ColumnarEncoder._arrow_cache
+        if cached is None or cached[0] is not snapshot:
+            with ColumnarEncoder._lock:
+                cached = ColumnarEncoder._arrow_cache
+                if cached is None or cached[0] is not snapshot:
+                    import pyarrow
+                    
+                    arrays = [
+                        pyarrow.array(snapshot.columns[field], type=ColumnarEncoder._arrow_type(field))
+                        for field in SERIALIZED_FIELDS
+                    ]
+                    cached = (snapshot, pyarrow.Table.from_arrays(arrays, names=list(SERIALIZED_FIELDS)))
+                    ColumnarEncoder._arrow_cache = cached
+                    logger.info(f"Built Arrow table for generation {snapshot.generation}")
+        return cached[1]
+    
+    @staticmethod
+    def encode(mimetype: str, snapshot: CountrySnapshot, positions: Sequence[int],
+               fields: Optional[List[str]] = None, metadata: Optional[Dict[str, Any]] = None,
+               extra_columns: Optional[Dict[str, List[Any]]] = None) -> bytes:
+        """
+        Encode rows of a snapshot without building a dictionary per row.
+        
+        MessagePack bodies are maps with ``success``, the metadata keys and
+        ``data``, a map of field name to the list of its values. Arrow bodies
+        are an IPC stream of one record batch, with the metadata JSON-encoded
+        in the schema metadata.
+        
+        Args:
+            mimetype: MSGPACK_MIMETYPE or ARROW_MIMETYPE.
+            snapshot: Snapshot the positions refer to.
+            positions: Row positions, in response order.
+            fields: Fields to include, or None for all serialized fields.
+            metadata: Response-level values such as ``count`` and ``next_cursor``.
+            extra_columns: Further per-row values, e.g. search scores, by name.
+        
+        Returns:
+            Encoded body.
+        """
+        fields = list(fields or SERIALIZED_FIELDS)
+        metadata = metadata or {}
+        extra_columns = extra_columns or {}
+        
+        if mimetype == ARROW_MIMETYPE:
+            import pyarrow
+            
+            table = ColumnarEncoder.arrow_table(snapshot).select(fields)
+            table = table.take(pyarrow.array(positions, type=pyarrow.int64()))
+            for name, values in extra_columns.items():
+                table = table.append_column(name, pyarrow.array(values))
+            table = table.replace_schema_metadata({key: json.dumps(value) for key, value in metadata.items()})
+            sink = pyarrow.BufferOutputStream()
+            with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+        
+        columns = snapshot.serialized_columns
+        data = {field: [columns[field][position] for position in positions] for field in fields}
+        data.update(extra_columns)
+        return msgpack.packb({"success": True, **metadata, "data": data}, use_bin_type=True)
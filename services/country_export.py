@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from sqlalchemy import func, or_, select
+from models import Country, Currency, Language, country_currency, country_language
+from app import db
+from services.country_filters import Condition, compile_sql, compile_sql_order, parse_sort
+from services.country_snapshot import SERIALIZED_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Supported export formats and their MIME types
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+class CountryExporter:
+    """Stream the country table as NDJSON or CSV without loading it into memory."""
+    
+    @staticmethod
+    def build_query(region: Optional[str] = None, sort_by: Optional[str] = None, order: str = "asc",
+                    fields: Optional[List[str]] = None, language: Optional[str] = None,
+                    currency: Optional[str] = None, filters: Sequence[Condition] = ()):
+        """
+        Build the export SELECT with the same filters and order as /api/countries.
+        
+        Args:
+            region: Only include countries in this region.
+            sort_by: Sort field or comma-separated fields (``-`` prefix for
+                descending); unsupported fields are ignored and no sort keeps id order.
+            order: Sort order (asc, desc) of keys without a prefix.
+            fields: Columns to select, or None for all serialized fields.
+            language: Only include countries speaking this language (code or name).
+            currency: Only include countries using this currency (code or name).
+            filters: Further conditions from parse_filters().
+        
+        Returns:
+            SQLAlchemy Select statement.
+        """
+        columns = [getattr(Country, field) for field in (fields or SERIALIZED_FIELDS)]
+        statement = select(*columns)
+        
+        if region:
+            statement = statement.where(Country.region == region)
+        if filters:
+            statement = statement.where(*compile_sql(filters))
+        if language:
+            statement = statement.where(Country.id.in_(
+                select(country_language.c.country_id)
+                .join(Language, Language.code == country_language.c.language_code)
+                .where(or_(func.lower(Language.code) == language.lower(), func.lower(Language.name) == language.lower()))
+            ))
+        if currency:
+            statement = statement.where(Country.id.in_(
+                select(country_currency.c.country_id)
+                .join(Currency, Currency.code == country_currency.c.currency_code)
+                .where(or_(func.lower(Currency.code) == currency.lower(), func.lower(Currency.name) == currency.lower()))
+            ))
+        
+        return statement.order_by(*compile_sql_order(parse_sort(sort_by, order, strict=False)))
+    
+    @staticmethod
+    def _rows(statement, fields: List[str], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Execute the export query with a server-side cursor and yield rows in batches.
+        
+        Args:
+            statement: Export SELECT.
+            fields: Names of the selected columns.
+            batch_size: Rows fetched per round trip.
+        
+        Yields:
+            Lists of at most ``batch_size`` JSON-ready row dictionaries.
+        """
+        result = db.session.execute(statement, execution_options={"yield_per": batch_size})
+        try:
+            for partition in result.partitions():
+                batch = []
+                for row in partition:
+                    record = dict(zip(fields, row))
+                    if record.get("last_updated") is not None:
+                        record["last_updated"] = record["last_updated"].isoformat()
+                    batch.append(record)
+                yield batch
+        finally:
+            result.close()
+    
+    @staticmethod
+    def stream(export_format: str, fields: Optional[List[str]] = None, batch_size: int = 500,
+               **filters) -> Iterator[str]:
+        """
+        Stream the matching countries in an export format.
+        
+        Args:
+            export_format: "ndjson" (one JSON object per line) or "csv" (with a header row).
+            fields: Columns to export, or None for all serialized fields.
+            batch_size: Rows fetched from the database per round trip.
+            **filters: region, sort_by, order, language, currency and filters, as for build_query.
+        
+        Yields:
+            Chunks of the export body, one per batch of rows.
+        """
+        fields = list(fields or SERIALIZED_FIELDS)
+        statement = CountryExporter.build_query(fields=fields, **filters)
+        exported = 0
+        
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=fields)
+            writer.writeheader()
+            for batch in CountryExporter._rows(statement, fields, batch_size):
+                writer.writerows(batch)
+                exported += len(batch)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            # The header is still pending if no rows matched
+            if buffer.getvalue():
+                yield buffer.getvalue()
+        else:
+            for batch in CountryExporter._rows(statement, fields, batch_size):
+                exported += len(batch)
+                yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+        
+        logger.info(f"Exported {exported} countries as {export_format}")
@@ -0,0 +1,199 @@
+import math
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from models import Country
+
+# Fields countries can be sorted on, singly or as a comma-separated multi-key sort
+SORTABLE_FIELDS = ("name", "population", "area", "region", "subregion")
+
+# Largest number of keys in a multi-key sort
+MAX_SORT_KEYS = 3
+
+# Filters on numeric columns: ``<field>_min`` and ``<field>_max`` are inclusive bounds
+RANGE_FILTERS = ("population", "area")
+
+# Exact-match filters on text columns
+TEXT_FILTERS = ("region", "subregion")
+
+# Exact-match filters on boolean columns
+BOOLEAN_FILTERS = ("independent", "un_member", "landlocked")
+
+_TRUE_VALUES = ("1", "true", "yes")
+_FALSE_VALUES = ("0", "false", "no")
+
+class Condition(NamedTuple):
+    """One validated filter: ``field op value``, where op is eq, ge or le."""
+    field: str
+    op: str
+    value: Any
+
+class SortKey(NamedTuple):
+    """One key of a sort: a field and its direction (asc, desc)."""
+    field: str
+    direction: str
+
+def _parse_number(name: str, value: str) -> float:
+    """Parse a finite number, or raise ValueError naming the parameter."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a number")
+    return int(number) if number.is_integer() else number
+
+def _parse_boolean(name: str, value: str) -> bool:
+    """Parse a boolean flag, or raise ValueError naming the parameter."""
+    lowered = value.lower()
+    if lowered in _TRUE_VALUES:
+        return True
+    if lowered in _FALSE_VALUES:
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+def parse_filters(args: Mapping[str, str]) -> Tuple[Condition, ...]:
+    """
+    Parse the filter query parameters of a country listing.
+    
+    Recognizes ``region`` and ``subregion`` (exact match), ``independent``,
+    ``un_member`` and ``landlocked`` (true/false) and ``population_min``,
+    ``population_max``, ``area_min`` and ``area_max`` (inclusive bounds).
+    Other parameters are ignored.
+    
+    Args:
+        args: Query parameters.
+    
+    Returns:
+        Conditions in a canonical order, so equal filters compare equal.
+    
+    Raises:
+        ValueError: If a value is malformed or a minimum exceeds its maximum.
+    """
+    conditions = []
+    for field in TEXT_FILTERS:
+        value = args.get(field)
+        if value:
+            conditions.append(Condition(field, "eq", value))
+    for field in BOOLEAN_FILTERS:
+        value = args.get(field)
+        if value:
+            conditions.append(Condition(field, "eq", _parse_boolean(field, value)))
+    for field in RANGE_FILTERS:
+        bounds = {}
+        for suffix, op in (("min", "ge"), ("max", "le")):
+            value = args.get(f"{field}_{suffix}")
+            if value:
+                bounds[op] = _parse_number(f"{field}_{suffix}", value)
+                conditions.append(Condition(field, op, bounds[op]))
+        if "ge" in bounds and "le" in bounds and bounds["ge"] > bounds["le"]:
+            raise ValueError(f"{field}_min must not be greater than {field}_max")
+    return tuple(conditions)
+
+def parse_sort(sort: Optional[str], order: str = "asc", strict: bool = True) -> Tuple[SortKey, ...]:
+    """
+    Parse a sort specification such as ``population`` or ``region,-population``.
+    
+    Keys are comma-separated; a leading ``-`` sorts that key descending and
+    keys without one follow ``order``.
+    
+    Args:
+        sort: Sort specification, or None/empty for id order.
+        order: Direction of keys without a prefix (asc, desc).
+        strict: Raise on unknown fields instead of leaving them out.
+    
+    Returns:
+        Sort keys, most significant first; empty for id order.
+    
+    Raises:
+        ValueError: If strict and a field is unknown, repeated, or there are
+            more than MAX_SORT_KEYS keys.
+    """
+    if not sort:
+        return ()
+    default_direction = "desc" if order and order.lower() == "desc" else "asc"
+    keys = []
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        field, direction = (part[1:], "desc") if part.startswith("-") else (part, default_direction)
+        if field not in SORTABLE_FIELDS or any(key.field == field for key in keys):
+            if strict:
+                reason = "Duplicate" if field in SORTABLE_FIELDS else "Invalid"
+                raise ValueError(f"{reason} sort field: {field}")
+            continue
+        keys.append(SortKey(field, direction))
+    if len(keys) > MAX_SORT_KEYS:
+        if strict:
+            raise ValueError(f"sort accepts at most {MAX_SORT_KEYS} fields")
+        keys = keys[:MAX_SORT_KEYS]
+    return tuple(keys)
+
+def compile_predicate(conditions: Sequence[Condition], columns: Dict[str, List[Any]]) -> Callable[[int], bool]:
+    """
+    Compile conditions into a test of a row position of column-oriented data.
+    
+    NULL values never match, as in SQL.
+    
+    Args:
+        conditions: Conditions that must all hold.
+        columns: Column name -> values by row position.
+    
+    Returns:
+        Function of a row position returning whether the row matches.
+    """
+    tests = []
+    for field, op, value in conditions:
+        column = columns[field]
+        if op == "eq":
+            test = lambda position, column=column, value=value: column[position] == value
+        elif op == "ge":
+            test = lambda position, column=column, value=value: (
+                column[position] is not None and column[position] >= value
+            )
+        else:
+            test = lambda position, column=column, value=value: (
+                column[position] is not None and column[position] <= value
+            )
+        tests.append(test)
+    return lambda position: all(test(position) for test in tests)
+
+def compile_sql(conditions: Sequence[Condition]) -> List[Any]:
+    """
+    Compile conditions into SQLAlchemy expressions on Country.
+    
+    Args:
+        conditions: Conditions that must all hold.
+    
+    Returns:
+        List of expressions to pass to ``where()``.
+    """
+    expressions = []
+    for field, op, value in conditions:
+        column = getattr(Country, field)
+        if op == "eq":
+            expressions.append(column == value)
+        elif op == "ge":
+            expressions.append(column >= value)
+        else:
+            expressions.append(column <= value)
+    return expressions
+
+def compile_sql_order(sort: Sequence[SortKey]) -> List[Any]:
+    """
+    Compile sort keys into SQLAlchemy ORDER BY expressions on Country.
+    
+    NULLs sort last ascending and first descending, and ties keep id order,
+    like the in-memory snapshot.
+    
+    Args:
+        sort: Sort keys, most significant first.
+    
+    Returns:
+        List of expressions to pass to ``order_by()``.
+    """
+    expressions = []
+    for field, direction in sort:
+        column = getattr(Country, field)
+        expressions.append(column.desc().nulls_first() if direction == "desc" else column.asc().nulls_last())
+    expressions.append(Country.id)
+    return expressions
@@ -0,0 +1,266 @@
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius used for great-circle distances
+EARTH_RADIUS_KM = 6371.0088
+
+# Largest possible great-circle distance
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+# Size of the latitude/longitude grid cells centroids are bucketed into
+GRID_CELL_DEGREES = 5.0
+
+# Radius of the first nearest-k search; it doubles until k countries are found
+NEAREST_START_RADIUS_KM = 500.0
+
+# Default and largest number of hops of a neighbour query
+DEFAULT_HOPS = 1
+MAX_HOPS = 10
+
+# Fields returned for countries in border and distance queries
+GEO_FIELDS = (
+    "id", "name", "country_code", "alpha2_code", "flag_emoji", "region", "latitude", "longitude", "landlocked"
+)
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two points.
+    
+    Args:
+        lat1: Latitude of the first point in degrees.
+        lng1: Longitude of the first point in degrees.
+        lat2: Latitude of the second point in degrees.
+        lng2: Longitude of the second point in degrees.
+    
+    Returns:
+        Distance in kilometres.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lng2 - lng1) / 2
+    a = math.sin(half_dphi) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+class CountryGeoIndex:
+    """Border graph and centroid grid of one country snapshot."""
+    
+    _cached: Optional["CountryGeoIndex"] = None
+    _lock = threading.Lock()
+    
+    def __init__(self, snapshot: CountrySnapshot):
+        """
+        Build the adjacency lists and the spatial grid.
+        
+        Args:
+            snapshot: Snapshot to index.
+        """
+        self.snapshot = snapshot
+        columns = snapshot.columns
+        
+        by_code: Dict[str, int] = {}
+        for position, code in enumerate(columns["country_code"]):
+            if code:
+                by_code.setdefault(code.upper(), position)
+        
+        # Border graph: row position -> bordering row positions. Borders are
+        # stored as cca3 codes; unknown codes are skipped and every edge is made
+        # symmetric, so one side listing a border is enough.
+        adjacency: List[set] = [set() for _ in range(snapshot.count)]
+        for position, borders in enumerate(columns["borders"]):
+            if not borders:
+                continue
+            for code in borders.split(","):
+                other = by_code.get(code.strip().upper())
+                if other is not None and other != position:
+                    adjacency[position].add(other)
+                    adjacency[other].add(position)
+        names = columns["name"]
+        self.adjacency: List[List[int]] = [sorted(edges, key=lambda other: names[other]) for edges in adjacency]
+        
+        # Spatial grid: (latitude cell, longitude cell) -> row positions of the centroids in it
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        self.located = 0
+        for position, (latitude, longitude) in enumerate(zip(columns["latitude"], columns["longitude"])):
+            if latitude is None or longitude is None:
+                continue
+            self.grid.setdefault(self._cell(latitude, longitude), []).append(position)
+            self.located += 1
+        self.longitude_cells = int(math.ceil(360 / GRID_CELL_DEGREES))
+    
+    @staticmethod
+    def get() -> "CountryGeoIndex":
+        """
+        Get the index for the current snapshot, rebuilding it when the data changes.
+        
+        Returns:
+            Current geo index.
+        """
+        snapshot = CountrySnapshotCache.get()
+        index = CountryGeoIndex._cached
+        if index is None or index.snapshot is not snapshot:
+            with CountryGeoIndex._lock:
+                index = CountryGeoIndex._cached
+                if index is None or index.snapshot is not snapshot:
+                    index = CountryGeoIndex(snapshot)
+                    CountryGeoIndex._cached = index
+                    logger.info(f"Built country geo index for generation {snapshot.generation}")
+        return index
+    
+    @staticmethod
+    def _cell(latitude: float, longitude: float) -> Tuple[int, int]:
+        """Grid cell of a point; longitudes are wrapped into [-180, 180)."""
+        wrapped = (longitude + 180) % 360 - 180
+        return int(math.floor(latitude / GRID_CELL_DEGREES)), int(math.floor(wrapped / GRID_CELL_DEGREES))
+    
+    def country(self, position: int) -> Dict[str, Any]:
+        """
+        Summary of a country for border and distance results.
+        
+        Args:
+            position: Row position in the snapshot.
+        
+        Returns:
+            Dictionary with the GEO_FIELDS of the country.
+        """
+        return {field: self.snapshot.columns[field][position] for field in GEO_FIELDS}
+    
+    def border_codes(self, position: int) -> List[str]:
+        """Country codes of the countries bordering a country, by name."""
+        codes = self.snapshot.columns["country_code"]
+        return [codes[other] for other in self.adjacency[position]]
+    
+    def neighbors(self, position: int, hops: int = DEFAULT_HOPS) -> List[Tuple[int, int]]:
+        """
+        Find the countries reachable over land borders within a number of hops.
+        
+        Args:
+            position: Row position of the starting country.
+            hops: Largest number of borders crossed.
+        
+        Returns:
+            List of (row position, hops) pairs, nearest first and by name within
+            a hop, without the starting country.
+        """
+        distances = {position: 0}
+        queue = deque([position])
+        while queue:
+            current = queue.popleft()
+            if distances[current] >= hops:
+                continue
+            for other in self.adjacency[current]:
+                if other not in distances:
+                    distances[other] = distances[current] + 1
+                    queue.append(other)
+        del distances[position]
+        names = self.snapshot.columns["name"]
+        return sorted(distances.items(), key=lambda item: (item[1], names[item[0]]))
+    
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """
+        Find a route crossing the fewest land borders between two countries.
+        
+        Args:
+            source: Row position of the starting country.
+            target: Row position of the destination.
+        
+        Returns:
+            Row positions from source to target inclusive, or None if the
+            target cannot be reached over land.
+        """
+        parents: Dict[int, Optional[int]] = {source: None}
+        queue = deque([source])
+        while queue and target not in parents:
+            current = queue.popleft()
+            for other in self.adjacency[current]:
+                if other not in parents:
+                    parents[other] = current
+                    queue.append(other)
+        if target not in parents:
+            return None
+        
+        path = []
+        current: Optional[int] = target
+        while current is not None:
+            path.append(current)
+            current = parents[current]
+        return path[::-1]
+    
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, float]]:
+        """
+        Find the countries whose centroid lies within a distance of a point.
+        
+        Only the grid cells overlapping the bounding box of the circle are
+        scanned; near the poles, or for very large radii, whole latitude bands
+        are.
+        
+        Args:
+            latitude: Latitude of the point in degrees.
+            longitude: Longitude of the point in degrees.
+            radius_km: Search radius in kilometres.
+        
+        Returns:
+            List of (row position, distance in km) pairs, nearest first.
+        """
+        columns = self.snapshot.columns
+        latitude_span = math.degrees(radius_km / EARTH_RADIUS_KM)
+        south = max(-90.0, latitude - latitude_span)
+        north = min(90.0, latitude + latitude_span)
+        
+        # Longitude degrees shrink with the cosine of the latitude, most at the edge closest to a pole
+        widest = max(abs(south), abs(north))
+        if north >= 90.0 or south <= -90.0 or widest >= 89.0:
+            longitude_cells = range(self.longitude_cells)
+        else:
+            longitude_span = latitude_span / math.cos(math.radians(widest))
+            if longitude_span >= 180:
+                longitude_cells = range(self.longitude_cells)
+            else:
+                first = self._cell(latitude, longitude - longitude_span)[1]
+                count = int(math.ceil(2 * longitude_span / GRID_CELL_DEGREES)) + 1
+                longitude_cells = range(first, first + min(count, self.longitude_cells))
+        
+        first_latitude_cell = int(math.floor(south / GRID_CELL_DEGREES))
+        last_latitude_cell = int(math.floor(north / GRID_CELL_DEGREES))
+        offset = self.longitude_cells // 2
+        matches = []
+        for latitude_cell in range(first_latitude_cell, last_latitude_cell + 1):
+            for longitude_cell in longitude_cells:
+                # Wrap cells past the antimeridian back into [-180, 180)
+                wrapped_cell = (longitude_cell + offset) % self.longitude_cells - offset
+                for position in self.grid.get((latitude_cell, wrapped_cell), ()):
+                    distance = haversine_km(latitude, longitude, columns["latitude"][position], columns["longitude"][position])
+                    if distance <= radius_km:
+                        matches.append((position, distance))
+        
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches
+    
+    def nearest(self, latitude: float, longitude: float, k: int, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Find the k countries whose centroid is closest to a point.
+        
+        Searches a small radius first and doubles it until k countries are
+        inside, so dense areas only touch a few grid cells.
+        
+        Args:
+            latitude: Latitude of the point in degrees.
+            longitude: Longitude of the point in degrees.
+            k: Number of countries.
+            exclude: Row position to leave out, e.g. the country at the point.
+        
+        Returns:
+            List of (row position, distance in km) pairs, nearest first.
+        """
+        radius = NEAREST_START_RADIUS_KM
+        while True:
+            matches = [match for match in self.within(latitude, longitude, radius) if match[0] != exclude]
+            if len(matches) >= k or radius >= MAX_DISTANCE_KM:
+                return matches[:k]
+            radius = min(radius * 2, MAX_DISTANCE_KM)
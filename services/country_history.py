@@ -0,0 +1,209 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, func, insert, select
+from models import Country, CountryHistory
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# Names per SELECT ... IN statement, within every dialect's bound parameter limit
+HISTORY_BATCH_SIZE = 500
+
+# Tracked values of a stored country: id, population, area and region
+TrackedValues = Tuple[int, Optional[int], Optional[float], Optional[str]]
+
+class CountryHistoryService:
+    """Record and query the delta-encoded population and area history of countries."""
+    
+    @staticmethod
+    def ensure_baseline() -> int:
+        """
+        Record the current values of countries that have no history yet.
+        
+        Countries saved before history was recorded get one base row holding
+        their full values, timestamped with their ``last_updated`` time.
+        
+        Returns:
+            Number of countries given a base row.
+        """
+        has_history = select(CountryHistory.id).where(CountryHistory.country_id == Country.id).exists()
+        base_rows = select(
+            Country.id,
+            func.coalesce(Country.last_updated, datetime.utcnow()),
+            Country.region,
+            func.coalesce(Country.population, 0),
+            func.coalesce(Country.area, 0.0)
+        ).where(~has_history)
+        result = db.session.execute(
+            insert(CountryHistory).from_select(
+                ["country_id", "recorded_at", "region", "population_delta", "area_delta"],
+                base_rows
+            )
+        )
+        if result.rowcount:
+            logger.info(f"Recorded base history rows for {result.rowcount} countries")
+        return result.rowcount or 0
+    
+    @staticmethod
+    def capture(names: Iterable[str]) -> Dict[str, TrackedValues]:
+        """
+        Read the stored values of countries about to be saved.
+        
+        Also makes sure every stored country has history, so the deltas recorded
+        after the save add up to the new values.
+        
+        Args:
+            names: Names of the countries being saved.
+        
+        Returns:
+            Dictionary of name to (id, population, area, region) for countries
+            already stored.
+        """
+        CountryHistoryService.ensure_baseline()
+        
+        name_list = list(dict.fromkeys(names))
+        previous = {}
+        for start in range(0, len(name_list), HISTORY_BATCH_SIZE):
+            rows = db.session.query(Country.name, Country.id, Country.population, Country.area, Country.region).filter(
+                Country.name.in_(name_list[start:start + HISTORY_BATCH_SIZE])
+            )
+            for name, *values in rows:
+                previous[name] = tuple(values)
+        return previous
+    
+    @staticmethod
+    def record(previous: Dict[str, TrackedValues], countries_data: List[Dict[str, Any]],
+               recorded_at: Optional[datetime] = None) -> int:
+        """
+        Record history rows for saved countries whose tracked values changed.
+        
+        Args:
+            previous: Values captured before the save by capture().
+            countries_data: Processed data of the countries that were saved.
+            recorded_at: Time of the new values (defaults to now).
+        
+        Returns:
+            Number of history rows written.
+        """
+        recorded_at = recorded_at or datetime.utcnow()
+        new_names = [data["name"] for data in countries_data if data.get("name") not in previous]
+        new_ids = {}
+        for start in range(0, len(new_names), HISTORY_BATCH_SIZE):
+            new_ids.update(db.session.query(Country.name, Country.id).filter(
+                Country.name.in_(new_names[start:start + HISTORY_BATCH_SIZE])
+            ))
+        
+        rows = []
+        latest = {data["name"]: data for data in countries_data if data.get("name")}
+        for name, data in latest.items():
+            population = data.get("population") or 0
+            area = data.get("area") or 0.0
+            region = data.get("region")
+            
+            if name not in previous:
+                if name in new_ids:
+                    rows.append({"country_id": new_ids[name], "region": region,
+                                 "population_delta": population, "area_delta": area})
+                continue
+            
+            country_id, old_population, old_area, old_region = previous[name]
+            old_population = old_population or 0
+            old_area = old_area or 0.0
+            if region != old_region:
+                # Move the country's totals from the old region to the new one
+                rows.append({"country_id": country_id, "region": old_region,
+                             "population_delta": -old_population, "area_delta": -old_area})
+                rows.append({"country_id": country_id, "region": region,
+                             "population_delta": population, "area_delta": area})
+            elif population != old_population or area != old_area:
+                rows.append({"country_id": country_id, "region": region,
+                             "population_delta": population - old_population, "area_delta": area - old_area})
+        
+        if rows:
+            for row in rows:
+                row["recorded_at"] = recorded_at
+            db.session.execute(insert(CountryHistory), rows)
+            logger.info(f"Recorded {len(rows)} country history rows")
+        return len(rows)
+    
+    @staticmethod
+    def _series(conditions: List[Any], start: Optional[datetime], end: Optional[datetime]) -> List[Dict[str, Any]]:
+        """
+        Cumulative population and area over time for the history rows matching conditions.
+        
+        Deltas are summed per timestamp and accumulated with a window function,
+        all in SQL. The first point is the value in effect at ``start``.
+        
+        Args:
+            conditions: Filters on CountryHistory.
+            start: Earliest time of interest, or None.
+            end: Latest time of interest, or None.
+        
+        Returns:
+            List of points with ``recorded_at``, ``population`` and ``area``.
+        """
+        if end is not None:
+            conditions = conditions + [CountryHistory.recorded_at <= end]
+        
+        per_time = select(
+            CountryHistory.recorded_at,
+            func.sum(CountryHistory.population_delta).label("population_delta"),
+            func.sum(CountryHistory.area_delta).label("area_delta")
+        ).where(and_(True, *conditions)).group_by(CountryHistory.recorded_at).subquery()
+        
+        cumulative = select(
+            per_time.c.recorded_at,
+            func.sum(per_time.c.population_delta).over(order_by=per_time.c.recorded_at).label("population"),
+            func.sum(per_time.c.area_delta).over(order_by=per_time.c.recorded_at).label("area")
+        ).subquery()
+        
+        statement = select(cumulative.c.recorded_at, cumulative.c.population, cumulative.c.area)
+        if start is not None:
+            effective_start = select(func.max(CountryHistory.recorded_at)).where(
+                and_(True, *conditions), CountryHistory.recorded_at <= start
+            ).scalar_subquery()
+            statement = statement.where(cumulative.c.recorded_at >= func.coalesce(effective_start, start))
+        statement = statement.order_by(cumulative.c.recorded_at)
+        
+        return [
+            {
+                "recorded_at": recorded_at.isoformat(),
+                "population": int(population),
+                "area": round(area, 2)
+            }
+            for recorded_at, population, area in db.session.execute(statement)
+        ]
+    
+    @staticmethod
+    def country_history(country_id: int, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Population and area history of one country.
+        
+        Args:
+            country_id: Country id.
+            start: Earliest time of interest, or None.
+            end: Latest time of interest, or None.
+        
+        Returns:
+            List of points with ``recorded_at``, ``population`` and ``area``.
+        """
+        return CountryHistoryService._series([CountryHistory.country_id == country_id], start, end)
+    
+    @staticmethod
+    def population_series(region: Optional[str] = None, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Total population and area of the world or a region over time.
+        
+        Args:
+            region: Region to aggregate, or None for the world.
+            start: Earliest time of interest, or None.
+            end: Latest time of interest, or None.
+        
+        Returns:
+            List of points with ``recorded_at``, ``population`` and ``area``.
+        """
+        conditions = [CountryHistory.region == region] if region else []
+        return CountryHistoryService._series(conditions, start, end)
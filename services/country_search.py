@@ -0,0 +1,224 @@
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Match kinds, best first; the position in this tuple is the rank of the match
+MATCH_KINDS = ("exact", "code", "official", "prefix", "word_prefix", "substring", "fuzzy")
+
+# Smallest trigram similarity accepted as a fuzzy match
+MIN_FUZZY_SIMILARITY = 0.3
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+def normalize_name(value: Optional[str]) -> str:
+    """
+    Normalize a name for matching: strip accents, casefold and collapse punctuation.
+    
+    Args:
+        value: Raw name.
+    
+    Returns:
+        Normalized name ("Côte d'Ivoire" becomes "cote d ivoire").
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", stripped.casefold()).strip()
+
+def _trigrams(value: str) -> Set[str]:
+    """Trigrams of a normalized value, padded so short words still produce some."""
+    padded = f"  {value} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+class CountryNameIndex:
+    """In-memory name lookup and search index over one country snapshot."""
+    
+    _cached: Optional["CountryNameIndex"] = None
+    _lock = threading.Lock()
+    
+    def __init__(self, snapshot: CountrySnapshot):
+        """
+        Build the exact, prefix and trigram indexes.
+        
+        Args:
+            snapshot: Snapshot to index.
+        """
+        self.snapshot = snapshot
+        columns = snapshot.columns
+        
+        self.names = [normalize_name(name) for name in columns["name"]]
+        self.official_names = [normalize_name(name) for name in columns["official_name"]]
+        
+        # Exact lookups: normalized name, official name and country code
+        self.by_name: Dict[str, int] = {}
+        self.by_official_name: Dict[str, int] = {}
+        self.by_code: Dict[str, int] = {}
+        for position in range(snapshot.count):
+            self.by_name.setdefault(self.names[position], position)
+            if self.official_names[position]:
+                self.by_official_name.setdefault(self.official_names[position], position)
+            code = columns["country_code"][position]
+            if code:
+                self.by_code.setdefault(code.casefold(), position)
+        
+        # Prefix lookups: sorted (key, position) pairs for the full name and each of its words
+        prefix_keys = []
+        for position, name in enumerate(self.names):
+            prefix_keys.append((name, position))
+            words = name.split()
+            for word_index in range(1, len(words)):
+                prefix_keys.append((" ".join(words[word_index:]), position))
+        prefix_keys.sort()
+        self.prefix_keys = [key for key, position in prefix_keys]
+        self.prefix_positions = [position for key, position in prefix_keys]
+        
+        # Fuzzy lookups: trigram -> positions whose name or official name contains it
+        self.name_trigrams = [_trigrams(name) for name in self.names]
+        self.trigram_positions: Dict[str, Set[int]] = {}
+        for position in range(snapshot.count):
+            for trigram in self.name_trigrams[position] | _trigrams(self.official_names[position]):
+                self.trigram_positions.setdefault(trigram, set()).add(position)
+    
+    @staticmethod
+    def get() -> "CountryNameIndex":
+        """
+        Get the index for the current snapshot, rebuilding it when the data changes.
+        
+        Returns:
+            Current name index.
+        """
+        snapshot = CountrySnapshotCache.get()
+        index = CountryNameIndex._cached
+        if index is None or index.snapshot is not snapshot:
+            with CountryNameIndex._lock:
+                index = CountryNameIndex._cached
+                if index is None or index.snapshot is not snapshot:
+                    index = CountryNameIndex(snapshot)
+                    CountryNameIndex._cached = index
+                    logger.info(f"Built country name index for generation {snapshot.generation}")
+        return index
+    
+    def lookup(self, query: str) -> Optional[int]:
+        """
+        Find the country exactly matching a name, official name or country code.
+        
+        Args:
+            query: Name, official name or three-letter code, in any case and with
+                or without accents.
+        
+        Returns:
+            Row position in the snapshot, or None.
+        """
+        normalized = normalize_name(query)
+        for exact_index in (self.by_name, self.by_code, self.by_official_name):
+            position = exact_index.get(normalized)
+            if position is not None:
+                return position
+        return None
+    
+    def _prefix_matches(self, prefix: str) -> List[Tuple[str, int]]:
+        """Sorted (key, position) pairs whose key starts with prefix."""
+        start = bisect.bisect_left(self.prefix_keys, prefix)
+        end = bisect.bisect_left(self.prefix_keys, prefix + "\uffff", lo=start)
+        return [(self.prefix_keys[index], self.prefix_positions[index]) for index in range(start, end)]
+    
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, str, float]]:
+        """
+        Rank countries matching a partial or misspelt name.
+        
+        Matches are ranked by kind (exact name, code, official name, name
+        prefix, word prefix, substring, trigram similarity), then by similarity
+        and population.
+        
+        Args:
+            query: Search text.
+            limit: Maximum number of results.
+        
+        Returns:
+            List of (row position, match kind, similarity) tuples, best first.
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+        
+        best: Dict[int, int] = {}
+        
+        def add(position: int, kind: str) -> None:
+            rank = MATCH_KINDS.index(kind)
+            if rank < best.get(position, len(MATCH_KINDS)):
+                best[position] = rank
+        
+        if normalized in self.by_name:
+            add(self.by_name[normalized], "exact")
+        if normalized in self.by_code:
+            add(self.by_code[normalized], "code")
+        if normalized in self.by_official_name:
+            add(self.by_official_name[normalized], "official")
+        for key, position in self._prefix_matches(normalized):
+            add(position, "prefix" if key == self.names[position] else "word_prefix")
+        
+        # Substring and typo matches are only needed to fill the remaining results
+        if len(best) < limit:
+            for position in range(self.snapshot.count):
+                if position not in best and (
+                    normalized in self.names[position] or normalized in self.official_names[position]
+                ):
+                    add(position, "substring")
+        
+        query_trigrams = _trigrams(normalized)
+        similarities: Dict[int, float] = {}
+        
+        def similarity(position: int) -> float:
+            if position not in similarities:
+                name_trigrams = self.name_trigrams[position]
+                shared = len(query_trigrams & name_trigrams)
+                similarities[position] = shared / len(query_trigrams | name_trigrams)
+            return similarities[position]
+        
+        if len(best) < limit:
+            candidates: Set[int] = set()
+            for trigram in query_trigrams:
+                candidates.update(self.trigram_positions.get(trigram, ()))
+            for position in candidates:
+                if position not in best and similarity(position) >= MIN_FUZZY_SIMILARITY:
+                    add(position, "fuzzy")
+        
+        populations = self.snapshot.columns["population"]
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (item[1], -similarity(item[0]), -(populations[item[0]] or 0), self.names[item[0]])
+        )
+        return [(position, MATCH_KINDS[rank], round(similarity(position), 3)) for position, rank in ranked[:limit]]
+    
+    def resolve(self, query: str) -> Optional[int]:
+        """
+        Resolve a country name from a URL without guessing.
+        
+        Matches the name, official name or country code exactly; failing that,
+        a prefix of the name that only one country starts with. Misspelt or
+        ambiguous names resolve to nothing, so they 404 instead of showing
+        another country; ranked suggestions are left to ``search``.
+        
+        Args:
+            query: Name, official name, country code or unambiguous name prefix.
+        
+        Returns:
+            Row position in the snapshot, or None.
+        """
+        position = self.lookup(query)
+        if position is not None:
+            return position
+        normalized = normalize_name(query)
+        if not normalized:
+            return None
+        positions = {
+            position for key, position in self._prefix_matches(normalized) if key == self.names[position]
+        }
+        return positions.pop() if len(positions) == 1 else None
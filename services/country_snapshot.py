@@ -0,0 +1,520 @@
+import base64
+import json
+import logging
+import threading
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from models import Country, Currency, Language, country_currency, country_language
+from app import db
+from services.country_filters import SORTABLE_FIELDS, Condition, SortKey, compile_predicate, parse_sort
+from services.data_generation import DataGeneration
+
+logger = logging.getLogger(__name__)
+
+# Country columns copied into the snapshot, in model order
+COLUMN_NAMES = tuple(column.name for column in Country.__table__.columns)
+
+# Filtered listings kept per snapshot; rarer filter combinations are recomputed per request
+MAX_CACHED_LISTINGS = 256
+
+# Fields of the serialized country, selectable with ``fields=``
+SERIALIZED_FIELDS = (
+    "id", "name", "official_name", "capital", "region", "subregion", "population", "area",
+    "flag_emoji", "flag_url", "country_code", "currencies", "languages", "independent",
+    "un_member", "last_updated"
+)
+
+def encode_cursor(field: Any, direction: Any, value: Any, row_id: int) -> str:
+    """
+    Encode a keyset cursor pointing after a row.
+    
+    Args:
+        field: Sort field of the listing (None for id order), or the list of
+            fields of a multi-key sort.
+        direction: Sort direction (asc, desc), or the list of directions.
+        value: Sort field value of the last returned row, or the list of values.
+        row_id: Id of the last returned row.
+    
+    Returns:
+        Opaque URL-safe cursor string.
+    """
+    payload = json.dumps({"s": field, "o": direction, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a keyset cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string.
+    
+    Returns:
+        Dictionary with sort field ``s``, direction ``o``, value ``v`` and ``id``.
+    
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(data, dict) or not isinstance(data.get("id"), int):
+            raise ValueError
+        return data
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse and validate a comma-separated ``fields=`` projection.
+    
+    Args:
+        fields: Comma-separated field names, or None/empty for all fields.
+    
+    Returns:
+        List of field names, or None for all fields.
+    
+    Raises:
+        ValueError: If a field name is unknown.
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in SERIALIZED_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested)) or None
+
+class CountryRow(namedtuple("CountryRow", COLUMN_NAMES)):
+    """Read-only country record with the same attributes as the Country model."""
+    __slots__ = ()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the row to the dictionary returned by Country.to_dict()."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "official_name": self.official_name,
+            "capital": self.capital,
+            "region": self.region,
+            "subregion": self.subregion,
+            "population": self.population,
+            "area": self.area,
+            "flag_emoji": self.flag_emoji,
+            "flag_url": self.flag_url,
+            "country_code": self.country_code,
+            "currencies": self.currencies,
+            "languages": self.languages,
+            "independent": self.independent,
+            "un_member": self.un_member,
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None
+        }
+
+class CountrySnapshot:
+    """Immutable, column-oriented copy of the country table for one data generation."""
+    
+    def __init__(self, generation: int, records: List[tuple],
+                 languages: Iterable[tuple] = (), currencies: Iterable[tuple] = ()):
+        """
+        Build the snapshot from country records.
+        
+        Args:
+            generation: Data generation the records belong to.
+            records: Tuples of column values in COLUMN_NAMES order, ordered by id.
+            languages: (country id, code, name) tuples from country_language.
+            currencies: (country id, code, name, symbol) tuples from country_currency.
+        """
+        self.generation = generation
+        self.rows = [CountryRow(*record) for record in records]
+        self.columns: Dict[str, List[Any]] = {
+            name: [row[position] for row in self.rows]
+            for position, name in enumerate(COLUMN_NAMES)
+        }
+        self.count = len(self.rows)
+        self.regions = sorted({region for region in self.columns["region"] if region})
+        
+        # Stable sorts keep id order for ties; NULLs sort last ascending and first
+        # descending, like PostgreSQL
+        self.sort_orders: Dict[tuple, List[int]] = {}
+        for field in SORTABLE_FIELDS:
+            values = self.columns[field]
+            sort_key = lambda index: (values[index] is None, values[index] if values[index] is not None else 0)
+            self.sort_orders[(field, "asc")] = sorted(range(self.count), key=sort_key)
+            self.sort_orders[(field, "desc")] = sorted(range(self.count), key=sort_key, reverse=True)
+        
+        self._listings: Dict[tuple, List[int]] = {}
+        self._order_indexes: Dict[tuple, Dict[int, int]] = {}
+        self._id_positions = {row_id: position for position, row_id in enumerate(self.columns["id"])}
+        
+        # Inverted indexes of the normalized language and currency tables
+        self.relations = {
+            "language": self._build_relation(languages, ("code", "name")),
+            "currency": self._build_relation(currencies, ("code", "name", "symbol"))
+        }
+        self._relation_summaries: Dict[str, List[Dict[str, Any]]] = {}
+        self._dicts: Optional[List[Dict[str, Any]]] = None
+        self._serialized_columns: Optional[Dict[str, List[Any]]] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def load(generation: int) -> "CountrySnapshot":
+        """
+        Load every country row from the database.
+        
+        Args:
+            generation: Data generation being loaded.
+        
+        Returns:
+            New snapshot.
+        """
+        columns = [getattr(Country, name) for name in COLUMN_NAMES]
+        records = db.session.query(*columns).order_by(Country.id).all()
+        languages = db.session.query(country_language.c.country_id, Language.code, Language.name).join(
+            Language, Language.code == country_language.c.language_code
+        ).all()
+        currencies = db.session.query(
+            country_currency.c.country_id, Currency.code, Currency.name, Currency.symbol
+        ).join(Currency, Currency.code == country_currency.c.currency_code).all()
+        logger.info(f"Loaded country snapshot for generation {generation} ({len(records)} rows)")
+        return CountrySnapshot(
+            generation,
+            [tuple(record) for record in records],
+            [tuple(language) for language in languages],
+            [tuple(currency) for currency in currencies]
+        )
+    
+    def _build_relation(self, records: Iterable[tuple], attributes: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Index association records by code.
+        
+        Args:
+            records: (country id, code, *other attributes) tuples.
+            attributes: Names of the tuple values after the country id.
+        
+        Returns:
+            Dictionary with the ``catalog`` of codes, the row ``positions`` of
+            each code in id order and the lookup ``keys`` (casefolded codes and
+            names) of each code.
+        """
+        catalog: Dict[str, Dict[str, Any]] = {}
+        positions: Dict[str, List[int]] = {}
+        for country_id, *values in records:
+            position = self._id_positions.get(country_id)
+            if position is None:
+                continue
+            code = values[0]
+            catalog.setdefault(code, dict(zip(attributes, values)))
+            positions.setdefault(code, []).append(position)
+        for code_positions in positions.values():
+            code_positions.sort()
+        
+        keys: Dict[str, str] = {}
+        for code, item in catalog.items():
+            keys.setdefault(item["name"].casefold(), code)
+        for code in catalog:
+            keys[code.casefold()] = code
+        return {"catalog": catalog, "positions": positions, "keys": keys}
+    
+    def relation_positions(self, kind: str, value: str) -> List[int]:
+        """
+        Get the rows of countries using a language or currency.
+        
+        Args:
+            kind: "language" or "currency".
+            value: Code or name, case-insensitive (e.g. "spa", "Spanish", "EUR").
+        
+        Returns:
+            Row positions in id order (shared; do not modify).
+        """
+        code = self.relation_code(kind, value)
+        return self.relations[kind]["positions"][code] if code else []
+    
+    def relation_code(self, kind: str, value: str) -> Optional[str]:
+        """
+        Resolve a language or currency code or name to its code.
+        
+        Args:
+            kind: "language" or "currency".
+            value: Code or name, case-insensitive.
+        
+        Returns:
+            Code, or None if no country uses it.
+        """
+        return self.relations[kind]["keys"].get(value.strip().casefold())
+    
+    def relation_summary(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        Summarize every language or currency with its countries.
+        
+        Args:
+            kind: "language" or "currency".
+        
+        Returns:
+            Catalog entries with ``country_count`` and total ``population``,
+            most widely used first (shared; do not modify).
+        """
+        summary = self._relation_summaries.get(kind)
+        if summary is None:
+            relation = self.relations[kind]
+            population_column = self.columns["population"]
+            summary = [
+                {
+                    **item,
+                    "country_count": len(relation["positions"][code]),
+                    "population": sum(population_column[position] or 0 for position in relation["positions"][code])
+                }
+                for code, item in relation["catalog"].items()
+            ]
+            summary.sort(key=lambda item: (-item["country_count"], -item["population"], item["name"]))
+            with self._lock:
+                self._relation_summaries[kind] = summary
+        return summary
+    
+    @property
+    def dicts(self) -> List[Dict[str, Any]]:
+        """Serialized rows, built once per snapshot and shared by all requests."""
+        if self._dicts is None:
+            self._dicts = [row.to_dict() for row in self.rows]
+        return self._dicts
+    
+    @property
+    def serialized_columns(self) -> Dict[str, List[Any]]:
+        """Column arrays with JSON-ready values, built once per snapshot."""
+        if self._serialized_columns is None:
+            columns = {field: self.columns[field] for field in SERIALIZED_FIELDS}
+            columns["last_updated"] = [
+                value.isoformat() if value else None for value in self.columns["last_updated"]
+            ]
+            self._serialized_columns = columns
+        return self._serialized_columns
+    
+    def serialize(self, positions: Iterable[int], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Serialize rows, reading only the requested columns.
+        
+        Args:
+            positions: Row positions to serialize.
+            fields: Fields to include, or None for all fields.
+        
+        Returns:
+            List of country dictionaries.
+        """
+        if fields is None:
+            dicts = self.dicts
+            return [dicts[position] for position in positions]
+        columns = [(field, self.serialized_columns[field]) for field in fields]
+        return [{field: column[position] for field, column in columns} for position in positions]
+    
+    def _listing_key(self, region: Optional[str], sort_by: Optional[str], order: str,
+                     language: Optional[str], currency: Optional[str],
+                     filters: Sequence[Condition]) -> Optional[tuple]:
+        """
+        Normalize listing parameters into a cache key.
+        
+        Returns:
+            Tuple of the conditions, language code, currency code and sort keys,
+            or None if an unknown language or currency rules out every row.
+        """
+        sort = parse_sort(sort_by, order, strict=False)
+        language_code = self.relation_code("language", language) if language else None
+        currency_code = self.relation_code("currency", currency) if currency else None
+        if (language and language_code is None) or (currency and currency_code is None):
+            return None
+        conditions = set(filters)
+        if region:
+            conditions.add(Condition("region", "eq", region))
+        conditions = tuple(sorted(conditions, key=lambda condition: (condition.field, condition.op, repr(condition.value))))
+        return (conditions, language_code, currency_code, sort)
+    
+    def _sort_order(self, sort: Tuple[SortKey, ...]) -> List[int]:
+        """
+        Row positions in the order of one or more sort keys.
+        
+        Single keys use the precomputed orders. Multi-key orders are built with
+        one stable sort per key, least significant first, and kept.
+        """
+        if not sort:
+            return range(self.count)
+        order = self.sort_orders.get(sort[0] if len(sort) == 1 else sort)
+        if order is None:
+            order = list(range(self.count))
+            for field, direction in reversed(sort):
+                values = self.columns[field]
+                order.sort(
+                    key=lambda index: (values[index] is None, values[index] if values[index] is not None else 0),
+                    reverse=direction == "desc"
+                )
+            self._cache_listing(self.sort_orders, sort, order)
+        return order
+    
+    def _cache_listing(self, cache: Dict[tuple, Any], key: tuple, value: Any) -> None:
+        """Keep a computed listing unless the cache is full of other filter combinations."""
+        with self._lock:
+            if len(cache) < MAX_CACHED_LISTINGS:
+                cache[key] = value
+    
+    def select(self, region: Optional[str] = None, sort_by: Optional[str] = None,
+               order: str = "asc", language: Optional[str] = None,
+               currency: Optional[str] = None, filters: Sequence[Condition] = ()) -> List[int]:
+        """
+        Get the row positions matching the filters in the requested order.
+        
+        Args:
+            region: Only include countries in this region.
+            sort_by: Sort field, or comma-separated fields with an optional ``-``
+                prefix for descending keys; unsupported fields are ignored and
+                no sort keeps id order.
+            order: Sort order (asc, desc) of keys without a prefix.
+            language: Only include countries speaking this language (code or name).
+            currency: Only include countries using this currency (code or name).
+            filters: Further conditions from parse_filters().
+        
+        Returns:
+            List of row positions (shared; do not modify).
+        """
+        key = self._listing_key(region, sort_by, order, language, currency, filters)
+        if key is None:
+            return []
+        positions = self._listings.get(key)
+        if positions is None:
+            conditions, language_code, currency_code, sort = key
+            base_order = self._sort_order(sort)
+            allowed = None
+            for kind, code in (("language", language_code), ("currency", currency_code)):
+                if code:
+                    matching = set(self.relations[kind]["positions"][code])
+                    allowed = matching if allowed is None else allowed & matching
+            if conditions or allowed is not None:
+                matches = compile_predicate(conditions, self.columns)
+                positions = [
+                    index for index in base_order
+                    if (allowed is None or index in allowed) and matches(index)
+                ]
+            else:
+                positions = list(base_order)
+            self._cache_listing(self._listings, key, positions)
+        return positions
+    
+    def _sort_values(self, position: int, sort: Tuple[SortKey, ...]) -> List[Any]:
+        """Sort field values of a row, one per sort key."""
+        return [self.columns[field][position] for field, direction in sort]
+    
+    def _is_after(self, position: int, sort: Tuple[SortKey, ...], cursor_values: List[Any], cursor_id: int) -> bool:
+        """Whether a row comes after the cursor row in the listing order."""
+        for (field, direction), cursor_value in zip(sort, cursor_values):
+            value = self.columns[field][position]
+            key = (value is None, value if value is not None else 0)
+            cursor_key = (cursor_value is None, cursor_value if cursor_value is not None else 0)
+            if key != cursor_key:
+                return key > cursor_key if direction == "asc" else key < cursor_key
+        return self.columns["id"][position] > cursor_id
+    
+    def page(self, region: Optional[str] = None, sort_by: Optional[str] = None, order: str = "asc",
+             limit: Optional[int] = None, cursor: Optional[str] = None, language: Optional[str] = None,
+             currency: Optional[str] = None, filters: Sequence[Condition] = ()) -> Tuple[List[int], Optional[str], int]:
+        """
+        Get one page of a filtered, sorted listing using keyset pagination.
+        
+        The cursor records the sort values and id of the last returned row, so
+        pages stay consistent even if the data changes between requests.
+        
+        Args:
+            region: Only include countries in this region.
+            sort_by: Sort field or comma-separated fields, as for select().
+            order: Sort order (asc, desc) of keys without a prefix.
+            limit: Maximum number of rows, or None for all remaining rows.
+            cursor: Cursor returned with the previous page.
+            language: Only include countries speaking this language (code or name).
+            currency: Only include countries using this currency (code or name).
+            filters: Further conditions from parse_filters().
+        
+        Returns:
+            Tuple of row positions, the cursor for the next page (None on the
+            last page) and the total number of matching rows.
+        
+        Raises:
+            ValueError: If the cursor is malformed or was issued for another sort.
+        """
+        key = self._listing_key(region, sort_by, order, language, currency, filters)
+        positions = self.select(region=region, sort_by=sort_by, order=order, language=language,
+                                currency=currency, filters=filters)
+        sort = parse_sort(sort_by, order, strict=False)
+        
+        # Single-key cursors keep their original shape; multi-key cursors hold lists
+        if len(sort) == 1:
+            cursor_field, cursor_direction = sort[0]
+        elif sort:
+            cursor_field, cursor_direction = [field for field, direction in sort], [direction for field, direction in sort]
+        else:
+            cursor_field, cursor_direction = None, "asc"
+        
+        start = 0
+        if cursor:
+            cursor_data = decode_cursor(cursor)
+            if cursor_data.get("s") != cursor_field or cursor_data.get("o") != cursor_direction:
+                raise ValueError("Cursor does not match the requested sort order")
+            cursor_values = cursor_data.get("v") if len(sort) > 1 else [cursor_data.get("v")]
+            if not isinstance(cursor_values, list) or len(cursor_values) < len(sort):
+                raise ValueError("Invalid cursor")
+            cursor_id = cursor_data["id"]
+            
+            order_index = self._order_indexes.get(key) if key is not None else None
+            if order_index is None:
+                order_index = {position: index for index, position in enumerate(positions)}
+                if key is not None:
+                    self._cache_listing(self._order_indexes, key, order_index)
+            
+            # Fast path: the cursor row is still where the cursor says it is
+            cursor_position = self._id_positions.get(cursor_id)
+            index = order_index.get(cursor_position) if cursor_position is not None else None
+            if index is not None and self._sort_values(cursor_position, sort) == cursor_values[:len(sort)]:
+                start = index + 1
+            else:
+                start = next(
+                    (index for index, position in enumerate(positions)
+                     if self._is_after(position, sort, cursor_values, cursor_id)),
+                    len(positions)
+                )
+        
+        end = len(positions) if limit is None else min(len(positions), start + limit)
+        page_positions = positions[start:end]
+        
+        next_cursor = None
+        if end < len(positions) and page_positions:
+            last = page_positions[-1]
+            values = self._sort_values(last, sort)
+            next_cursor = encode_cursor(
+                cursor_field,
+                cursor_direction,
+                values if len(sort) > 1 else (values[0] if values else None),
+                self.columns["id"][last]
+            )
+        return page_positions, next_cursor, len(positions)
+
+class CountrySnapshotCache:
+    """Process-local holder of the snapshot for the current data generation."""
+    
+    _snapshot: Optional[CountrySnapshot] = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get() -> CountrySnapshot:
+        """
+        Get the snapshot for the current data generation, rebuilding it if stale.
+        
+        Returns:
+            Current snapshot.
+        """
+        generation = DataGeneration.current()
+        snapshot = CountrySnapshotCache._snapshot
+        if snapshot is None or snapshot.generation != generation:
+            with CountrySnapshotCache._lock:
+                snapshot = CountrySnapshotCache._snapshot
+                if snapshot is None or snapshot.generation != generation:
+                    snapshot = CountrySnapshot.load(generation)
+                    CountrySnapshotCache._snapshot = snapshot
+        return snapshot
+    
+    @staticmethod
+    def clear() -> None:
+        """Drop the cached snapshot so the next access reloads it."""
+        CountrySnapshotCache._snapshot = None
@@ -0,0 +1,205 @@
+import json
+import logging
+import math
+import threading
+from datetime import datetime
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+from models import CountryStats
+from app import db
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+from services.data_generation import DataGeneration
+
+logger = logging.getLogger(__name__)
+
+# CountryStats key of the statistics served by /api/stats
+GLOBAL_STATS_KEY = "global"
+
+# Percentiles reported for population density
+DENSITY_PERCENTILES = (10, 25, 50, 75, 90)
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """
+    Linearly interpolated percentile of already sorted values.
+    
+    Args:
+        sorted_values: Values in ascending order.
+        percent: Percentile between 0 and 100.
+    
+    Returns:
+        Percentile value or None for an empty list.
+    """
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def _summarize(values: List[float]) -> Dict[str, Any]:
+    """Sum, mean, median, min and max of non-NULL values."""
+    if not values:
+        return {"sum": 0, "mean": None, "median": None, "min": None, "max": None}
+    total = sum(values)
+    return {
+        "sum": total,
+        "mean": total / len(values),
+        "median": median(values),
+        "min": min(values),
+        "max": max(values)
+    }
+
+class CountryStatsService:
+    """Compute statistics once per data generation and store them in country_stats."""
+    
+    _cached: Optional[Tuple[int, Dict[str, Any]]] = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def compute(snapshot: CountrySnapshot) -> Dict[str, Any]:
+        """
+        Compute the statistics served by /api/stats.
+        
+        Args:
+            snapshot: Country snapshot to aggregate.
+        
+        Returns:
+            Dictionary with the summary statistics and per-region and
+            per-subregion breakdowns.
+        """
+        columns = snapshot.columns
+        groups: Dict[Tuple[str, Any], List[int]] = {}
+        region_counts: Dict[Optional[str], int] = {}
+        for position in range(snapshot.count):
+            region = columns["region"][position]
+            region_counts[region] = region_counts.get(region, 0) + 1
+            groups.setdefault(("region", region), []).append(position)
+            groups.setdefault(("subregion", (region, columns["subregion"][position])), []).append(position)
+        
+        def breakdown(positions: List[int]) -> Dict[str, Any]:
+            populations = [columns["population"][p] for p in positions if columns["population"][p] is not None]
+            areas = [columns["area"][p] for p in positions if columns["area"][p] is not None]
+            densities = sorted(
+                columns["population"][p] / columns["area"][p]
+                for p in positions
+                if columns["area"][p] and columns["population"][p] is not None
+            )
+            return {
+                "count": len(positions),
+                "population": _summarize(populations),
+                "area": _summarize(areas),
+                "density": {f"p{percent}": _percentile(densities, percent) for percent in DENSITY_PERCENTILES}
+            }
+        
+        by_region = []
+        by_subregion = []
+        for (kind, group_key), positions in sorted(groups.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            if kind == "region":
+                by_region.append({"region": group_key, **breakdown(positions)})
+            else:
+                by_subregion.append({"region": group_key[0], "subregion": group_key[1], **breakdown(positions)})
+        
+        # Like SQL SUM/AVG, NULL values are ignored
+        populations = [value for value in columns["population"] if value is not None]
+        areas = [value for value in columns["area"] if value is not None]
+        
+        return {
+            "total_countries": snapshot.count,
+            "regions": [{"region": region, "count": count} for region, count in region_counts.items()],
+            "population": {
+                "total": sum(populations),
+                "average": sum(populations) / len(populations) if populations else 0
+            },
+            "area": {
+                "total": sum(areas),
+                "average": sum(areas) / len(areas) if areas else 0
+            },
+            "by_region": by_region,
+            "by_subregion": by_subregion
+        }
+    
+    @staticmethod
+    def materialize() -> Dict[str, Any]:
+        """
+        Compute statistics for the current data generation and store them.
+        
+        Called by writers at the end of a refresh or dump ingest, never while
+        serving a request. Statistics already stored for the generation are
+        kept, and the row is upserted, so concurrent writers in other processes
+        cannot collide on the key.
+        
+        Returns:
+            The stored statistics.
+        """
+        # Imported here because the processor imports the history and model layers
+        from services.data_processor import CountryDataProcessor
+        
+        snapshot = CountrySnapshotCache.get()
+        row = db.session.get(CountryStats, GLOBAL_STATS_KEY)
+        if row is not None and row.generation == snapshot.generation:
+            stats = json.loads(row.payload)
+            CountryStatsService._cached = (snapshot.generation, stats)
+            return stats
+        
+        stats = CountryStatsService.compute(snapshot)
+        computed_at = datetime.utcnow()
+        stats["computed_at"] = computed_at.isoformat()
+        values = {
+            "key": GLOBAL_STATS_KEY,
+            "generation": snapshot.generation,
+            "payload": json.dumps(stats),
+            "computed_at": computed_at
+        }
+        
+        insert = CountryDataProcessor.get_insert_construct()
+        if insert is not None:
+            statement = insert(CountryStats.__table__).values(values)
+            statement = statement.on_conflict_do_update(
+                index_elements=[CountryStats.__table__.c.key],
+                set_={key: statement.excluded[key] for key in ("generation", "payload", "computed_at")}
+            )
+            db.session.execute(statement)
+        else:
+            db.session.merge(CountryStats(**values))
+        db.session.commit()
+        
+        CountryStatsService._cached = (snapshot.generation, stats)
+        logger.info(f"Materialized country statistics for generation {snapshot.generation}")
+        return stats
+    
+    @staticmethod
+    def get() -> Dict[str, Any]:
+        """
+        Get the statistics for the current data generation.
+        
+        Served from the process cache when possible, otherwise with a single
+        keyed read of country_stats. Statistics missing or stale for the
+        current generation, e.g. between a refresh's commit and its statistics
+        stage, are computed from the snapshot and cached in this process only;
+        reads never write the row.
+        
+        Returns:
+            Statistics dictionary.
+        """
+        generation = DataGeneration.current()
+        cached = CountryStatsService._cached
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        
+        with CountryStatsService._lock:
+            cached = CountryStatsService._cached
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+            row = db.session.get(CountryStats, GLOBAL_STATS_KEY)
+            if row is not None and row.generation == generation:
+                stats = json.loads(row.payload)
+            else:
+                snapshot = CountrySnapshotCache.get()
+                stats = CountryStatsService.compute(snapshot)
+                stats["computed_at"] = datetime.utcnow().isoformat()
+                generation = snapshot.generation
+                logger.info(f"Computed country statistics for generation {generation} without storing them")
+            CountryStatsService._cached = (generation, stats)
+            return stats
@@ -0,0 +1,115 @@
+import heapq
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+from services.country_stats import CountryStatsService
+
+logger = logging.getLogger(__name__)
+
+# Default and largest number of countries in each top-N list
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 50
+
+class DashboardService:
+    """Build the dashboard payload once per data generation."""
+    
+    _cached: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def _top(snapshot: CountrySnapshot, top_n: int, value: Callable[[int], Optional[float]],
+             fields: Tuple[str, ...], value_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Select the top-N countries by a value without sorting every row.
+        
+        Args:
+            snapshot: Country snapshot.
+            top_n: Number of countries to return.
+            value: Function of a row position returning its value, or None to skip the row.
+            fields: Snapshot columns to include for each country.
+            value_name: Key to add the computed value under, if it is not a column.
+        
+        Returns:
+            Country dictionaries, largest value first (ties keep id order).
+        """
+        candidates = ((position, value(position)) for position in range(snapshot.count))
+        top_rows = heapq.nlargest(
+            top_n,
+            ((position, row_value) for position, row_value in candidates if row_value is not None),
+            key=lambda item: item[1]
+        )
+        result = []
+        for position, row_value in top_rows:
+            country = {field: snapshot.columns[field][position] for field in fields}
+            if value_name:
+                country[value_name] = row_value
+            result.append(country)
+        return result
+    
+    @staticmethod
+    def compute(snapshot: CountrySnapshot, stats: Dict[str, Any], top_n: int = DEFAULT_TOP_N) -> Dict[str, Any]:
+        """
+        Compute everything the dashboard page shows.
+        
+        Args:
+            snapshot: Country snapshot to aggregate.
+            stats: Statistics of the same data generation from CountryStatsService.
+            top_n: Number of countries in each top-N list.
+        
+        Returns:
+            Dictionary with the summary statistics, region counts and top-N
+            lists by population, area and population density.
+        """
+        populations = snapshot.columns["population"]
+        areas = snapshot.columns["area"]
+        
+        def density(position: int) -> Optional[float]:
+            if not areas[position] or areas[position] <= 0 or populations[position] is None:
+                return None
+            return populations[position] / areas[position]
+        
+        return {
+            "summary": {
+                "total_countries": stats["total_countries"],
+                "population": stats["population"],
+                "area": stats["area"]
+            },
+            "regions": stats["regions"],
+            "top_population": DashboardService._top(
+                snapshot, top_n, lambda position: populations[position], ("name", "population")
+            ),
+            "top_area": DashboardService._top(
+                snapshot, top_n, lambda position: areas[position], ("name", "area")
+            ),
+            "top_density": DashboardService._top(
+                snapshot, top_n, density, ("name", "population", "area"), value_name="density"
+            )
+        }
+    
+    @staticmethod
+    def get(top_n: int = DEFAULT_TOP_N) -> Dict[str, Any]:
+        """
+        Get the dashboard payload for the current data generation.
+        
+        Args:
+            top_n: Number of countries in each top-N list.
+        
+        Returns:
+            Dashboard dictionary, shared by all requests (do not modify).
+        """
+        snapshot = CountrySnapshotCache.get()
+        key = (snapshot.generation, top_n)
+        dashboard = DashboardService._cached.get(key)
+        if dashboard is None:
+            stats = CountryStatsService.get()
+            dashboard = DashboardService.compute(snapshot, stats, top_n)
+            with DashboardService._lock:
+                # Payloads of older generations are never served again
+                DashboardService._cached = {
+                    cached_key: cached for cached_key, cached in DashboardService._cached.items()
+                    if cached_key[0] == snapshot.generation
+                }
+                DashboardService._cached[key] = dashboard
+            logger.info(f"Built dashboard payload for generation {snapshot.generation} (top {top_n})")
+        return dashboard
@@ -1,14 +1,148 @@
+import os
+import random
+import threading
 import requests
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FetchTimeoutError
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Tuple
+from requests.adapters import HTTPAdapter
 import time
+from services.metrics import RequestMetrics
 
 logger = logging.getLogger(__name__)
 
+class ConditionalFetchResult(NamedTuple):
+    """Result of a conditional GET with the validators to send next time."""
+    not_modified: bool
+    data: Optional[List[Dict[str, Any]]]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+class PermanentFetchError(Exception):
+    """Raised for upstream errors that retrying cannot fix, such as a 404 for an unknown name."""
+
+def is_retryable(error: requests.exceptions.RequestException) -> bool:
+    """
+    Whether a failed request is worth retrying.
+    
+    Args:
+        error: Error raised by requests.
+    
+    Returns:
+        True for connection errors, timeouts, 5xx and 429 responses; False
+        for other HTTP errors.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
+
 class RestCountriesAPI:
     """Service to fetch data from the REST Countries API."""
     
-    BASE_URL = "https://restcountries.com/v3.1"
+    BASE_URL = os.environ.get("REST_COUNTRIES_BASE_URL", "https://restcountries.com/v3.1")
+    
+    # (connect, read) timeouts in seconds applied to every request
+    TIMEOUT: Tuple[float, float] = (
+        float(os.environ.get("REST_COUNTRIES_CONNECT_TIMEOUT", "3.05")),
+        float(os.environ.get("REST_COUNTRIES_READ_TIMEOUT", "30")),
+    )
+    
+    # Maximum number of requests in flight at once (also the connection pool size)
+    MAX_CONCURRENCY = int(os.environ.get("REST_COUNTRIES_MAX_CONCURRENCY", "8"))
+    
+    # Seconds fetch_many waits for all of its results, retries included
+    BATCH_TIMEOUT = float(os.environ.get("REST_COUNTRIES_BATCH_TIMEOUT", "60"))
+    
+    _session: Optional[requests.Session] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """
+        Get the shared HTTP session, creating it on first use.
+        
+        The session keeps up to MAX_CONCURRENCY keep-alive connections so repeated
+        fetches reuse TCP and TLS connections instead of handshaking every time.
+        
+        Returns:
+            Shared requests session.
+        """
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.MAX_CONCURRENCY)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({"Accept": "application/json"})
+                    cls._session = session
+        return cls._session
+    
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Get the shared thread pool used for concurrent fetches and retries.
+        
+        Returns:
+            Thread pool with MAX_CONCURRENCY workers.
+        """
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.MAX_CONCURRENCY,
+                        thread_name_prefix="restcountries"
+                    )
+        return cls._executor
+    
+    @classmethod
+    def _get(cls, path: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        GET a path below BASE_URL through the pooled session.
+        
+        Args:
+            path: URL path relative to BASE_URL, starting with a slash.
+            headers: Extra request headers.
+        
+        Returns:
+            Response with a 2xx or 304 status.
+        
+        Raises:
+            requests.exceptions.RequestException: On connection errors, timeouts,
+                5xx and 429 responses.
+            PermanentFetchError: On other HTTP errors, which are not retried.
+        """
+        with RequestMetrics.upstream_request(path) as outcome:
+            response = cls.get_session().get(f"{cls.BASE_URL}{path}", headers=headers, timeout=cls.TIMEOUT)
+            outcome["status"] = response.status_code
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            if not is_retryable(e):
+                raise PermanentFetchError(str(e)) from e
+            raise
+        return response
+    
+    @classmethod
+    def _get_json(cls, path: str) -> Any:
+        """
+        GET a path below BASE_URL and decode the JSON body.
+        
+        Args:
+            path: URL path relative to BASE_URL, starting with a slash.
+        
+        Returns:
+            Decoded JSON body.
+        
+        Raises:
+            requests.exceptions.RequestException: On connection errors, timeouts,
+                5xx and 429 responses.
+            PermanentFetchError: On other HTTP errors, which are not retried.
+        """
+        return cls._get(path).json()
     
     @staticmethod
     def fetch_all_countries() -> Optional[List[Dict[str, Any]]]:
@@ -17,12 +151,53 @@ class RestCountriesAPI:
         
         Returns:
             List of country data dictionaries or None if the request fails.
+        
+        Raises:
+            PermanentFetchError: On HTTP errors that retrying cannot fix.
         """
         try:
             logger.info("Fetching all countries data from REST Countries API")
-            response = requests.get(f"{RestCountriesAPI.BASE_URL}/all")
-            response.raise_for_status()
-            return response.json()
+            return RestCountriesAPI._get_json("/all")
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching countries data: {str(e)}")
+            return None
+    
+    @staticmethod
+    def fetch_all_countries_if_modified(etag: Optional[str] = None,
+                                        last_modified: Optional[str] = None) -> Optional[ConditionalFetchResult]:
+        """
+        Fetch all countries unless they are unchanged since the given validators.
+        
+        Sends If-None-Match / If-Modified-Since so the API can answer 304 without a body.
+        
+        Args:
+            etag: ETag returned by the previous successful fetch.
+            last_modified: Last-Modified value returned by the previous successful fetch.
+            
+        Returns:
+            ConditionalFetchResult, or None if the request fails.
+        
+        Raises:
+            PermanentFetchError: On HTTP errors that retrying cannot fix.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        
+        try:
+            logger.info("Fetching all countries data from REST Countries API (conditional)")
+            response = RestCountriesAPI._get("/all", headers=headers)
+            if response.status_code == 304:
+                logger.info("REST Countries data not modified since last fetch")
+                return ConditionalFetchResult(True, None, etag, last_modified)
+            return ConditionalFetchResult(
+                False,
+                response.json(),
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching countries data: {str(e)}")
             return None
@@ -34,15 +209,16 @@ class RestCountriesAPI:
         
         Args:
             name: The name of the country to fetch.
-            
+        
         Returns:
             Country data dictionary or None if the request fails.
+        
+        Raises:
+            PermanentFetchError: On HTTP errors that retrying cannot fix.
         """
         try:
             logger.info(f"Fetching data for country: {name}")
-            response = requests.get(f"{RestCountriesAPI.BASE_URL}/name/{name}")
-            response.raise_for_status()
-            return response.json()
+            return RestCountriesAPI._get_json(f"/name/{requests.utils.quote(name)}")
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching country data for {name}: {str(e)}")
             return None
@@ -54,40 +230,133 @@ class RestCountriesAPI:
         
         Args:
             region: The region to fetch countries for.
-            
+        
         Returns:
             List of country data dictionaries or None if the request fails.
+        
+        Raises:
+            PermanentFetchError: On HTTP errors that retrying cannot fix.
         """
         try:
             logger.info(f"Fetching countries in region: {region}")
-            response = requests.get(f"{RestCountriesAPI.BASE_URL}/region/{region}")
-            response.raise_for_status()
-            return response.json()
+            return RestCountriesAPI._get_json(f"/region/{requests.utils.quote(region)}")
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching countries in region {region}: {str(e)}")
             return None
     
     @staticmethod
-    def retry_fetch(fetch_function, *args, max_retries=3, delay=1, **kwargs):
+    def submit(fetch_function, *args, **kwargs) -> Future:
+        """
+        Run a fetch function with retries on the shared thread pool.
+        
+        Backoff sleeps happen on the pool thread, so the caller is free to wait
+        with its own deadline via ``Future.result(timeout=...)``.
+        
+        Args:
+            fetch_function: The function to run.
+            *args, **kwargs: Arguments to pass to retry_fetch.
+        
+        Returns:
+            Future resolving to the fetch result or None if all retries fail.
+        """
+        return RestCountriesAPI.get_executor().submit(RestCountriesAPI.retry_fetch, fetch_function, *args, **kwargs)
+    
+    @staticmethod
+    def fetch_many(fetch_function, keys: Iterable[str], timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Fetch several names or regions concurrently.
+        
+        At most MAX_CONCURRENCY requests run at once; each one is retried with
+        backoff independently of the others. Results still missing at the
+        deadline are given up on, so one stuck request cannot block the caller.
+        
+        Args:
+            fetch_function: Fetch function taking a single key, e.g. fetch_country_by_name.
+            keys: Names or regions to fetch.
+            timeout: Seconds to wait for all results (defaults to BATCH_TIMEOUT).
+            **kwargs: Retry options passed to retry_fetch.
+        
+        Returns:
+            Dictionary mapping each key to its result (None for failed or timed-out fetches).
+        """
+        deadline = time.monotonic() + (RestCountriesAPI.BATCH_TIMEOUT if timeout is None else timeout)
+        futures = {
+            key: RestCountriesAPI.submit(fetch_function, key, **kwargs)
+            for key in dict.fromkeys(keys)
+        }
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FetchTimeoutError:
+                future.cancel()
+                logger.error(f"Timed out fetching {key}")
+                results[key] = None
+        return results
+    
+    @staticmethod
+    def fetch_countries_by_names(names: Iterable[str],
+                                 timeout: Optional[float] = None) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Fetch several countries by name concurrently.
+        
+        Args:
+            names: Country names to fetch.
+            timeout: Seconds to wait for all results (defaults to BATCH_TIMEOUT).
+        
+        Returns:
+            Dictionary mapping each name to its country data or None if the fetch failed.
+        """
+        return RestCountriesAPI.fetch_many(RestCountriesAPI.fetch_country_by_name, names, timeout=timeout)
+    
+    @staticmethod
+    def fetch_countries_by_regions(regions: Iterable[str],
+                                   timeout: Optional[float] = None) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Fetch the countries of several regions concurrently.
+        
+        Args:
+            regions: Regions to fetch.
+            timeout: Seconds to wait for all results (defaults to BATCH_TIMEOUT).
+        
+        Returns:
+            Dictionary mapping each region to its country data or None if the fetch failed.
+        """
+        return RestCountriesAPI.fetch_many(RestCountriesAPI.fetch_countries_by_region, regions, timeout=timeout)
+    
+    @staticmethod
+    def retry_fetch(fetch_function, *args, max_retries=3, delay=1, max_delay=10, **kwargs):
         """
         Retry a fetch function with exponential backoff.
         
+        The function signals a retryable failure by returning None; a
+        PermanentFetchError, e.g. for a 404, ends the retries at once.
+        
         Args:
             fetch_function: The function to retry.
             max_retries: Maximum number of retries.
             delay: Initial delay between retries (seconds).
+            max_delay: Upper bound for a single backoff delay (seconds).
             *args, **kwargs: Arguments to pass to the fetch function.
-            
+        
         Returns:
             Result of the fetch function or None if all retries fail.
         """
         for attempt in range(max_retries):
-            result = fetch_function(*args, **kwargs)
+            try:
+                result = fetch_function(*args, **kwargs)
+            except PermanentFetchError as e:
+                logger.error(f"Not retrying: {str(e)}")
+                return None
             if result is not None:
                 return result
             
-            wait_time = delay * (2 ** attempt)
-            logger.warning(f"Retry {attempt + 1}/{max_retries} after {wait_time}s")
+            if attempt == max_retries - 1:
+                break
+            
+            # Full jitter keeps concurrent retries from hitting the API in lockstep
+            wait_time = random.uniform(0, min(max_delay, delay * (2 ** attempt)))
+            logger.warning(f"Retry {attempt + 1}/{max_retries} after {wait_time:.2f}s")
             time.sleep(wait_time)
         
         logger.error(f"All {max_retries} retries failed")
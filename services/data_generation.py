@@ -0,0 +1,53 @@
+import logging
+from flask import g, has_request_context
+from sqlalchemy import Integer, Text, cast, update
+from models import AppState
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# AppState key holding the data generation counter
+GENERATION_KEY = "data.generation"
+
+class DataGeneration:
+    """Counter identifying the current version of the country data."""
+    
+    @staticmethod
+    def current() -> int:
+        """
+        Get the current data generation.
+        
+        The value is read once per request and reused by every caller in that
+        request, so each request costs at most one primary-key lookup.
+        
+        Returns:
+            Current generation (0 before the first write).
+        """
+        if has_request_context() and "data_generation" in g:
+            return g.data_generation
+        
+        state = db.session.get(AppState, GENERATION_KEY)
+        generation = int(state.value) if state is not None and state.value else 0
+        
+        if has_request_context():
+            g.data_generation = generation
+        return generation
+    
+    @staticmethod
+    def bump() -> None:
+        """
+        Increment the data generation in the current transaction.
+        
+        The increment is a single UPDATE, so concurrent writers in other
+        processes never lose a bump. The caller commits.
+        """
+        updated = db.session.execute(
+            update(AppState)
+            .where(AppState.key == GENERATION_KEY)
+            .values(value=cast(cast(AppState.value, Integer) + 1, Text))
+        )
+        if not updated.rowcount:
+            db.session.add(AppState(key=GENERATION_KEY, value="1"))
+        if has_request_context():
+            g.pop("data_generation", None)
+        logger.info("Bumped country data generation")
@@ -1,11 +1,42 @@
+import hashlib
+import json
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 from datetime import datetime
-from models import Country
+from flask import current_app
+from sqlalchemy import delete, update
+from models import Country, Currency, Language, country_currency, country_language
 from app import db
+from services.country_history import CountryHistoryService, TrackedValues
+from services.data_generation import DataGeneration
 
 logger = logging.getLogger(__name__)
 
+# Processed-data key, catalog model, association table and association column of
+# each normalized country attribute
+COUNTRY_RELATIONS = (
+    ("language_entries", Language, country_language, "language_code"),
+    ("currency_entries", Currency, country_currency, "currency_code"),
+)
+
+# Rows per DELETE ... IN statement, within every dialect's bound parameter limit
+RELATION_BATCH_SIZE = 500
+
+# Encoder of content hashes, shared so a batch does not build one per record
+CONTENT_HASH_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=str)
+
+class ProcessingError(NamedTuple):
+    """A raw country record that could not be processed normally."""
+    index: int
+    name: Optional[str]
+    field: str
+    message: str
+
+class ProcessedBatch(NamedTuple):
+    """Result of processing a batch of raw country records."""
+    records: List[Dict[str, Any]]
+    errors: List[ProcessingError]
+
 class CountryDataProcessor:
     """Process and clean country data from the REST Countries API."""
     
@@ -16,7 +47,7 @@ class CountryDataProcessor:
         
         Args:
             country_data: Raw country data from the API.
-            
+        
         Returns:
             Dictionary with cleaned country data.
         """
@@ -35,28 +66,43 @@ class CountryDataProcessor:
                 "flag_url": country_data.get("flags", {}).get("svg", ""),
                 "independent": country_data.get("independent", True),
                 "un_member": country_data.get("unMember", True),
+                "alpha2_code": country_data.get("cca2", ""),
+                "landlocked": country_data.get("landlocked", False),
                 "last_updated": datetime.utcnow()
             }
             
+            # Process borders (cca3 codes) and the centroid
+            borders = country_data.get("borders", [])
+            processed_data["borders"] = ",".join(borders) if isinstance(borders, list) else ""
+            latlng = country_data.get("latlng")
+            has_latlng = isinstance(latlng, list) and len(latlng) == 2
+            processed_data["latitude"] = latlng[0] if has_latlng else None
+            processed_data["longitude"] = latlng[1] if has_latlng else None
+            
             # Process currencies
             currencies = country_data.get("currencies", {})
             currency_list = []
+            currency_entries = {}
             for code, details in currencies.items():
                 currency_name = details.get("name", "Unknown")
                 currency_symbol = details.get("symbol", "")
                 currency_list.append(f"{code} ({currency_name}, {currency_symbol})")
+                currency_entries[code] = {"name": currency_name, "symbol": currency_symbol}
             processed_data["currencies"] = ", ".join(currency_list)
+            processed_data["currency_entries"] = currency_entries
             
             # Process languages
             languages = country_data.get("languages", {})
             processed_data["languages"] = ", ".join(languages.values())
+            processed_data["language_entries"] = {code: {"name": name} for code, name in languages.items()}
             
+            processed_data["content_hash"] = CountryDataProcessor.compute_content_hash(processed_data)
             return processed_data
         
         except Exception as e:
             logger.error(f"Error processing country data: {str(e)}")
             # Return basic data even if processing failed
-            return {
+            fallback_data = {
                 "name": country_data.get("name", {}).get("common", "Unknown"),
                 "official_name": country_data.get("name", {}).get("official", "Unknown"),
                 "capital": "Unknown",
@@ -65,6 +111,29 @@ class CountryDataProcessor:
                 "area": 0.0,
                 "last_updated": datetime.utcnow()
             }
+            fallback_data["content_hash"] = CountryDataProcessor.compute_content_hash(fallback_data)
+            return fallback_data
+    
+    @staticmethod
+    def compute_content_hash(processed_data: Dict[str, Any]) -> str:
+        """
+        Hash the stored content of a processed country.
+        
+        Bookkeeping fields (``last_updated`` and the hash itself) are excluded, so
+        the hash only changes when data that ends up in the database changes.
+        
+        Args:
+            processed_data: Processed country data dictionary.
+        
+        Returns:
+            Hex-encoded SHA-256 digest.
+        """
+        content = {
+            key: value for key, value in processed_data.items()
+            if key not in ("last_updated", "content_hash")
+        }
+        encoded = CONTENT_HASH_ENCODER.encode(content)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
     
     @staticmethod
     def process_countries_list(countries_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -73,7 +142,7 @@ class CountryDataProcessor:
         
         Args:
             countries_data: List of raw country data from the API.
-            
+        
         Returns:
             List of dictionaries with cleaned country data.
         """
@@ -84,6 +153,130 @@ class CountryDataProcessor:
         
         return processed_countries
     
+    @staticmethod
+    def _validate_raw_country(country_data: Any) -> Optional[Tuple[str, str]]:
+        """
+        Find the first field that would make process_country_data fail.
+        
+        Args:
+            country_data: Raw country record.
+        
+        Returns:
+            (field, message) of the problem, or None if the record is valid.
+        """
+        if not isinstance(country_data, dict):
+            return "record", f"expected an object, found {type(country_data).__name__}"
+        for field in ("name", "flags", "currencies", "languages"):
+            if field in country_data and not isinstance(country_data[field], dict):
+                return field, f"expected an object, found {type(country_data[field]).__name__}"
+        capital = country_data.get("capital")
+        if isinstance(capital, list) and not all(isinstance(item, str) for item in capital):
+            return "capital", "expected a list of strings"
+        borders = country_data.get("borders")
+        if isinstance(borders, list) and not all(isinstance(item, str) for item in borders):
+            return "borders", "expected a list of strings"
+        for code, details in country_data.get("currencies", {}).items():
+            if not isinstance(details, dict):
+                return f"currencies.{code}", f"expected an object, found {type(details).__name__}"
+        for code, name in country_data.get("languages", {}).items():
+            if not isinstance(name, str):
+                return f"languages.{code}", f"expected a string, found {type(name).__name__}"
+        return None
+    
+    @staticmethod
+    def process_countries_batch(countries_data: List[Any], processed_at: Optional[datetime] = None) -> ProcessedBatch:
+        """
+        Process a batch of raw country records in one pass.
+        
+        Produces the same records as process_countries_list, in the same order,
+        with one timestamp for the whole batch, a shared hash encoder and no
+        per-record function calls or logging. Records that process_country_data
+        would replace with its degraded fallback get the same fallback here,
+        plus an error entry. Records that are not objects or whose ``name`` is
+        not an object are left out, since the per-record path cannot process
+        them at all.
+        
+        Args:
+            countries_data: List of raw country data from the API.
+            processed_at: ``last_updated`` of every record (defaults to now).
+        
+        Returns:
+            ProcessedBatch with the processed records and the per-record errors.
+        """
+        processed_at = processed_at or datetime.utcnow()
+        encode = CONTENT_HASH_ENCODER.encode
+        sha256 = hashlib.sha256
+        empty: Dict[str, Any] = {}
+        records = []
+        errors = []
+        
+        for index, country_data in enumerate(countries_data):
+            try:
+                get = country_data.get
+                names = get("name", empty)
+                capital = get("capital")
+                currency_entries = {
+                    code: {"name": details.get("name", "Unknown"), "symbol": details.get("symbol", "")}
+                    for code, details in get("currencies", empty).items()
+                }
+                languages = get("languages", empty)
+                borders = get("borders", [])
+                latlng = get("latlng")
+                has_latlng = isinstance(latlng, list) and len(latlng) == 2
+                processed_data = {
+                    "name": names.get("common", "Unknown"),
+                    "official_name": names.get("official", "Unknown"),
+                    "country_code": get("cca3", ""),
+                    "capital": ", ".join(capital) if isinstance(capital, list) else "Unknown",
+                    "region": get("region", "Unknown"),
+                    "subregion": get("subregion", "Unknown"),
+                    "population": get("population", 0),
+                    "area": get("area", 0.0),
+                    "flag_emoji": get("flag", ""),
+                    "flag_url": get("flags", empty).get("svg", ""),
+                    "independent": get("independent", True),
+                    "un_member": get("unMember", True),
+                    "alpha2_code": get("cca2", ""),
+                    "landlocked": get("landlocked", False),
+                    "borders": ",".join(borders) if isinstance(borders, list) else "",
+                    "latitude": latlng[0] if has_latlng else None,
+                    "longitude": latlng[1] if has_latlng else None,
+                    "currencies": ", ".join(
+                        [f"{code} ({entry['name']}, {entry['symbol']})" for code, entry in currency_entries.items()]
+                    ),
+                    "currency_entries": currency_entries,
+                    "languages": ", ".join(languages.values()),
+                    "language_entries": {code: {"name": name} for code, name in languages.items()}
+                }
+            except (AttributeError, TypeError) as e:
+                field, message = CountryDataProcessor._validate_raw_country(country_data) or ("record", str(e))
+                name = None
+                if field not in ("record", "name"):
+                    name = country_data.get("name", {}).get("common", "Unknown")
+                    processed_data = {
+                        "name": name,
+                        "official_name": country_data.get("name", {}).get("official", "Unknown"),
+                        "capital": "Unknown",
+                        "region": "Unknown",
+                        "population": 0,
+                        "area": 0.0
+                    }
+                    processed_data["content_hash"] = sha256(encode(processed_data).encode("utf-8")).hexdigest()
+                    processed_data["last_updated"] = processed_at
+                    records.append(processed_data)
+                errors.append(ProcessingError(index, name, field, message))
+                continue
+            
+            # Hash before the bookkeeping fields are added, as compute_content_hash does
+            content_hash = sha256(encode(processed_data).encode("utf-8")).hexdigest()
+            processed_data["last_updated"] = processed_at
+            processed_data["content_hash"] = content_hash
+            records.append(processed_data)
+        
+        if errors:
+            logger.warning(f"{len(errors)} of {len(countries_data)} country records failed validation")
+        return ProcessedBatch(records, errors)
+    
     @staticmethod
     def save_country_to_db(country_data: Dict[str, Any]) -> Optional[Country]:
         """
@@ -91,11 +284,13 @@ class CountryDataProcessor:
         
         Args:
             country_data: Processed country data dictionary.
-            
+        
         Returns:
             Country object if successful, None otherwise.
         """
         try:
+            country_data = CountryDataProcessor._country_columns(country_data)
+            
             # Check if country already exists in the database
             existing_country = Country.query.filter_by(name=country_data["name"]).first()
             
@@ -120,20 +315,360 @@ class CountryDataProcessor:
             return None
     
     @staticmethod
-    def save_countries_to_db(countries_data: List[Dict[str, Any]]) -> int:
+    def _save_countries_individually(countries_data: List[Dict[str, Any]]) -> List[str]:
         """
-        Save a list of processed country data to the database.
+        Save processed countries one row at a time.
+        
+        Each country costs one SELECT and one COMMIT. Used for database
+        dialects without an upsert statement.
         
         Args:
             countries_data: List of processed country data dictionaries.
-            
+        
+        Returns:
+            Name of every successfully saved record.
+        """
+        previous = CountryDataProcessor._capture_history(countries_data)
+        # Each country commits on its own; commit the base history rows first
+        db.session.commit()
+        saved_records = [
+            country_data["name"] for country_data in countries_data
+            if CountryDataProcessor.save_country_to_db(country_data)
+        ]
+        if saved_records:
+            CountryDataProcessor._save_relations(countries_data)
+            CountryDataProcessor._save_history(previous, countries_data)
+            DataGeneration.bump()
+            db.session.commit()
+        return saved_records
+    
+    @staticmethod
+    def save_countries_individually(countries_data: List[Dict[str, Any]]) -> int:
+        """
+        Save a list of processed country data to the database one row at a time.
+        
+        The path taken on dialects without an upsert statement, callable
+        directly as the benchmark baseline.
+        
+        Args:
+            countries_data: List of processed country data dictionaries.
+        
         Returns:
             Number of countries successfully saved.
         """
-        success_count = 0
+        success_count = len(CountryDataProcessor._save_countries_individually(countries_data))
+        logger.info(f"Successfully saved {success_count} out of {len(countries_data)} countries")
+        return success_count
+    
+    @staticmethod
+    def _country_columns(country_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Keep only the keys of processed data that are Country columns.
+        
+        Args:
+            country_data: Processed country data dictionary.
+        
+        Returns:
+            Dictionary of Country column values.
+        """
+        column_names = Country.__table__.columns.keys()
+        return {key: value for key, value in country_data.items() if key in column_names}
+    
+    @staticmethod
+    def _save_relations(countries_data: List[Dict[str, Any]]) -> None:
+        """
+        Replace the language and currency associations of saved countries.
+        
+        Missing languages and currencies are added to their catalog tables and
+        renamed ones updated. Runs in a savepoint of the caller's transaction;
+        on failure the associations keep their previous state and the country
+        rows are still saved.
+        
+        Args:
+            countries_data: Processed data of countries already saved.
+        """
+        try:
+            with db.session.begin_nested():
+                country_ids = dict(db.session.query(Country.name, Country.id).all())
+                
+                for entries_key, model, table, code_column in COUNTRY_RELATIONS:
+                    entries_by_id = {}
+                    for country_data in countries_data:
+                        country_id = country_ids.get(country_data.get("name"))
+                        if country_id is not None and entries_key in country_data:
+                            entries_by_id[country_id] = country_data[entries_key]
+                    if not entries_by_id:
+                        continue
+                    
+                    # Upsert the catalog rows
+                    catalog = {item.code: item for item in model.query.all()}
+                    for entries in entries_by_id.values():
+                        for code, attributes in entries.items():
+                            item = catalog.get(code)
+                            if item is None:
+                                item = model(code=code, **attributes)
+                                db.session.add(item)
+                                catalog[code] = item
+                            elif any(getattr(item, key) != value for key, value in attributes.items()):
+                                db.session.execute(
+                                    update(model).where(model.code == code).values(**attributes)
+                                )
+                    db.session.flush()
+                    
+                    # Replace the associations
+                    country_id_list = list(entries_by_id)
+                    for start in range(0, len(country_id_list), RELATION_BATCH_SIZE):
+                        db.session.execute(
+                            delete(table).where(table.c.country_id.in_(country_id_list[start:start + RELATION_BATCH_SIZE]))
+                        )
+                    association_rows = [
+                        {"country_id": country_id, code_column: code}
+                        for country_id, entries in entries_by_id.items()
+                        for code in entries
+                    ]
+                    if association_rows:
+                        db.session.execute(table.insert(), association_rows)
+        except Exception as e:
+            logger.error(f"Error saving country languages and currencies: {str(e)}")
+    
+    @staticmethod
+    def _capture_history(countries_data: List[Dict[str, Any]]) -> Optional[Dict[str, TrackedValues]]:
+        """
+        Read the population, area and region of countries before they are overwritten.
+        
+        Args:
+            countries_data: Processed data of the countries about to be saved.
+        
+        Returns:
+            Values captured by CountryHistoryService.capture(), or None if they
+            could not be read and no history should be recorded.
+        """
+        try:
+            with db.session.begin_nested():
+                return CountryHistoryService.capture(
+                    country_data["name"] for country_data in countries_data if country_data.get("name")
+                )
+        except Exception as e:
+            logger.error(f"Error reading country history: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _save_history(previous: Optional[Dict[str, TrackedValues]], countries_data: List[Dict[str, Any]]) -> None:
+        """
+        Record the population and area changes of saved countries.
+        
+        Runs in a savepoint of the caller's transaction; on failure no history
+        is recorded and the country rows are still saved.
+        
+        Args:
+            previous: Values captured before the save, or None to skip recording.
+            countries_data: Processed data of countries already saved.
+        """
+        if previous is None:
+            return
+        try:
+            with db.session.begin_nested():
+                CountryHistoryService.record(previous, countries_data)
+        except Exception as e:
+            logger.error(f"Error recording country history: {str(e)}")
+    
+    @staticmethod
+    def get_insert_construct():
+        """
+        Get the dialect-specific INSERT construct supporting ON CONFLICT.
+        
+        Returns:
+            The insert() function for PostgreSQL or SQLite, None for other dialects.
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            return insert
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            return insert
+        return None
+    
+    @staticmethod
+    def _upsert_rows(insert, rows: List[Dict[str, Any]]) -> None:
+        """
+        Execute INSERT ... ON CONFLICT (name) DO UPDATE for rows sharing the same keys.
+        
+        Args:
+            insert: Dialect-specific insert() function.
+            rows: Country rows with identical key sets.
+        """
+        statement = insert(Country.__table__).values(rows)
+        update_columns = {
+            key: statement.excluded[key]
+            for key in rows[0]
+            if key not in ("id", "name")
+        }
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=[Country.__table__.c.name],
+                set_=update_columns
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=[Country.__table__.c.name])
+        db.session.execute(statement)
+    
+    @staticmethod
+    def _upsert_chunk(insert, chunk: List[Dict[str, Any]]) -> List[str]:
+        """
+        Upsert one chunk inside a savepoint, isolating failing rows if needed.
+        
+        Rows are grouped by their key sets so a partially processed record only
+        updates the columns it actually carries, like the per-row path does.
+        
+        Args:
+            insert: Dialect-specific insert() function.
+            chunk: Country rows to upsert.
+        
+        Returns:
+            Names of the countries successfully upserted.
+        """
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in chunk:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        
+        try:
+            with db.session.begin_nested():
+                for rows in groups.values():
+                    CountryDataProcessor._upsert_rows(insert, rows)
+            return [row["name"] for row in chunk]
+        except Exception as e:
+            logger.warning(f"Bulk upsert of {len(chunk)} countries failed, retrying row by row: {str(e)}")
+        
+        saved_names = []
+        for row in chunk:
+            try:
+                with db.session.begin_nested():
+                    CountryDataProcessor._upsert_rows(insert, [row])
+                saved_names.append(row["name"])
+            except Exception as e:
+                logger.error(f"Error saving country {row['name']} to database: {str(e)}")
+        return saved_names
+    
+    @staticmethod
+    def _save_countries(countries_data: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> List[str]:
+        """
+        Upsert processed countries in chunks inside a single transaction.
+        
+        Args:
+            countries_data: List of processed country data dictionaries.
+            chunk_size: Rows per upsert statement (defaults to UPSERT_CHUNK_SIZE).
+        
+        Returns:
+            Name of every successfully saved record, repeated for duplicate records.
+        """
+        insert = CountryDataProcessor.get_insert_construct()
+        if insert is None:
+            return CountryDataProcessor._save_countries_individually(countries_data)
+        
+        previous = CountryDataProcessor._capture_history(countries_data)
+        if chunk_size is None:
+            chunk_size = current_app.config.get("UPSERT_CHUNK_SIZE", 500)
+        chunk_size = max(1, chunk_size)
+        
+        column_names = {column.name for column in Country.__table__.columns}
+        rows_by_name: Dict[str, Dict[str, Any]] = {}
+        records_per_name: Dict[str, int] = {}
         for country_data in countries_data:
-            if CountryDataProcessor.save_country_to_db(country_data):
-                success_count += 1
+            if not country_data.get("name"):
+                logger.error("Error saving country to database: missing name")
+                continue
+            row = {key: value for key, value in country_data.items() if key in column_names and key != "id"}
+            # A later record with the same name overwrites the earlier one, as in the per-row path
+            rows_by_name[row["name"]] = row
+            records_per_name[row["name"]] = records_per_name.get(row["name"], 0) + 1
+        
+        rows = list(rows_by_name.values())
+        saved_records = []
+        try:
+            for start in range(0, len(rows), chunk_size):
+                for name in CountryDataProcessor._upsert_chunk(insert, rows[start:start + chunk_size]):
+                    saved_records.extend([name] * records_per_name[name])
+            if saved_records:
+                saved_names = set(saved_records)
+                saved_data = [country_data for country_data in countries_data if country_data.get("name") in saved_names]
+                CountryDataProcessor._save_relations(saved_data)
+                CountryDataProcessor._save_history(previous, saved_data)
+                # Readers rebuild their snapshots when the generation changes
+                DataGeneration.bump()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error saving countries to database: {str(e)}")
+            return []
+        
+        return saved_records
+    
+    @staticmethod
+    def save_countries_to_db(countries_data: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> int:
+        """
+        Save a list of processed country data to the database with batched upserts.
+        
+        Countries are written with INSERT ... ON CONFLICT (name) DO UPDATE in chunks
+        of ``chunk_size`` rows, all inside a single transaction.
+        
+        Args:
+            countries_data: List of processed country data dictionaries.
+            chunk_size: Rows per upsert statement (defaults to UPSERT_CHUNK_SIZE).
         
+        Returns:
+            Number of countries successfully saved.
+        """
+        success_count = len(CountryDataProcessor._save_countries(countries_data, chunk_size))
         logger.info(f"Successfully saved {success_count} out of {len(countries_data)} countries")
         return success_count
+    
+    @staticmethod
+    def sync_countries_to_db(countries_data: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Save only the countries whose content hash differs from the stored row.
+        
+        Unchanged rows are not written at all, so their ``last_updated`` keeps
+        the time their content last changed. When a country appears more than
+        once, only its last record is compared and saved, as later records
+        supersede earlier ones.
+        
+        Args:
+            countries_data: List of processed country data dictionaries.
+            chunk_size: Rows per upsert statement (defaults to UPSERT_CHUNK_SIZE).
+        
+        Returns:
+            Dictionary with ``inserted``, ``updated``, ``unchanged`` and
+            ``failed`` (database errors) counts per distinct country, and the
+            number of records ``skipped`` for lacking a name.
+        """
+        stored_hashes = dict(db.session.query(Country.name, Country.content_hash).all())
+        
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        latest: Dict[str, Dict[str, Any]] = {}
+        for country_data in countries_data:
+            name = country_data.get("name")
+            if not name:
+                counts["skipped"] += 1
+                continue
+            latest[name] = country_data
+        
+        changed_countries = []
+        for name, country_data in latest.items():
+            content_hash = country_data.get("content_hash")
+            if content_hash and stored_hashes.get(name) == content_hash:
+                counts["unchanged"] += 1
+                continue
+            changed_countries.append(country_data)
+        
+        saved_records = CountryDataProcessor._save_countries(changed_countries, chunk_size)
+        for name in saved_records:
+            counts["updated" if name in stored_hashes else "inserted"] += 1
+        counts["failed"] = len(changed_countries) - len(saved_records)
+        
+        logger.info(
+            f"Synced {len(countries_data)} countries: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged, "
+            f"{counts['skipped']} skipped, {counts['failed']} failed"
+        )
+        return counts
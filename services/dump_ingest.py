@@ -0,0 +1,279 @@
+"""
+Ingest country data from local dumps of REST Countries ``/all`` responses.
+
+Usage:
+    flask --app main ingest-dump PATH [PATH ...] [--batch-size 500]
+    python -m services.dump_ingest PATH [PATH ...] [--batch-size 500]
+
+A path may be a JSON file (an array of countries, or one country object per
+line), a gzip-compressed JSON file, a directory of such files, or a tar or zip
+archive of them. Files are read in name order, so archives of past responses
+replay oldest first when their names sort chronologically.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+import zipfile
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from services.country_stats import CountryStatsService
+from services.data_processor import CountryDataProcessor
+
+logger = logging.getLogger(__name__)
+
+# Characters read from a dump per call
+READ_CHUNK_SIZE = 64 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def iter_json_records(stream: IO[str], chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Parse country objects incrementally from a text stream.
+    
+    Accepts one or more top-level arrays of objects and top-level objects
+    separated by whitespace (NDJSON). Only the current object and one chunk of
+    input are held in memory.
+    
+    Args:
+        stream: Text stream of the dump.
+        chunk_size: Characters read per call.
+    
+    Yields:
+        Country objects in dump order.
+    
+    Raises:
+        ValueError: If the dump is not valid JSON or holds values other than objects.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    in_array = False
+    
+    while True:
+        # Skip whitespace and array punctuation
+        while position < len(buffer):
+            char = buffer[position]
+            if char.isspace() or (in_array and char == ","):
+                position += 1
+            elif not in_array and char == "[":
+                in_array = True
+                position += 1
+            elif in_array and char == "]":
+                in_array = False
+                position += 1
+            else:
+                break
+        
+        if position == len(buffer):
+            if eof:
+                break
+            chunk = stream.read(chunk_size)
+            buffer, position, eof = chunk, 0, not chunk
+            continue
+        
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"Invalid JSON in dump: {e.msg}")
+            complete = False
+        
+        if not complete:
+            # The value may continue in the next chunk; grow reads with the value so
+            # a large one costs linear rather than quadratic time
+            chunk = stream.read(max(chunk_size, len(buffer) - position))
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            continue
+        
+        if not isinstance(value, dict):
+            raise ValueError(f"Expected country objects in dump, found {type(value).__name__}")
+        position = end
+        yield value
+    
+    if in_array:
+        raise ValueError("Unterminated array in dump")
+
+def _open_text(binary: IO[bytes]) -> IO[str]:
+    """Wrap a binary stream as UTF-8 text, decompressing it if it is gzip data."""
+    if not hasattr(binary, "peek"):
+        binary = io.BufferedReader(binary)
+    if binary.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        binary = gzip.GzipFile(fileobj=binary, mode="rb")
+    return io.TextIOWrapper(binary, encoding="utf-8-sig")
+
+class DumpReader:
+    """Stream country objects out of dump files, directories and archives."""
+    
+    def __init__(self, paths: Iterable[str], chunk_size: int = READ_CHUNK_SIZE):
+        """
+        Args:
+            paths: Dump files, directories or tar/zip archives.
+            chunk_size: Characters read per call.
+        """
+        self.paths = list(paths)
+        self.chunk_size = chunk_size
+        self.files = 0
+    
+    def _files(self, path: str) -> Iterator[Tuple[str, IO[bytes]]]:
+        """
+        Open every dump file below a path.
+        
+        Args:
+            path: Dump file, directory or archive.
+        
+        Yields:
+            (name, binary stream) pairs in name order.
+        """
+        if os.path.isdir(path):
+            for directory, subdirectories, file_names in os.walk(path):
+                subdirectories.sort()
+                for file_name in sorted(file_names):
+                    yield from self._files(os.path.join(directory, file_name))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for member in sorted(archive.namelist()):
+                    if not member.endswith("/"):
+                        with archive.open(member) as member_file:
+                            yield f"{path}:{member}", member_file
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path, "r:*") as archive:
+                members = sorted((member for member in archive if member.isfile()), key=lambda member: member.name)
+                for member in members:
+                    with archive.extractfile(member) as member_file:
+                        yield f"{path}:{member.name}", member_file
+        else:
+            with open(path, "rb") as dump_file:
+                yield path, dump_file
+    
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the raw country objects of every dump file in order.
+        
+        Yields:
+            Country objects as returned by the REST Countries API.
+        
+        Raises:
+            ValueError: If a dump file is not valid JSON.
+        """
+        for path in self.paths:
+            for name, binary in self._files(path):
+                self.files += 1
+                logger.info(f"Reading country dump {name}")
+                text = _open_text(binary)
+                try:
+                    yield from iter_json_records(text, self.chunk_size)
+                except (ValueError, OSError, EOFError) as e:
+                    raise ValueError(f"Error reading country dump {name}: {str(e)}") from e
+                finally:
+                    text.detach()
+
+class DumpIngestor:
+    """Feed dump files through CountryDataProcessor in bounded batches."""
+    
+    @staticmethod
+    def _batches(records: Iterator[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Group records into lists of at most ``batch_size``."""
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def ingest(paths: Iterable[str], batch_size: Optional[int] = None,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Ingest local dumps into the database.
+        
+        Each batch is processed and synced like a refresh, so unchanged
+        countries are not rewritten and history is recorded for changed ones.
+        
+        Args:
+            paths: Dump files, directories or tar/zip archives.
+            batch_size: Records per batch (defaults to INGEST_BATCH_SIZE).
+            progress: Called with the running totals after every batch.
+        
+        Returns:
+            Dictionary with the ``files`` and ``records`` read, the sync counts,
+            ``elapsed_seconds`` and ``rows_per_second``.
+        
+        Raises:
+            ValueError: If a dump file is not valid JSON.
+        """
+        if batch_size is None:
+            batch_size = current_app.config.get("INGEST_BATCH_SIZE", 500)
+        batch_size = max(1, batch_size)
+        
+        reader = DumpReader(paths)
+        totals: Dict[str, Any] = {
+            "files": 0, "records": 0,
+            "inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0, "invalid": 0
+        }
+        started = time.perf_counter()
+        
+        def update_rates() -> None:
+            elapsed = time.perf_counter() - started
+            totals["files"] = reader.files
+            totals["elapsed_seconds"] = round(elapsed, 3)
+            totals["rows_per_second"] = round(totals["records"] / elapsed, 1) if elapsed > 0 else 0.0
+        
+        for batch in DumpIngestor._batches(reader.records(), batch_size):
+            processed_batch = CountryDataProcessor.process_countries_batch(batch)
+            for error in processed_batch.errors:
+                logger.warning(f"Invalid country record {totals['records'] + error.index} "
+                               f"({error.name or 'unnamed'}): {error.field}: {error.message}")
+            counts = CountryDataProcessor.sync_countries_to_db(processed_batch.records)
+            totals["records"] += len(batch)
+            totals["invalid"] += len(processed_batch.errors)
+            for key, value in counts.items():
+                totals[key] += value
+            update_rates()
+            logger.info(f"Ingested {totals['records']} records at {totals['rows_per_second']} rows/s")
+            if progress:
+                progress(totals)
+        
+        update_rates()
+        if totals["inserted"] or totals["updated"]:
+            # Materialize statistics for the new data generation
+            CountryStatsService.materialize()
+        return totals
+
+@click.command("ingest-dump")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("--batch-size", type=click.IntRange(min=1), default=None,
+              help="Records per batch (defaults to INGEST_BATCH_SIZE).")
+@with_appcontext
+def ingest_dump_command(paths, batch_size):
+    """Load countries from local REST Countries dump files."""
+    def report(totals: Dict[str, Any]) -> None:
+        click.echo(f"{totals['records']} records from {totals['files']} files, "
+                   f"{totals['rows_per_second']} rows/s", err=True)
+    
+    try:
+        totals = DumpIngestor.ingest(paths, batch_size, progress=report)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    click.echo(
+        f"Ingested {totals['records']} records from {totals['files']} files in "
+        f"{totals['elapsed_seconds']}s ({totals['rows_per_second']} rows/s): "
+        f"{totals['inserted']} inserted, {totals['updated']} updated, {totals['unchanged']} unchanged, "
+        f"{totals['skipped']} skipped, {totals['failed']} failed, {totals['invalid']} invalid"
+    )
+
+if __name__ == "__main__":
+    from app import create_app
+    
+    with create_app().app_context():
+        ingest_dump_command.main(prog_name="python -m services.dump_ingest")
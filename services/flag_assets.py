@@ -0,0 +1,299 @@
+import base64
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from models import Country, FlagAsset
+from app import db
+from services.country_snapshot import CountrySnapshot, CountrySnapshotCache
+from services.data_generation import DataGeneration
+
+logger = logging.getLogger(__name__)
+
+# Flag files are named by this many hex digits of the SHA-256 of their content
+HASH_LENGTH = 20
+
+# Names the flag route serves; anything else is a 404
+FLAG_FILENAME = re.compile(r"^[0-9a-f]{%d}\.svg$" % HASH_LENGTH)
+
+FLAG_MIMETYPE = "image/svg+xml"
+
+_SVG_COMMENT = re.compile(rb"<!--.*?-->", re.S)
+_SVG_WHITESPACE = re.compile(rb">\s+<")
+
+def minify_svg(body: bytes) -> bytes:
+    """
+    Strip comments and the whitespace between tags from an SVG document.
+    
+    Args:
+        body: SVG document.
+    
+    Returns:
+        Smaller document that renders the same.
+    """
+    body = _SVG_COMMENT.sub(b"", body)
+    return _SVG_WHITESPACE.sub(b"><", body).strip()
+
+class FlagDownload(NamedTuple):
+    """Result of fetching one flag; ``body`` is None when the stored copy is still current."""
+    url: str
+    body: Optional[bytes]
+    etag: Optional[str]
+
+class FlagStore:
+    """Download flag images once and keep them on disk under content-hashed names."""
+    
+    @staticmethod
+    def _download(url: str, etag: Optional[str] = None) -> Optional[FlagDownload]:
+        """
+        GET a flag image, conditionally on the ETag of the stored copy.
+        
+        Args:
+            url: Upstream flag URL.
+            etag: ETag of the stored copy, if any.
+        
+        Returns:
+            FlagDownload, or None if the request failed or the body is not an SVG image.
+        
+        Raises:
+            PermanentFetchError: On HTTP errors that retrying cannot fix, e.g. a 404.
+        """
+        import requests
+        from services.data_fetcher import PermanentFetchError, RestCountriesAPI, is_retryable
+        from services.metrics import RequestMetrics
+        
+        headers = {"Accept": f"{FLAG_MIMETYPE},*/*;q=0.8"}
+        if etag:
+            headers["If-None-Match"] = etag
+        try:
+            with RequestMetrics.upstream_request("/flags") as outcome:
+                response = RestCountriesAPI.get_session().get(url, headers=headers, timeout=RestCountriesAPI.TIMEOUT)
+                outcome["status"] = response.status_code
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching flag {url}: {str(e)}")
+            if not is_retryable(e):
+                raise PermanentFetchError(str(e)) from e
+            return None
+        
+        if response.status_code == 304:
+            return FlagDownload(url, None, etag)
+        if b"<svg" not in response.content[:4096]:
+            logger.error(f"Flag {url} is not an SVG image")
+            return None
+        return FlagDownload(url, response.content, response.headers.get("ETag"))
+    
+    @staticmethod
+    def _write(directory: str, body: bytes) -> str:
+        """
+        Store a flag image under the hash of its content, unless an identical one exists.
+        
+        Args:
+            directory: Flag directory.
+            body: Image content.
+        
+        Returns:
+            File name of the image.
+        """
+        filename = f"{hashlib.sha256(body).hexdigest()[:HASH_LENGTH]}.svg"
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            # Written under a temporary name so the route never serves a partial file
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, "wb") as output:
+                output.write(body)
+            os.replace(temporary, path)
+        return filename
+    
+    @staticmethod
+    def sync(force: bool = False) -> Dict[str, int]:
+        """
+        Download the flags of the stored countries that have no local copy yet.
+        
+        Flag URLs already stored are skipped while their file exists. With
+        ``force`` they are revalidated with ``If-None-Match`` instead, so only
+        changed images are transferred. Downloads run on the REST Countries
+        thread pool, at most REST_COUNTRIES_MAX_CONCURRENCY at once, each
+        retried with backoff; flags still missing after REFRESH_FETCH_TIMEOUT
+        count as failed, and client errors such as a 404 are not retried.
+        Identical images share one file. When a country's page would show a
+        different image, the data generation is bumped so cached pages pick
+        it up.
+        
+        Args:
+            force: Revalidate flags that are already stored.
+        
+        Returns:
+            Dictionary with the number of ``flags`` referenced and of flags
+            ``downloaded``, ``unchanged`` and ``failed``.
+        """
+        from services.data_fetcher import FetchTimeoutError, RestCountriesAPI
+        
+        directory = current_app.config["FLAG_CACHE_DIR"]
+        os.makedirs(directory, exist_ok=True)
+        
+        urls = {url for (url,) in db.session.query(Country.flag_url).distinct() if url}
+        assets = {asset.url: asset for asset in FlagAsset.query.filter(FlagAsset.url.in_(urls))} if urls else {}
+        # URL -> ETag to revalidate with (None downloads unconditionally)
+        pending: Dict[str, Optional[str]] = {}
+        for url in urls:
+            asset = assets.get(url)
+            if asset is None or not os.path.exists(os.path.join(directory, asset.filename)):
+                pending[url] = None
+            elif force:
+                pending[url] = asset.etag
+        
+        counts = {"flags": len(urls), "downloaded": 0, "unchanged": len(urls) - len(pending), "failed": 0}
+        futures = [RestCountriesAPI.submit(FlagStore._download, url, etag) for url, etag in pending.items()]
+        deadline = time.monotonic() + current_app.config["REFRESH_FETCH_TIMEOUT"]
+        minify = current_app.config["FLAG_MINIFY"]
+        changed = False
+        for future in futures:
+            try:
+                result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FetchTimeoutError:
+                future.cancel()
+                result = None
+            if result is None:
+                counts["failed"] += 1
+                continue
+            if result.body is None:
+                counts["unchanged"] += 1
+                continue
+            
+            filename = FlagStore._write(directory, minify_svg(result.body) if minify else result.body)
+            asset = assets.get(result.url)
+            if asset is None:
+                db.session.add(FlagAsset(url=result.url, filename=filename, etag=result.etag))
+                changed = True
+            else:
+                changed = changed or asset.filename != filename
+                asset.filename = filename
+                asset.etag = result.etag
+                asset.fetched_at = datetime.utcnow()
+            counts["downloaded"] += 1
+        
+        if changed:
+            DataGeneration.bump()
+        db.session.commit()
+        logger.info(
+            f"Synced {counts['flags']} flags: {counts['downloaded']} downloaded, "
+            f"{counts['unchanged']} unchanged, {counts['failed']} failed"
+        )
+        return counts
+
+class FlagIndex:
+    """Local flag files of one country snapshot, by upstream URL."""
+    
+    _cached: Optional["FlagIndex"] = None
+    _lock = threading.Lock()
+    
+    def __init__(self, snapshot: CountrySnapshot):
+        """
+        Load the stored flag files.
+        
+        Args:
+            snapshot: Snapshot the index belongs to; flag files only change
+                along with the data generation.
+        """
+        self.snapshot = snapshot
+        self.files: Dict[str, str] = dict(db.session.query(FlagAsset.url, FlagAsset.filename).all())
+        self.directory = current_app.config["FLAG_CACHE_DIR"]
+        self._data_uris: Dict[str, str] = {}
+    
+    @staticmethod
+    def get() -> "FlagIndex":
+        """
+        Get the index for the current snapshot, reloading it when the data changes.
+        
+        Returns:
+            Current flag index.
+        """
+        snapshot = CountrySnapshotCache.get()
+        index = FlagIndex._cached
+        if index is None or index.snapshot is not snapshot:
+            with FlagIndex._lock:
+                index = FlagIndex._cached
+                if index is None or index.snapshot is not snapshot:
+                    index = FlagIndex(snapshot)
+                    FlagIndex._cached = index
+                    logger.info(f"Loaded {len(index.files)} local flags for generation {snapshot.generation}")
+        return index
+    
+    def data_uri(self, filename: str) -> Optional[str]:
+        """
+        Get a flag file as a ``data:`` URI, reading it on first use.
+        
+        Args:
+            filename: Flag file name.
+        
+        Returns:
+            Base64 data URI, or None if the file is missing.
+        """
+        data_uri = self._data_uris.get(filename)
+        if data_uri is None:
+            try:
+                with open(os.path.join(self.directory, filename), "rb") as image:
+                    data_uri = f"data:{FLAG_MIMETYPE};base64,{base64.b64encode(image.read()).decode('ascii')}"
+            except OSError as e:
+                logger.error(f"Error reading flag {filename}: {str(e)}")
+                return None
+            self._data_uris[filename] = data_uri
+        return data_uri
+    
+    def src(self, url: str, inline: bool = False) -> str:
+        """
+        Get the ``src`` of a flag image.
+        
+        Args:
+            url: Upstream flag URL.
+            inline: Embed the image as a data URI instead of linking it.
+        
+        Returns:
+            Local URL or data URI of the stored copy, or the upstream URL if
+            the flag has not been downloaded.
+        """
+        filename = self.files.get(url)
+        if filename is None:
+            return url
+        if inline:
+            return self.data_uri(filename) or url
+        return url_for("flags.flag", filename=filename)
+
+def flag_src(url: Optional[str], inline: bool = False) -> Optional[str]:
+    """
+    Template helper returning the ``src`` of a country's flag.
+    
+    Args:
+        url: Upstream flag URL (``Country.flag_url``).
+        inline: Embed the image as a data URI instead of linking it.
+    
+    Returns:
+        Local URL or data URI when FLAG_CACHE_ENABLED and the flag is stored,
+        else the upstream URL.
+    """
+    if not url or not current_app.config["FLAG_CACHE_ENABLED"]:
+        return url
+    try:
+        return FlagIndex.get().src(url, inline)
+    except Exception as e:
+        logger.error(f"Error resolving local flag for {url}: {str(e)}")
+        return url
+
+@click.command("sync-flags")
+@click.option("--force", is_flag=True, help="Revalidate flags that are already stored.")
+@with_appcontext
+def sync_flags_command(force):
+    """Download missing or changed country flags into FLAG_CACHE_DIR."""
+    counts = FlagStore.sync(force=force)
+    click.echo(
+        f"{counts['flags']} flags: {counts['downloaded']} downloaded, "
+        f"{counts['unchanged']} unchanged, {counts['failed']} failed"
+    )
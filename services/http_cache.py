@@ -0,0 +1,333 @@
+import gzip
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+from flask import Flask, Response, current_app, make_response, request, session
+from services.data_generation import DataGeneration
+from services.metrics import (
+    HTTP_CACHE_BYTES, HTTP_CACHE_ENTRIES, HTTP_CACHE_EVICTIONS, HTTP_CACHE_REQUESTS, endpoint_label
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are only gzip-compressed
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with gzip or brotli."""
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+class CachedBody:
+    """Response body of one URL for one data generation, with its compressed variants."""
+    
+    def __init__(self, body: bytes, mimetype: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.encoded: Dict[str, bytes] = {}
+        # Bytes of this body the ResponseCache has counted so far
+        self.accounted = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def size(self) -> int:
+        """Bytes held by the body and its compressed variants."""
+        return len(self.body) + sum(len(encoded) for encoded in self.encoded.values())
+    
+    def encode(self, encoding: str) -> bytes:
+        """
+        Get the body compressed with an encoding, compressing it on first use.
+        
+        Args:
+            encoding: "gzip" or "br".
+        
+        Returns:
+            Compressed body.
+        """
+        encoded = self.encoded.get(encoding)
+        if encoded is None:
+            with self._lock:
+                encoded = self.encoded.get(encoding)
+                if encoded is None:
+                    encoded = _compress(self.body, encoding)
+                    self.encoded[encoding] = encoded
+        return encoded
+
+class ResponseCache:
+    """
+    Process-local LRU cache of response bodies, emptied whenever the data generation changes.
+    
+    Bounded by HTTP_CACHE_MAX_ENTRIES bodies and HTTP_CACHE_MAX_BYTES bytes,
+    counting each body with its compressed variants and its key.
+    """
+    
+    _generation: Optional[int] = None
+    _bodies: "OrderedDict[str, CachedBody]" = OrderedDict()
+    _bytes = 0
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get(generation: int, key: str) -> Optional[CachedBody]:
+        """
+        Get a cached body.
+        
+        Args:
+            generation: Current data generation.
+            key: Request path including the query string.
+        
+        Returns:
+            Cached body or None.
+        """
+        with ResponseCache._lock:
+            if ResponseCache._generation != generation:
+                return None
+            cached = ResponseCache._bodies.get(key)
+            if cached is not None:
+                ResponseCache._bodies.move_to_end(key)
+            return cached
+    
+    @staticmethod
+    def put(generation: int, key: str, cached: CachedBody) -> None:
+        """
+        Store a body, evicting the least recently used ones beyond the cache limits.
+        
+        Bodies larger than HTTP_CACHE_MAX_BYTES on their own are not stored.
+        
+        Args:
+            generation: Data generation the body was rendered for.
+            key: Request path including the query string.
+            cached: Body to store.
+        """
+        config = current_app.config
+        if len(key) + cached.size > config["HTTP_CACHE_MAX_BYTES"]:
+            return
+        with ResponseCache._lock:
+            if ResponseCache._generation != generation:
+                if ResponseCache._generation is not None and generation < ResponseCache._generation:
+                    return
+                ResponseCache._generation = generation
+                ResponseCache._bodies = OrderedDict()
+                ResponseCache._bytes = 0
+            replaced = ResponseCache._bodies.pop(key, None)
+            if replaced is not None:
+                ResponseCache._bytes -= len(key) + replaced.accounted
+            cached.accounted = cached.size
+            ResponseCache._bodies[key] = cached
+            ResponseCache._bytes += len(key) + cached.accounted
+            ResponseCache._evict(config["HTTP_CACHE_MAX_ENTRIES"], config["HTTP_CACHE_MAX_BYTES"])
+    
+    @staticmethod
+    def account(generation: int, key: str, cached: CachedBody) -> None:
+        """
+        Count compressed variants added to a stored body since it was last counted.
+        
+        Args:
+            generation: Data generation the body was rendered for.
+            key: Request path including the query string.
+            cached: Body that may have grown.
+        """
+        if cached.size == cached.accounted:
+            return
+        config = current_app.config
+        with ResponseCache._lock:
+            if ResponseCache._generation != generation or ResponseCache._bodies.get(key) is not cached:
+                return
+            size = cached.size
+            ResponseCache._bytes += size - cached.accounted
+            cached.accounted = size
+            ResponseCache._evict(config["HTTP_CACHE_MAX_ENTRIES"], config["HTTP_CACHE_MAX_BYTES"])
+    
+    @staticmethod
+    def _evict(max_entries: int, max_bytes: int) -> None:
+        """Drop least recently used bodies until both limits hold; the caller holds the lock."""
+        bodies = ResponseCache._bodies
+        evicted = 0
+        while bodies and (len(bodies) > max_entries or ResponseCache._bytes > max_bytes):
+            key, cached = bodies.popitem(last=False)
+            ResponseCache._bytes -= len(key) + cached.accounted
+            evicted += 1
+        if evicted:
+            HTTP_CACHE_EVICTIONS.inc(evicted)
+        HTTP_CACHE_ENTRIES.set(len(bodies))
+        HTTP_CACHE_BYTES.set(ResponseCache._bytes)
+    
+    @staticmethod
+    def stats() -> Dict[str, Optional[int]]:
+        """
+        Describe the cache contents.
+        
+        Returns:
+            Dictionary with the cached ``generation``, ``entries`` and ``bytes``.
+        """
+        with ResponseCache._lock:
+            return {
+                "generation": ResponseCache._generation,
+                "entries": len(ResponseCache._bodies),
+                "bytes": ResponseCache._bytes
+            }
+    
+    @staticmethod
+    def clear() -> None:
+        """Drop every cached body."""
+        with ResponseCache._lock:
+            ResponseCache._generation = None
+            ResponseCache._bodies = OrderedDict()
+            ResponseCache._bytes = 0
+            HTTP_CACHE_ENTRIES.set(0)
+            HTTP_CACHE_BYTES.set(0)
+    
+    @staticmethod
+    def warm(app: Flask, paths: Optional[List[str]] = None) -> int:
+        """
+        Render pages into this process's cache for the current data generation.
+        
+        Each path is requested through the test client, so it runs the same
+        view, decorators and error handling as a real request.
+        
+        Args:
+            app: Flask application.
+            paths: Paths to request, defaults to HTTP_CACHE_WARM_PATHS.
+        
+        Returns:
+            Number of paths that rendered successfully.
+        """
+        if paths is None:
+            paths = app.config["HTTP_CACHE_WARM_PATHS"]
+        if not paths or not app.config["HTTP_CACHE_ENABLED"]:
+            return 0
+        
+        start = time.perf_counter()
+        warmed = 0
+        client = app.test_client()
+        for path in paths:
+            try:
+                response = client.get(path)
+                if response.status_code == 200:
+                    warmed += 1
+                else:
+                    logger.warning(f"Cache warming got {response.status_code} for {path}")
+                response.close()
+            except Exception as e:
+                logger.warning(f"Error warming response cache for {path}: {str(e)}")
+        logger.info(f"Warmed response cache with {warmed}/{len(paths)} pages in {time.perf_counter() - start:.2f}s")
+        return warmed
+
+def _etag(generation: int, key: str) -> str:
+    """
+    Unquoted ETag value of a URL's representation for a data generation.
+    
+    Sent as a weak ETag, because the gzip, brotli and identity encodings share it.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return f"g{generation}-{digest}"
+
+def _choose_encoding() -> Optional[str]:
+    """Best content encoding accepted by the client, or None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def _cache_control() -> str:
+    """Cache-Control header value for cacheable responses."""
+    config = current_app.config
+    value = f"public, max-age={config['HTTP_CACHE_MAX_AGE']}"
+    if config["HTTP_CACHE_STALE_WHILE_REVALIDATE"] > 0:
+        value += f", stale-while-revalidate={config['HTTP_CACHE_STALE_WHILE_REVALIDATE']}"
+    return value
+
+def _build_response(cached: CachedBody, etag: str, negotiated: bool = False) -> Response:
+    """Build a 200 response from a cached body, compressed if the client accepts it."""
+    encoding = _choose_encoding() if len(cached.body) >= MIN_COMPRESS_SIZE else None
+    body = cached.encode(encoding) if encoding else cached.body
+    response = Response(body, mimetype=cached.mimetype)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    _set_cache_headers(response, etag, negotiated)
+    return response
+
+def _set_cache_headers(response: Response, etag: str, negotiated: bool = False) -> None:
+    """Set the validator and caching headers shared by 200 and 304 responses."""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = _cache_control()
+    response.vary.add("Accept-Encoding")
+    if negotiated:
+        response.vary.add("Accept")
+
+def cache_response(skip_if_flashed: bool = False, negotiate: Optional[Callable[[], str]] = None) -> Callable:
+    """
+    Make a read-only view cacheable per data generation.
+    
+    Responses carry a weak ETag derived from the data generation and the URL,
+    so ``If-None-Match`` revalidation answers 304 without running the view.
+    Successful bodies are kept in the bounded ResponseCache for the generation,
+    and their gzip and brotli encodings are computed once per generation. Hits,
+    misses, 304s and bypasses are counted in ``http_cache_requests_total``.
+    
+    Args:
+        skip_if_flashed: Bypass caching while the session has flashed messages,
+            for HTML pages that render them.
+        negotiate: Function returning the media type the view will respond with
+            for the current request, for views that negotiate on ``Accept``. Each
+            media type is cached and tagged separately, and responses vary on Accept.
+    
+    Returns:
+        View decorator.
+    """
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config["HTTP_CACHE_ENABLED"]:
+                return view(*args, **kwargs)
+            endpoint = endpoint_label()
+            if skip_if_flashed and session.get("_flashes"):
+                HTTP_CACHE_REQUESTS.inc(endpoint=endpoint, result="bypass")
+                return view(*args, **kwargs)
+            
+            try:
+                generation = DataGeneration.current()
+            except Exception as e:
+                logger.error(f"Error reading data generation, serving uncached: {str(e)}")
+                HTTP_CACHE_REQUESTS.inc(endpoint=endpoint, result="bypass")
+                return view(*args, **kwargs)
+            
+            key = request.full_path
+            negotiated = negotiate is not None
+            if negotiated:
+                key = f"{negotiate()} {key}"
+            etag = _etag(generation, key)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+                _set_cache_headers(response, etag, negotiated)
+                HTTP_CACHE_REQUESTS.inc(endpoint=endpoint, result="not_modified")
+                return response
+            
+            cached = ResponseCache.get(generation, key)
+            if cached is None:
+                HTTP_CACHE_REQUESTS.inc(endpoint=endpoint, result="miss")
+                response = make_response(view(*args, **kwargs))
+                # Errors and redirects are never cached
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                cached = CachedBody(response.get_data(), response.mimetype)
+                ResponseCache.put(generation, key, cached)
+            else:
+                HTTP_CACHE_REQUESTS.inc(endpoint=endpoint, result="hit")
+            response = _build_response(cached, etag, negotiated)
+            # Count gzip and brotli variants compressed for this response
+            ResponseCache.account(generation, key, cached)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,341 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for the number of SQL statements issued by one request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+# Longest statement text written to the slow-query log
+SLOW_QUERY_LOG_MAX_LENGTH = 500
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Format a label set, with an optional extra pre-formatted label."""
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter with labels."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        MetricsRegistry.register(self)
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the counter.
+        
+        Args:
+            amount: Amount to add.
+            **labels: Value of every label of the counter.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        """Render the counter in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Gauge:
+    """Value that can go up and down, with labels."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        MetricsRegistry.register(self)
+    
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the gauge.
+        
+        Args:
+            value: New value.
+            **labels: Value of every label of the gauge.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+    
+    def render(self) -> List[str]:
+        """Render the gauge in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """Histogram with labels and fixed upper bounds."""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count of observations per bucket (the last one is +Inf), and their sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+        MetricsRegistry.register(self)
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+        
+        Args:
+            value: Observed value.
+            **labels: Value of every label of the histogram.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            series[0][bucket] += 1
+            series[1][0] += value
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of a block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Every metric of this process."""
+    
+    _metrics: List = []
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def register(metric) -> None:
+        """Add a metric to the registry."""
+        with MetricsRegistry._lock:
+            MetricsRegistry._metrics.append(metric)
+    
+    @staticmethod
+    def render() -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text.
+        """
+        with MetricsRegistry._lock:
+            metrics = list(MetricsRegistry._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.",
+    ("method", "endpoint", "status")
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "http_request_sql_queries", "SQL statements issued while handling one HTTP request.",
+    ("endpoint",), QUERY_COUNT_BUCKETS
+)
+REQUEST_SQL_DURATION = Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL statements while handling one HTTP request.",
+    ("endpoint",)
+)
+SQL_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Time spent executing individual SQL statements, in and out of requests.",
+    ("operation",)
+)
+SLOW_QUERIES = Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_LOG_SECONDS.", ("operation",)
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Time spent in REST Countries API requests.",
+    ("path", "status")
+)
+REFRESH_STAGE_DURATION = Histogram(
+    "refresh_stage_duration_seconds", "Time spent in each refresh pipeline stage.",
+    ("stage",), DEFAULT_BUCKETS + (30.0, 60.0, 120.0)
+)
+HTTP_CACHE_REQUESTS = Counter(
+    "http_cache_requests_total", "Requests to cacheable views by outcome: hit, miss, not_modified or bypass.",
+    ("endpoint", "result")
+)
+HTTP_CACHE_EVICTIONS = Counter(
+    "http_cache_evictions_total", "Response bodies evicted to stay within HTTP_CACHE_MAX_ENTRIES and HTTP_CACHE_MAX_BYTES."
+)
+HTTP_CACHE_ENTRIES = Gauge(
+    "http_cache_entries", "Response bodies in this process's response cache."
+)
+HTTP_CACHE_BYTES = Gauge(
+    "http_cache_bytes", "Bytes of response bodies and compressed variants in this process's response cache."
+)
+
+def endpoint_label() -> str:
+    """Label of the current request: its URL rule, so path parameters do not add series."""
+    if request.url_rule is not None:
+        return request.url_rule.rule
+    return "unmatched"
+
+def _operation(statement: str) -> str:
+    """First keyword of a SQL statement, e.g. SELECT."""
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+class RequestMetrics:
+    """Collect per-request, per-query, upstream and refresh-stage timings."""
+    
+    _slow_query_seconds: float = 0.0
+    _listening = False
+    
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        """
+        Install the request hooks and SQL event listeners.
+        
+        Args:
+            app: Flask application; METRICS_ENABLED turns collection off and a
+                positive SLOW_QUERY_LOG_SECONDS logs statements slower than it.
+        """
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        RequestMetrics._slow_query_seconds = app.config.get("SLOW_QUERY_LOG_SECONDS", 0.0)
+        app.before_request(RequestMetrics._before_request)
+        app.after_request(RequestMetrics._after_request)
+        
+        if not RequestMetrics._listening:
+            # Listen on the Engine class so engines created later are covered too
+            event.listen(Engine, "before_cursor_execute", RequestMetrics._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", RequestMetrics._after_cursor_execute)
+            event.listen(Engine, "handle_error", RequestMetrics._handle_error)
+            RequestMetrics._listening = True
+    
+    @staticmethod
+    def _before_request() -> None:
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_queries = 0
+        g.metrics_sql_seconds = 0.0
+    
+    @staticmethod
+    def _after_request(response):
+        started = g.get("metrics_started")
+        if started is not None:
+            endpoint = endpoint_label()
+            # Streamed bodies are still being generated; only the time to the first byte is counted
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=request.method, endpoint=endpoint, status=response.status_code
+            )
+            REQUEST_SQL_QUERIES.observe(g.metrics_sql_queries, endpoint=endpoint)
+            REQUEST_SQL_DURATION.observe(g.metrics_sql_seconds, endpoint=endpoint)
+        return response
+    
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+    
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("metrics_query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        operation = _operation(statement)
+        SQL_QUERY_DURATION.observe(elapsed, operation=operation)
+        
+        if has_request_context() and "metrics_started" in g:
+            g.metrics_sql_queries += 1
+            g.metrics_sql_seconds += elapsed
+        
+        if 0 < RequestMetrics._slow_query_seconds <= elapsed:
+            SLOW_QUERIES.inc(operation=operation)
+            where = f" during {request.method} {request.path}" if has_request_context() else ""
+            logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms){where}: {' '.join(statement.split())[:SLOW_QUERY_LOG_MAX_LENGTH]}"
+            )
+    
+    @staticmethod
+    def _handle_error(exception_context) -> None:
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        connection = exception_context.connection
+        started = connection.info.get("metrics_query_started") if connection is not None else None
+        if started:
+            started.pop()
+    
+    @staticmethod
+    def upstream_path(path: str) -> str:
+        """Label of a REST Countries path: its first segment, e.g. /name for /name/France."""
+        return "/" + path.lstrip("/").split("/", 1)[0]
+    
+    @staticmethod
+    @contextmanager
+    def upstream_request(path: str) -> Iterator[Dict[str, Optional[int]]]:
+        """
+        Time a REST Countries request.
+        
+        Args:
+            path: Requested path.
+        
+        Yields:
+            Dictionary whose ``status`` the caller sets to the response status;
+            requests that raise are recorded with status ``error``.
+        """
+        outcome: Dict[str, Optional[int]] = {"status": None}
+        start = time.perf_counter()
+        try:
+            yield outcome
+        finally:
+            UPSTREAM_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                path=RequestMetrics.upstream_path(path),
+                status=outcome["status"] if outcome["status"] is not None else "error"
+            )
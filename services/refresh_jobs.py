@@ -0,0 +1,231 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from flask import Flask, current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models import AppState, RefreshJob
+from app import db
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class RefreshJobRunner:
+    """Run refreshes as background jobs, at most one at a time across all processes."""
+    
+    # AppState row updated at the start of every enqueue to serialize it across processes
+    LOCK_KEY = "refresh.lock"
+    
+    _scheduler_thread: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _acquire_lock() -> None:
+        """
+        Take the refresh lock row for the rest of the current transaction.
+        
+        An UPDATE holds a row lock on PostgreSQL and the database write lock on
+        SQLite, so concurrent enqueues from other workers wait until we commit.
+        """
+        now = datetime.utcnow().isoformat()
+        updated = db.session.execute(
+            update(AppState).where(AppState.key == RefreshJobRunner.LOCK_KEY).values(value=now)
+        )
+        if updated.rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(AppState(key=RefreshJobRunner.LOCK_KEY, value=now))
+        except IntegrityError:
+            # Another worker created the row first; lock it instead
+            db.session.execute(
+                update(AppState).where(AppState.key == RefreshJobRunner.LOCK_KEY).values(value=now)
+            )
+    
+    @staticmethod
+    def _active_job() -> Optional[RefreshJob]:
+        """
+        Get the job currently queued or running, failing jobs that stopped heartbeating.
+        
+        Returns:
+            Active RefreshJob or None.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=current_app.config["REFRESH_JOB_STALE_SECONDS"])
+        active_job = None
+        for job in RefreshJob.query.filter(RefreshJob.status.in_(ACTIVE_STATUSES)).order_by(RefreshJob.created_at.desc()):
+            if active_job is None and job.heartbeat_at and job.heartbeat_at >= stale_before:
+                active_job = job
+                continue
+            # The worker running this job died or was restarted
+            job.status = "failed"
+            job.message = "Refresh job stopped responding"
+            job.finished_at = datetime.utcnow()
+        return active_job
+    
+    @staticmethod
+    def enqueue(force: bool = False, trigger: str = "manual",
+                min_interval: Optional[float] = None) -> Tuple[Optional[RefreshJob], bool]:
+        """
+        Start a refresh job, or join the one already in progress.
+        
+        Args:
+            force: Ignore stored ETag/Last-Modified validators.
+            trigger: What started the job ("manual" or "scheduled").
+            min_interval: Skip starting a job if one succeeded within this many seconds.
+        
+        Returns:
+            Tuple of the job (None if skipped because of ``min_interval``) and
+            whether a new job was started.
+        """
+        app = current_app._get_current_object()
+        try:
+            RefreshJobRunner._acquire_lock()
+            
+            active_job = RefreshJobRunner._active_job()
+            if active_job is not None:
+                db.session.commit()
+                return active_job, False
+            
+            if min_interval is not None:
+                recent_after = datetime.utcnow() - timedelta(seconds=min_interval)
+                recent_job = RefreshJob.query.filter(
+                    RefreshJob.status == "succeeded",
+                    RefreshJob.finished_at >= recent_after
+                ).first()
+                if recent_job is not None:
+                    db.session.commit()
+                    return None, False
+            
+            # Finished jobs are only kept for a week
+            RefreshJob.query.filter(
+                RefreshJob.status.notin_(ACTIVE_STATUSES),
+                RefreshJob.created_at < datetime.utcnow() - timedelta(days=7)
+            ).delete(synchronize_session=False)
+            
+            job = RefreshJob(
+                id=uuid.uuid4().hex,
+                status="queued",
+                trigger=trigger,
+                force=force,
+                stage="queued",
+                progress=0,
+                heartbeat_at=datetime.utcnow()
+            )
+            db.session.add(job)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        logger.info(f"Starting {trigger} refresh job {job.id}")
+        threading.Thread(
+            target=RefreshJobRunner._run,
+            args=(app, job.id),
+            name=f"refresh-job-{job.id[:8]}",
+            daemon=True
+        ).start()
+        return job, True
+    
+    @staticmethod
+    def get_job(job_id: str) -> Optional[RefreshJob]:
+        """
+        Get a refresh job by id.
+        
+        Args:
+            job_id: Job id returned by enqueue.
+        
+        Returns:
+            RefreshJob or None if it does not exist.
+        """
+        return db.session.get(RefreshJob, job_id)
+    
+    @staticmethod
+    def _run(app: Flask, job_id: str) -> None:
+        """
+        Execute a job's refresh pipeline on a background thread.
+        
+        Args:
+            app: Flask application to push a context for.
+            job_id: Id of the queued job.
+        """
+        with app.app_context():
+            try:
+                job = db.session.get(RefreshJob, job_id)
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+                job.heartbeat_at = job.started_at
+                db.session.commit()
+                
+                def report_progress(stage: str, percent: int) -> None:
+                    job.stage = stage
+                    job.progress = percent
+                    job.heartbeat_at = datetime.utcnow()
+                    db.session.commit()
+                
+                try:
+                    # Imported here so the HTTP client stack only loads once a refresh runs
+                    from services.refresh_pipeline import RefreshPipeline
+                    result = RefreshPipeline.run(force=job.force, progress=report_progress)
+                    job.status = "succeeded"
+                    job.message = result["message"]
+                    job.result = json.dumps(result)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Refresh job {job_id} failed: {str(e)}")
+                    job.status = "failed"
+                    job.message = str(e)
+                
+                job.stage = "done"
+                job.progress = 100
+                job.finished_at = datetime.utcnow()
+                job.heartbeat_at = job.finished_at
+                db.session.commit()
+                logger.info(f"Refresh job {job_id} {job.status}: {job.message}")
+                
+                if job.status == "succeeded" and not result["not_modified"]:
+                    # Render the configured pages for the new generation before visitors ask for them
+                    from services.http_cache import ResponseCache
+                    ResponseCache.warm(app)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error running refresh job {job_id}: {str(e)}")
+            finally:
+                db.session.remove()
+    
+    @staticmethod
+    def start_scheduler(app: Flask) -> None:
+        """
+        Start a daemon thread that enqueues a refresh every REFRESH_INTERVAL_SECONDS.
+        
+        Every worker may run a scheduler; enqueue's lock and ``min_interval``
+        check make sure only one of them starts a job per interval.
+        
+        Args:
+            app: Flask application to push a context for.
+        """
+        interval = app.config["REFRESH_INTERVAL_SECONDS"]
+        if interval <= 0 or RefreshJobRunner._scheduler_thread is not None:
+            return
+        
+        def schedule_loop():
+            while True:
+                time.sleep(min(interval, 60))
+                with app.app_context():
+                    try:
+                        RefreshJobRunner.enqueue(trigger="scheduled", min_interval=interval)
+                    except Exception as e:
+                        logger.error(f"Error scheduling refresh job: {str(e)}")
+                    finally:
+                        db.session.remove()
+        
+        RefreshJobRunner._scheduler_thread = threading.Thread(
+            target=schedule_loop,
+            name="refresh-scheduler",
+            daemon=True
+        )
+        RefreshJobRunner._scheduler_thread.start()
+        logger.info(f"Scheduled country data refresh every {interval} seconds")
@@ -0,0 +1,163 @@
+import logging
+from concurrent.futures import TimeoutError as FetchTimeoutError
+from typing import Any, Callable, Dict, Optional
+from flask import current_app
+from models import Country, country_language
+from app import db
+from services.app_state import AppStateStore
+from services.country_stats import CountryStatsService
+from services.data_fetcher import RestCountriesAPI
+from services.data_processor import CountryDataProcessor
+from services.metrics import REFRESH_STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Processing errors included in the refresh result; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# AppState keys holding the validators of the last successful /all fetch
+ALL_COUNTRIES_ETAG_KEY = "restcountries.all.etag"
+ALL_COUNTRIES_LAST_MODIFIED_KEY = "restcountries.all.last_modified"
+
+class RefreshError(Exception):
+    """Raised when the refresh pipeline cannot complete."""
+
+class RefreshPipeline:
+    """Fetch, process and save country data from the REST Countries API."""
+    
+    @staticmethod
+    def _sync_flags(force: bool) -> Optional[Dict[str, Any]]:
+        """
+        Download new or changed flag images, without failing the refresh.
+        
+        Args:
+            force: Revalidate flags that are already stored.
+        
+        Returns:
+            Flag counts, ``{"error": ...}`` if the sync failed, or None when
+            FLAG_CACHE_ENABLED is off.
+        """
+        if not current_app.config["FLAG_CACHE_ENABLED"]:
+            return None
+        # Imported here like the fetcher, so the flag store only loads once a refresh runs
+        from services.flag_assets import FlagStore
+        
+        try:
+            with REFRESH_STAGE_DURATION.time(stage="flags"):
+                return FlagStore.sync(force=force)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error syncing flags: {str(e)}")
+            return {"error": str(e)}
+    
+    @staticmethod
+    def run(force: bool = False,
+            progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+        """
+        Run a full refresh.
+        
+        Only countries whose content changed are written. Unless ``force`` is set,
+        the fetch is conditional on the validators of the last successful refresh.
+        
+        Args:
+            force: Ignore stored ETag/Last-Modified validators.
+            progress: Callback receiving the current stage name and percentage.
+        
+        Returns:
+            Dictionary with a summary message and the refresh counts.
+        
+        Raises:
+            RefreshError: If the data cannot be fetched.
+        """
+        report = progress or (lambda stage, percent: None)
+        
+        report("fetching", 10)
+        
+        # Countries saved before the language and currency tables existed are
+        # only linked to them by a full download
+        if not force and Country.query.first() is not None and db.session.query(country_language).first() is None:
+            logger.info("Country languages are missing, ignoring stored validators")
+            force = True
+        
+        validators = {}
+        if not force:
+            validators = AppStateStore.get_many([ALL_COUNTRIES_ETAG_KEY, ALL_COUNTRIES_LAST_MODIFIED_KEY])
+        
+        # Retries and backoff run on the fetch pool, bounded by REFRESH_FETCH_TIMEOUT
+        with REFRESH_STAGE_DURATION.time(stage="fetch"):
+            fetch_future = RestCountriesAPI.submit(
+                RestCountriesAPI.fetch_all_countries_if_modified,
+                validators.get(ALL_COUNTRIES_ETAG_KEY),
+                validators.get(ALL_COUNTRIES_LAST_MODIFIED_KEY)
+            )
+            try:
+                fetch_result = fetch_future.result(timeout=current_app.config["REFRESH_FETCH_TIMEOUT"])
+            except FetchTimeoutError:
+                raise RefreshError("Timed out fetching country data from API")
+        
+        if fetch_result is None or (not fetch_result.not_modified and not fetch_result.data):
+            raise RefreshError("Failed to fetch country data from API")
+        
+        if fetch_result.not_modified:
+            # Flags missing on disk, e.g. on a new volume, are still downloaded
+            report("flags", 80)
+            flags = RefreshPipeline._sync_flags(force)
+            # A no-op unless newly stored flags bumped the data generation
+            report("statistics", 90)
+            with REFRESH_STAGE_DURATION.time(stage="statistics"):
+                CountryStatsService.materialize()
+            total_countries = Country.query.count()
+            return {
+                "message": "Country data is already up to date",
+                "not_modified": True,
+                "total_countries": total_countries,
+                "saved_countries": 0,
+                "inserted": 0,
+                "updated": 0,
+                "unchanged": total_countries,
+                "skipped": 0,
+                "failed": 0,
+                "invalid": 0,
+                "errors": [],
+                "flags": flags
+            }
+        
+        report("processing", 40)
+        countries_data = fetch_result.data
+        with REFRESH_STAGE_DURATION.time(stage="process"):
+            processed_batch = CountryDataProcessor.process_countries_batch(countries_data)
+        processed_countries = processed_batch.records
+        
+        report("saving", 60)
+        with REFRESH_STAGE_DURATION.time(stage="save"):
+            counts = CountryDataProcessor.sync_countries_to_db(processed_countries)
+        saved_count = counts["inserted"] + counts["updated"] + counts["unchanged"]
+        
+        # Keep the old validators if rows failed, so the next refresh retries them
+        if counts["failed"] == 0:
+            AppStateStore.set(ALL_COUNTRIES_ETAG_KEY, fetch_result.etag, commit=False)
+            AppStateStore.set(ALL_COUNTRIES_LAST_MODIFIED_KEY, fetch_result.last_modified, commit=False)
+            db.session.commit()
+        
+        report("flags", 80)
+        flags = RefreshPipeline._sync_flags(force)
+        
+        # Materialize statistics for the new data generation
+        report("statistics", 90)
+        with REFRESH_STAGE_DURATION.time(stage="statistics"):
+            CountryStatsService.materialize()
+        
+        return {
+            "message": (
+                f"Successfully refreshed {saved_count} countries data "
+                f"({counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged)"
+            ),
+            "not_modified": False,
+            "total_countries": len(countries_data),
+            "saved_countries": saved_count,
+            **counts,
+            "invalid": len(processed_batch.errors),
+            "errors": [error._asdict() for error in processed_batch.errors[:MAX_REPORTED_ERRORS]],
+            "flags": flags
+        }
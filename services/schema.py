@@ -0,0 +1,85 @@
+"""
+Create and upgrade the database schema.
+
+Usage:
+    flask --app main upgrade-db
+    python -m services.schema
+
+Run once per deployment, before the application workers start.
+"""
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import String, Text, inspect
+from app import db
+
+logger = logging.getLogger(__name__)
+
+class SchemaManager:
+    """Create and upgrade the database schema to match the models."""
+    
+    @staticmethod
+    def upgrade() -> None:
+        """
+        Create missing tables and add columns and indexes introduced after a table was created.
+        
+        ``db.create_all()`` never alters existing tables, so columns added to a
+        model later are appended here with ALTER TABLE and missing indexes are
+        created. Only nullable columns without server-side defaults can be added
+        this way. On PostgreSQL, VARCHAR columns changed to TEXT are widened.
+        """
+        db.create_all()
+        
+        inspector = inspect(db.engine)
+        with db.engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing_columns:
+                        continue
+                    preparer = connection.dialect.identifier_preparer
+                    column_type = column.type.compile(dialect=connection.dialect)
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    )
+                    logger.info(f"Added column {table.name}.{column.name}")
+        
+        # Widen VARCHAR columns that became TEXT; SQLite does not enforce lengths
+        if db.engine.dialect.name == "postgresql":
+            with db.engine.begin() as connection:
+                for table in db.metadata.sorted_tables:
+                    existing_types = {column["name"]: column["type"] for column in inspector.get_columns(table.name)}
+                    for column in table.columns:
+                        existing_type = existing_types.get(column.name)
+                        if (isinstance(column.type, Text) and isinstance(existing_type, String)
+                                and not isinstance(existing_type, Text)):
+                            preparer = connection.dialect.identifier_preparer
+                            connection.exec_driver_sql(
+                                f"ALTER TABLE {preparer.format_table(table)} "
+                                f"ALTER COLUMN {preparer.format_column(column)} TYPE TEXT"
+                            )
+                            logger.info(f"Widened column {table.name}.{column.name} to TEXT")
+        
+        # create_all() also skips indexes declared on tables that already exist
+        inspector = inspect(db.engine)
+        with db.engine.begin() as connection:
+            for table in db.metadata.sorted_tables:
+                existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        index.create(connection)
+                        logger.info(f"Created index {index.name}")
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Create missing tables, columns and indexes."""
+    SchemaManager.upgrade()
+    click.echo("Database schema is up to date")
+
+if __name__ == "__main__":
+    from app import create_app
+    
+    with create_app().app_context():
+        upgrade_db_command.main(prog_name="python -m services.schema")
@@ -1,27 +1,27 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // Fetch statistics data for the dashboard
-    fetchStats();
-    
-    // Initialize charts
-    initializeCharts();
+    // Fetch statistics and chart data for the dashboard in one request
+    fetchDashboard();
 });
 
 /**
- * Fetch country statistics from the API
+ * Fetch the dashboard payload from the API and fill in the page
  */
-function fetchStats() {
-    fetch('/api/stats')
+function fetchDashboard() {
+    // Revalidate so a reload right after a refresh never shows cached data
+    fetch('/api/dashboard', { cache: 'no-cache' })
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                updateStatCards(data.stats);
-                updateRegionCounts(data.stats.regions);
+                const dashboard = data.dashboard;
+                updateStatCards(dashboard.summary);
+                updateRegionCounts(dashboard.regions);
+                initializeCharts(dashboard);
             } else {
-                console.error('Error fetching stats:', data.message);
+                console.error('Error fetching dashboard data:', data.message);
             }
         })
         .catch(error => {
-            console.error('Error fetching stats:', error);
+            console.error('Error fetching dashboard data:', error);
         });
 }
 
@@ -55,34 +55,13 @@ function updateRegionCounts(regions) {
 }
 
 /**
- * Initialize all dashboard charts
+ * Initialize all dashboard charts from the dashboard payload
  */
-function initializeCharts() {
-    // Fetch data for region chart
-    fetch('/api/stats')
-        .then(response => response.json())
-        .then(statsData => {
-            if (statsData.success) {
-                initializeRegionChart(statsData.stats.regions);
-            }
-        })
-        .catch(error => {
-            console.error('Error fetching region data:', error);
-        });
-    
-    // Fetch data for population chart
-    fetch('/api/countries?sort=population&order=desc')
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                initializePopulationChart(data.data.slice(0, 10));
-                initializeAreaChart(data.data.sort((a, b) => b.area - a.area).slice(0, 10));
-                initializeDensityChart(data.data);
-            }
-        })
-        .catch(error => {
-            console.error('Error fetching countries data:', error);
-        });
+function initializeCharts(dashboard) {
+    initializeRegionChart(dashboard.regions);
+    initializePopulationChart(dashboard.top_population);
+    initializeAreaChart(dashboard.top_area);
+    initializeDensityChart(dashboard.top_density);
 }
 
 /**
@@ -256,18 +235,9 @@ function initializeDensityChart(countries) {
     const ctx = document.getElementById('densityChart');
     if (!ctx) return;
     
-    // Calculate density and filter out countries with no area
-    const countriesWithDensity = countries
-        .filter(country => country.area && country.area > 0)
-        .map(country => ({
-            name: country.name,
-            density: country.population / country.area
-        }))
-        .sort((a, b) => b.density - a.density)
-        .slice(0, 10);
-    
-    const labels = countriesWithDensity.map(country => country.name);
-    const data = countriesWithDensity.map(country => country.density);
+    // Densities are computed server-side, highest first
+    const labels = countries.map(country => country.name);
+    const data = countries.map(country => country.density);
     
     new Chart(ctx, {
         type: 'bar',
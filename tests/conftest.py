@@ -0,0 +1,77 @@
+"""
+Shared fixtures: an application on a scratch SQLite database and helpers to seed it.
+
+The snapshot, indexes and response cache are process-wide, so every app
+fixture starts from empty caches.
+"""
+import copy
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+os.environ.setdefault("REFRESH_SCHEDULER_AUTOSTART", "false")
+
+
+def _clear_caches() -> None:
+    from services.country_snapshot import CountrySnapshotCache
+    from services.http_cache import ResponseCache
+
+    CountrySnapshotCache.clear()
+    ResponseCache.clear()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application with an empty schema on a SQLite file of its own."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    from app import create_app, db
+    from services.schema import SchemaManager
+
+    app = create_app({"TESTING": True, "FLAG_CACHE_DIR": str(tmp_path / "flags")})
+    with app.app_context():
+        SchemaManager.upgrade()
+    _clear_caches()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    _clear_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_country():
+    """Factory of raw REST Countries records with a given name and code."""
+    from benchmarks.bench_processing import synthetic_raw_countries
+
+    template = synthetic_raw_countries(2)[1]
+
+    def make(name: str, cca3: str, **fields: Any) -> Dict[str, Any]:
+        record = copy.deepcopy(template)
+        record["name"] = {"common": name, "official": fields.pop("official", f"Republic of {name}")}
+        record["cca3"] = cca3
+        record["cca2"] = cca3[:2]
+        record["borders"] = []
+        record.update(fields)
+        return record
+
+    return make
+
+
+@pytest.fixture
+def seed(app):
+    """Process raw records and save them like a refresh does."""
+    from services.data_processor import CountryDataProcessor
+
+    def seed_records(records: List[Dict[str, Any]]) -> Dict[str, int]:
+        with app.app_context():
+            processed = CountryDataProcessor.process_countries_batch(records).records
+            return CountryDataProcessor.sync_countries_to_db(processed)
+
+    return seed_records
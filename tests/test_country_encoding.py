@@ -0,0 +1,28 @@
+import io
+
+import msgpack
+import pyarrow
+
+from services.country_encoding import ARROW_MIMETYPE, MSGPACK_MIMETYPE, offered_mimetypes
+
+
+def test_declared_formats_are_offered():
+    assert MSGPACK_MIMETYPE in offered_mimetypes()
+    assert ARROW_MIMETYPE in offered_mimetypes()
+
+
+def test_listing_formats_agree(client, seed, make_country):
+    seed([make_country(name, code) for name, code in [("Niger", "NER"), ("Nigeria", "NGA"), ("Mali", "MLI")]])
+    query = "/api/countries?sort=name&fields=name,population"
+    as_json = client.get(query).get_json()["data"]
+
+    response = client.get(query, headers={"Accept": MSGPACK_MIMETYPE})
+    assert response.mimetype == MSGPACK_MIMETYPE
+    assert "Accept" in response.headers["Vary"]
+    as_msgpack = msgpack.unpackb(response.data)["data"]
+    assert as_msgpack == {field: [row[field] for row in as_json] for field in ("name", "population")}
+
+    response = client.get(query, headers={"Accept": ARROW_MIMETYPE})
+    assert response.mimetype == ARROW_MIMETYPE
+    table = pyarrow.ipc.open_stream(io.BytesIO(response.data)).read_all()
+    assert table.to_pylist() == as_json
@@ -0,0 +1,51 @@
+import pytest
+
+COUNTRIES = [
+    ("Niger", "NER"),
+    ("Nigeria", "NGA"),
+    ("Luxembourg", "LUX"),
+    ("Côte d'Ivoire", "CIV"),
+]
+
+
+@pytest.fixture
+def name_index(app, seed, make_country):
+    from services.country_search import CountryNameIndex
+
+    seed([make_country(name, code) for name, code in COUNTRIES])
+    with app.app_context():
+        yield CountryNameIndex.get()
+
+
+def resolved_name(index, query):
+    position = index.resolve(query)
+    return None if position is None else index.snapshot.columns["name"][position]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Niger", "Niger"),
+    ("nigeria", "Nigeria"),
+    ("NGA", "Nigeria"),
+    ("Republic of Niger", "Niger"),
+    ("cote d'ivoire", "Côte d'Ivoire"),
+    ("Luxem", "Luxembourg"),
+])
+def test_resolve_matches_exactly_or_by_unique_prefix(name_index, query, expected):
+    assert resolved_name(name_index, query) == expected
+
+
+@pytest.mark.parametrize("query", ["Nige", "Nigerr", "Luxembourgh", "Ivoire", "zzz", ""])
+def test_resolve_does_not_guess(name_index, query):
+    assert name_index.resolve(query) is None
+
+
+def test_search_still_ranks_fuzzy_matches(name_index):
+    results = name_index.search("Nigerr", limit=2)
+    assert [name_index.snapshot.columns["name"][position] for position, _, _ in results] == ["Niger", "Nigeria"]
+
+
+def test_unknown_country_is_404(client, name_index):
+    assert client.get("/api/countries/Nigerr").status_code == 404
+    response = client.get("/api/countries/Niger")
+    assert response.status_code == 200
+    assert response.get_json()["data"]["name"] == "Niger"
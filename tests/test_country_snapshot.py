@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+# Ties on population and region, and missing area and subregion values, so
+# keyset pages have to break ties by id and place nulls consistently
+COUNTRIES = [
+    ("Niger", "NER", {"region": "Africa", "population": 5000, "area": 120.5}),
+    ("Nigeria", "NGA", {"region": "Africa", "population": 5000, "area": None}),
+    ("Mali", "MLI", {"region": "Africa", "population": 3000, "area": 80.0, "subregion": None}),
+    ("Chad", "TCD", {"region": "Africa", "population": 9000, "area": None}),
+    ("France", "FRA", {"region": "Europe", "population": 5000, "area": 550.0}),
+    ("Spain", "ESP", {"region": "Europe", "population": 4700, "area": 505.9, "subregion": None}),
+    ("Malta", "MLT", {"region": "Europe", "population": 500, "area": 0.3}),
+    ("Peru", "PER", {"region": "Americas", "population": 3300, "area": 1285.2}),
+    ("Chile", "CHL", {"region": "Americas", "population": 1900, "area": None}),
+    ("Japan", "JPN", {"region": "Asia", "population": 12500, "area": 377.9}),
+    ("Nepal", "NPL", {"region": "Asia", "population": 3000, "area": 147.2, "subregion": None}),
+    ("Fiji", "FJI", {"region": "Oceania", "population": 900, "area": 18.3}),
+]
+
+VARIANTS = [
+    "sort=name",
+    "sort=population&order=desc",
+    "sort=area",
+    "sort=-area",
+    "sort=region,-population",
+    "sort=subregion,area&region=Africa",
+    "sort=-population,name&population_min=1000&area_max=600",
+]
+
+
+@pytest.fixture
+def countries(seed, make_country):
+    seed([make_country(name, code, **fields) for name, code, fields in COUNTRIES])
+
+
+def listing(client, query):
+    body = client.get(f"/api/countries?{query}&fields=name").get_json()
+    assert body["success"], body
+    return [row["name"] for row in body["data"]], body
+
+
+def paged_listing(client, query, limit):
+    names, cursor = [], None
+    while True:
+        page, body = listing(client, f"{query}&limit={limit}" + (f"&cursor={cursor}" if cursor else ""))
+        assert len(page) <= limit
+        names.extend(page)
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return names, body["total"]
+
+
+@pytest.mark.usefixtures("countries")
+@pytest.mark.parametrize("query", VARIANTS)
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_keyset_pages_concatenate_to_the_full_listing(client, query, limit):
+    full, _ = listing(client, query)
+    paged, total = paged_listing(client, query, limit)
+
+    assert full
+    assert paged == full
+    assert total == len(full)
+
+
+@pytest.mark.usefixtures("countries")
+@pytest.mark.parametrize("query", VARIANTS)
+def test_listing_order_matches_export(client, query):
+    full, _ = listing(client, query)
+    response = client.get(f"/api/export?{query}&format=ndjson&fields=name")
+    exported = [json.loads(line)["name"] for line in response.get_data(as_text=True).splitlines() if line]
+
+    assert exported == full
+
+
+@pytest.mark.usefixtures("countries")
+def test_cursor_survives_a_changed_cursor_row(app, client):
+    from app import db
+    from models import Country
+    from services.data_generation import DataGeneration
+
+    full, _ = listing(client, "sort=population")
+    first, body = listing(client, "sort=population&limit=4")
+
+    # The last row of the page moves to the end; the next page starts after its old position
+    with app.app_context():
+        Country.query.filter_by(name=first[-1]).update({"population": 10 ** 9})
+        DataGeneration.bump()
+        db.session.commit()
+    rest, _ = listing(client, f"sort=population&cursor={body['next_cursor']}")
+
+    assert rest == full[4:] + [first[-1]]
@@ -0,0 +1,32 @@
+from models import CountryStats
+
+
+def test_read_miss_computes_without_writing(app, seed, make_country, client):
+    seed([make_country("Niger", "NER"), make_country("Nigeria", "NGA")])
+    with app.app_context():
+        assert CountryStats.query.count() == 0
+
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    assert response.get_json()["stats"]["total_countries"] == 2
+    with app.app_context():
+        assert CountryStats.query.count() == 0
+
+
+def test_materialize_upserts_once_per_generation(app, seed, make_country):
+    from services.country_stats import GLOBAL_STATS_KEY, CountryStatsService
+    from services.data_generation import DataGeneration
+
+    seed([make_country("Niger", "NER")])
+    with app.app_context():
+        first = CountryStatsService.materialize()
+        assert CountryStatsService.materialize() == first
+
+    seed([make_country("Niger", "NER"), make_country("Nigeria", "NGA")])
+    with app.app_context():
+        CountryStatsService._cached = None
+        CountryStatsService.materialize()
+        row = CountryStats.query.one()
+        assert row.key == GLOBAL_STATS_KEY
+        assert row.generation == DataGeneration.current()
+        assert CountryStatsService.get()["total_countries"] == 2
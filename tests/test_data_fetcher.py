@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from benchmarks import stub_upstream
+from benchmarks.bench_processing import synthetic_raw_countries
+from services.data_fetcher import RestCountriesAPI
+
+NAMES = ["Country 0000000", "Country 0000001", "Country 0000002"]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server, state, url = stub_upstream.start(synthetic_raw_countries(len(NAMES)))
+    monkeypatch.setattr(RestCountriesAPI, "BASE_URL", url)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_by_name(upstream):
+    result = RestCountriesAPI.fetch_countries_by_names(NAMES[:2])
+    assert [result[name][0]["name"]["common"] for name in NAMES[:2]] == NAMES[:2]
+
+
+@pytest.mark.parametrize("statuses", [(503,), (500, 502), (429,)])
+def test_retries_server_errors_and_rate_limits(upstream, statuses):
+    upstream.fail(f"/name/{NAMES[0]}", *statuses)
+    result = RestCountriesAPI.retry_fetch(RestCountriesAPI.fetch_country_by_name, NAMES[0], delay=0.01)
+    assert result[0]["name"]["common"] == NAMES[0]
+    assert upstream.hits[f"/name/{NAMES[0]}"] == len(statuses) + 1
+
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_does_not_retry_client_errors(upstream, status):
+    upstream.fail(f"/name/{NAMES[0]}", status)
+    assert RestCountriesAPI.retry_fetch(RestCountriesAPI.fetch_country_by_name, NAMES[0], delay=0.01) is None
+    assert upstream.hits[f"/name/{NAMES[0]}"] == 1
+
+
+def test_unknown_name_is_not_retried(upstream):
+    assert RestCountriesAPI.fetch_countries_by_names(["Atlantis"], timeout=5) == {"Atlantis": None}
+    assert upstream.hits["/name/Atlantis"] == 1
+
+
+def test_fetch_many_gives_up_on_stuck_requests_at_the_deadline(upstream):
+    upstream.delay(f"/name/{NAMES[2]}", 3)
+    start = time.monotonic()
+    result = RestCountriesAPI.fetch_countries_by_names(NAMES, timeout=0.5)
+    assert time.monotonic() - start < 2
+    assert result[NAMES[2]] is None
+    assert result[NAMES[0]][0]["name"]["common"] == NAMES[0]
@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks.bench_processing import synthetic_raw_countries, without_timestamps
+from services.data_processor import CountryDataProcessor
+
+
+@pytest.fixture
+def raw_countries():
+    return synthetic_raw_countries(1000, invalid_every=50)
+
+
+def process_in_batches(raw_countries, batch_size):
+    batches = [
+        CountryDataProcessor.process_countries_batch(raw_countries[offset:offset + batch_size])
+        for offset in range(0, len(raw_countries), batch_size)
+    ]
+    return batches, [record for batch in batches for record in batch.records]
+
+
+@pytest.mark.parametrize("batch_size", [1, 64, 1000])
+def test_batch_matches_per_record(raw_countries, batch_size):
+    per_record = CountryDataProcessor.process_countries_list(raw_countries)
+    _, batched = process_in_batches(raw_countries, batch_size)
+
+    assert without_timestamps(batched) == without_timestamps(per_record)
+
+
+def test_batch_shares_one_timestamp(raw_countries):
+    batches, _ = process_in_batches(raw_countries, 64)
+
+    for batch in batches:
+        assert len({record["last_updated"] for record in batch.records}) == 1
+
+
+def test_batch_reports_each_malformed_record(raw_countries):
+    batches, _ = process_in_batches(raw_countries, 64)
+
+    errors = [error for batch in batches for error in batch.errors]
+    assert len(errors) == len(raw_countries) // 50
+    assert {error.name for error in errors} == {
+        raw_countries[index]["name"]["common"] for index in range(49, len(raw_countries), 50)
+    }
+
+
+@pytest.mark.parametrize("upsert", [True, False], ids=["upsert", "per_row"])
+def test_save_countries_paths_store_the_same_rows(app, make_country, monkeypatch, upsert):
+    from models import Country
+
+    if not upsert:
+        monkeypatch.setattr(CountryDataProcessor, "get_insert_construct", staticmethod(lambda: None))
+    records = [make_country(name, code) for name, code in [("Niger", "NER"), ("Nigeria", "NGA"), ("Mali", "MLI")]]
+    with app.app_context():
+        processed = CountryDataProcessor.process_countries_batch(records).records
+        assert CountryDataProcessor.save_countries_to_db(processed) == 3
+
+        processed[0]["population"] = 42
+        assert CountryDataProcessor.save_countries_to_db(processed[:1]) == 1
+
+        stored = {country.name: country.population for country in Country.query}
+        assert stored == {"Niger": 42, "Nigeria": processed[1]["population"], "Mali": processed[2]["population"]}
@@ -0,0 +1,126 @@
+import gzip
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from benchmarks.bench_processing import synthetic_raw_countries
+from services.dump_ingest import DumpIngestor, DumpReader, iter_json_records
+
+
+def dump_2020():
+    return synthetic_raw_countries(30)
+
+
+def dump_2021():
+    records = synthetic_raw_countries(30)
+    for record in records:
+        record["population"] += 7
+    return records
+
+
+def parse(text, chunk_size):
+    return list(iter_json_records(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64 * 1024])
+@pytest.mark.parametrize("layout", ["array", "ndjson", "arrays"])
+def test_iter_json_records_across_chunk_boundaries(layout, chunk_size):
+    records = synthetic_raw_countries(5)
+    if layout == "array":
+        text = json.dumps(records, indent=2, ensure_ascii=False)
+    elif layout == "ndjson":
+        text = "\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n"
+    else:
+        text = f"{json.dumps(records[:2])}\n [ {json.dumps(records[2:])[1:-1]} ]"
+
+    assert parse(text, chunk_size) == records
+
+
+@pytest.mark.parametrize("text, message", [
+    ('[{"name": 1}, 2]', "Expected country objects"),
+    ('[{"name": 1}, {"name": ', "Invalid JSON"),
+    ('[{"name": 1}', "Unterminated array"),
+])
+def test_iter_json_records_rejects_malformed_dumps(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse(text, 4)
+
+
+def test_dump_reader_reads_files_and_archives_in_name_order(tmp_path):
+    directory = tmp_path / "dumps"
+    directory.mkdir()
+    (directory / "b.json.gz").write_bytes(gzip.compress(json.dumps([{"n": 2}]).encode()))
+    (directory / "a.json").write_text(json.dumps({"n": 1}) + "\n" + json.dumps({"n": 0}))
+
+    with tarfile.open(tmp_path / "archive.tar.gz", "w:gz") as archive:
+        for name, records in [("y.json", [{"n": 4}]), ("x.json.gz", [{"n": 3}])]:
+            body = json.dumps(records).encode()
+            if name.endswith(".gz"):
+                body = gzip.compress(body)
+            member = tarfile.TarInfo(name)
+            member.size = len(body)
+            archive.addfile(member, io.BytesIO(body))
+
+    with zipfile.ZipFile(tmp_path / "archive.zip", "w") as archive:
+        archive.writestr("later/6.json", json.dumps([{"n": 6}]))
+        archive.writestr("5.json.gz", gzip.compress(json.dumps([{"n": 5}]).encode()))
+
+    reader = DumpReader([str(directory), str(tmp_path / "archive.tar.gz"), str(tmp_path / "archive.zip")], chunk_size=5)
+
+    assert [record["n"] for record in reader.records()] == [1, 0, 2, 3, 4, 5, 6]
+    assert reader.files == 6
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    directory = tmp_path / "dumps"
+    directory.mkdir()
+    (directory / "a_2020.json").write_text(json.dumps(dump_2020()))
+    (directory / "b_2021.json.gz").write_bytes(gzip.compress(json.dumps(dump_2021()).encode()))
+    return str(directory)
+
+
+def stored_populations():
+    from models import Country
+
+    return {country.name: country.population for country in Country.query}
+
+
+def history_rows():
+    from models import CountryHistory
+
+    return CountryHistory.query.count()
+
+
+def test_ingest_replays_dumps_oldest_first(app, dumps):
+    latest = {record["name"]["common"]: record["population"] for record in dump_2021()}
+    with app.app_context():
+        totals = DumpIngestor.ingest([dumps], batch_size=500)
+
+        assert totals["records"] == 60
+        assert (totals["inserted"], totals["updated"], totals["unchanged"]) == (30, 0, 0)
+        assert stored_populations() == latest
+        history = history_rows()
+
+        totals = DumpIngestor.ingest([dumps], batch_size=500)
+
+        assert (totals["inserted"], totals["updated"], totals["unchanged"]) == (0, 0, 30)
+        assert stored_populations() == latest
+        assert history_rows() == history
+
+
+@pytest.mark.parametrize("batch_size", [7, 30, 500])
+def test_ingest_keeps_the_last_record_of_a_country(app, tmp_path, batch_size):
+    path = tmp_path / "all.json"
+    path.write_text(json.dumps(dump_2020() + dump_2021()))
+    latest = {record["name"]["common"]: record["population"] for record in dump_2021()}
+
+    with app.app_context():
+        totals = DumpIngestor.ingest([str(path)], batch_size=batch_size)
+
+        assert totals["failed"] == 0
+        assert totals["inserted"] == 30
+        assert stored_populations() == latest
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from benchmarks.explain_filters import CASES, run
+
+
+def misses(results):
+    return [(result["label"], result["indexes"]) for result in results if not result["passed"]]
+
+
+def test_filters_use_their_index_on_sqlite(app, seed, make_country):
+    seed([make_country(name, code) for name, code in [("Niger", "NER"), ("Nigeria", "NGA"), ("Mali", "MLI")]])
+
+    results = run(app)
+
+    assert [result["label"] for result in results] == [label for label, _, _ in CASES]
+    assert misses(results) == []
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_filters_use_their_index_on_postgres(monkeypatch):
+    """Plans against a scratch PostgreSQL database, e.g. a CI service container."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", os.environ["TEST_POSTGRES_URL"])
+    from app import create_app, db
+    from services.schema import SchemaManager
+
+    app = create_app({"TESTING": True})
+    with app.app_context():
+        SchemaManager.upgrade()
+    try:
+        assert misses(run(app)) == []
+    finally:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()